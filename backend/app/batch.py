@@ -0,0 +1,95 @@
+"""Batched simulations of many households against one shared series."""
+
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Executor
+from functools import partial
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import (
+    BatchRequest,
+    BatchResponse,
+    HouseholdResult,
+    PerStartYearResult,
+    SimulationInput,
+)
+from .simulate import simulate_scenarios
+from .summary import summarize_and_rank
+
+CHUNK_HOUSEHOLDS = 256
+
+
+def household_chunks(households: Sequence[SimulationInput]) -> list[list[int]]:
+    """Group household indices by retirement horizon into chunks of bounded size.
+
+    Households sharing a horizon share one growth window matrix, so each chunk is a
+    single vectorized pass.
+    """
+    groups: dict[int, list[int]] = {}
+    for index, req in enumerate(households):
+        groups.setdefault(req.retirement_years, []).append(index)
+    return [
+        group[start : start + CHUNK_HOUSEHOLDS]
+        for group in groups.values()
+        for start in range(0, len(group), CHUNK_HOUSEHOLDS)
+    ]
+
+
+def summarize_households(
+    households: list[SimulationInput],
+    series: HistoricalSeries,
+    *,
+    include_runs: bool,
+) -> list[HouseholdResult]:
+    """Simulate same-horizon households in one pass and summarize each of them."""
+    paths = simulate_scenarios(households, series, record=include_runs)
+    success_counts = np.count_nonzero(paths.success, axis=-1).tolist()
+    results = []
+    for index, req in enumerate(households):
+        summary, quantile_indices = summarize_and_rank(
+            success_counts[index],
+            paths.ending_balances[index],
+            paths.total_withdrawals[index],
+            paths.total_fees[index],
+        )
+        runs = None
+        if include_runs:
+            runs = [
+                PerStartYearResult(**run) for run in paths.scenario(index).iter_runs(req.start_year)
+            ]
+        results.append(
+            HouseholdResult(summary=summary, quantile_indices=quantile_indices, results=runs)
+        )
+    return results
+
+
+def run_batch(
+    request: BatchRequest,
+    series: HistoricalSeries,
+    executor: Executor | None = None,
+) -> BatchResponse:
+    """Simulate every household, fanning chunks out to ``executor`` when given.
+
+    Results come back in request order whatever the grouping or worker count.
+    """
+    chunks = household_chunks(request.households)
+    summarize = partial(summarize_households, include_runs=request.include_runs)
+    args = (
+        [[request.households[index] for index in chunk] for chunk in chunks],
+        [series] * len(chunks),
+    )
+    summaries: Iterator[list[HouseholdResult]]
+    if executor is None or len(chunks) == 1:
+        summaries = map(summarize, *args)
+    else:
+        summaries = executor.map(summarize, *args)
+
+    households: list[HouseholdResult | None] = [None] * len(request.households)
+    for chunk, results in zip(chunks, summaries, strict=True):
+        for index, result in zip(chunk, results, strict=True):
+            households[index] = result
+    return BatchResponse(
+        series=series.bounds,
+        households=[result for result in households if result is not None],
+    )
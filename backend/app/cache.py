@@ -0,0 +1,181 @@
+"""Bounded in-process caches for simulation results and LLM answers, plus HTTP validators."""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+from .models import CacheStats
+from .results import SimulationOutcome
+
+V = TypeVar("V")
+
+ENTRY_OVERHEAD_BYTES = 4096
+HTTP_MAX_AGE_SECONDS = int(os.environ.get("HTTP_CACHE_MAX_AGE", "300"))
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe LRU cache bounded by entry count and approximate byte size.
+
+    With ``ttl_seconds`` set, entries also expire that long after they were stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[V], int],
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create an empty cache with the given bounds and size estimator."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[V, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> V | None:
+        """Return a live cached value and mark it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self._clock():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: V) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        size = self._sizeof(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            expires = math.inf if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+            self._entries[key] = (value, size, expires)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry, e.g. after the historical dataset changes."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        """Return hit, miss and occupancy counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return CacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                hit_rate=self.hits / lookups if lookups else 0.0,
+            )
+
+
+def canonical_key(payload: BaseModel, *parts: str) -> str:
+    """Hash a validated model plus extra key parts into a stable cache key.
+
+    The model is dumped in JSON mode with sorted keys, so field order and equivalent
+    spellings of the same request (``1`` versus ``1.0``) map to one key.
+    """
+    return canonical_json_key(payload.model_dump(mode="json"), *parts)
+
+
+def canonical_json_key(payload: object, *parts: str) -> str:
+    """Hash a JSON-compatible value plus extra key parts into a stable cache key."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode())
+    for part in parts:
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()
+
+
+def entity_tag(key: str) -> str:
+    """Quote a canonical key as a weak HTTP entity tag.
+
+    The tag is weak because the gzip and identity encodings of a response share it.
+    """
+    return f'W/"{key}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Return whether an ``If-None-Match`` header value matches ``etag``.
+
+    The header may list several tags or be ``*``. If-None-Match compares weakly, so a
+    ``W/`` prefix on a listed tag is ignored.
+    """
+    if if_none_match is None:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def cache_headers(etag: str, vary: tuple[str, ...] = ()) -> dict[str, str]:
+    """Return the validator, freshness and ``Vary`` headers for a cacheable response.
+
+    Responses stay fresh for ``HTTP_CACHE_MAX_AGE`` seconds (default 300), after which
+    clients revalidate with the ETag, since the dataset may be reloaded. ``vary`` names
+    the request headers the endpoint negotiated on; the gzip middleware adds
+    ``Accept-Encoding`` itself to the bodies it may compress.
+    """
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={HTTP_MAX_AGE_SECONDS}"}
+    if vary:
+        headers["Vary"] = ", ".join(vary)
+    return headers
+
+
+def outcome_size(outcome: SimulationOutcome) -> int:
+    """Estimate the resident size of a simulation outcome in bytes."""
+    return outcome.nbytes + ENTRY_OVERHEAD_BYTES
+
+
+def answer_size(answer: str) -> int:
+    """Estimate the resident size of a cached LLM answer in bytes."""
+    return len(answer.encode()) + ENTRY_OVERHEAD_BYTES
+
+
+simulation_cache: LRUCache[SimulationOutcome] = LRUCache(
+    max_entries=int(os.environ.get("SIMULATION_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("SIMULATION_CACHE_BYTES", str(256 * 1024 * 1024))),
+    sizeof=outcome_size,
+)
+
+answer_cache: LRUCache[str] = LRUCache(
+    max_entries=int(os.environ.get("LLM_CACHE_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("LLM_CACHE_BYTES", str(16 * 1024 * 1024))),
+    sizeof=answer_size,
+    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", "3600")),
+)
@@ -1,38 +1,357 @@
 """Load and validate historical return series."""
 
 import csv
-from functools import lru_cache
+import hashlib
+import json
+import logging
+import struct
+import threading
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
 from pathlib import Path
 
-DATA_PATH = Path(__file__).resolve().parent.parent / "data" / "historical.csv"
+import numpy as np
+import numpy.typing as npt
+from numpy.lib.stride_tricks import sliding_window_view
 
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DATA_PATH = DATA_DIR / "historical.csv"
+MONTHLY_DATA_PATH = DATA_DIR / "historical_monthly.csv"
+ARTIFACT_PATH = DATA_DIR / "historical.bin"
+MONTHLY_ARTIFACT_PATH = DATA_DIR / "historical_monthly.bin"
+ARTIFACT_MAGIC = b"RPSERIES"
+ARTIFACT_FORMAT = 1
+ARTIFACT_ALIGNMENT = 8
+ARTIFACT_PREFIX = struct.Struct("<8sII")
 
-@lru_cache(maxsize=1)
-def load_historical_series() -> dict[int, tuple[float, float]]:
-    """Read the historical returns CSV into a year-indexed mapping."""
-    if not DATA_PATH.exists():
-        message = (
-            f"Missing historical data at {DATA_PATH}. Run scripts/fetch_shiller.py first."
+logger = logging.getLogger(__name__)
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+
+MONTHS_PER_YEAR = 12
+ASSETS = ("stock", "bond")
+RETURN_SUFFIX = "_return"
+
+
+@dataclass(frozen=True)
+class HistoricalSeries:
+    """Columnar annual return series backed by contiguous float64 arrays.
+
+    Years are contiguous, so a year maps to its row offset with one subtraction.
+    ``returns`` holds one row per named asset in ``assets`` (stocks and bonds first, then
+    any extra return columns) and ``growth`` stacks the matching ``1 + return`` rows as
+    an (assets x years) matrix that every allocation reuses. ``version`` fingerprints
+    the contents so caches can key on the dataset.
+
+    Sub-annual series set ``periods_per_year``; ``years`` and the year bounds then hold
+    absolute period indices (``year * periods_per_year + period``) and offsets count
+    periods, while horizons passed to the window helpers stay in years.
+    """
+
+    version: str
+    min_year: int
+    max_year: int
+    years: IntArray
+    returns: FloatArray
+    growth: FloatArray
+    periods_per_year: int = 1
+    assets: tuple[str, ...] = ASSETS
+
+    @classmethod
+    def from_columns(
+        cls,
+        years: npt.ArrayLike,
+        stock_returns: npt.ArrayLike,
+        bond_returns: npt.ArrayLike,
+        *,
+        periods_per_year: int = 1,
+        extra_returns: Mapping[str, npt.ArrayLike] | None = None,
+    ) -> "HistoricalSeries":
+        """Build a series from parallel year (or period index) and return columns.
+
+        ``extra_returns`` adds named asset return columns after stocks and bonds.
+        """
+        year_array = np.asarray(years, dtype=np.int64)
+        if year_array.size == 0:
+            message = "Historical series is empty; check data/historical.csv."
+            raise ValueError(message)
+        order = np.argsort(year_array, kind="stable")
+        year_array = year_array[order]
+        if np.any(np.diff(year_array) != 1):
+            message = "Historical series years must be unique and contiguous."
+            raise ValueError(message)
+
+        columns = {"stock": stock_returns, "bond": bond_returns, **(extra_returns or {})}
+        returns = np.empty((len(columns), year_array.size), dtype=np.float64)
+        for row, column in enumerate(columns.values()):
+            returns[row] = np.asarray(column, dtype=np.float64)[order]
+        growth = 1 + returns
+        for array in (year_array, returns, growth):
+            array.setflags(write=False)
+        assets = tuple(columns)
+        fingerprint = year_array.tobytes() + returns.tobytes()
+        if assets != ASSETS:
+            fingerprint += ",".join(assets).encode()
+        return cls(
+            version=hashlib.sha256(fingerprint).hexdigest()[:16],
+            min_year=int(year_array[0]),
+            max_year=int(year_array[-1]),
+            years=year_array,
+            returns=returns,
+            growth=growth,
+            periods_per_year=periods_per_year,
+            assets=assets,
         )
-        raise FileNotFoundError(message)
 
-    series = {}
-    with DATA_PATH.open(newline="") as handle:
+    @classmethod
+    def from_mapping(cls, series: Mapping[int, tuple[float, float]]) -> "HistoricalSeries":
+        """Build a series from a year-keyed mapping of (stock, bond) returns."""
+        years = list(series)
+        return cls.from_columns(
+            years,
+            [series[year][0] for year in years],
+            [series[year][1] for year in years],
+        )
+
+    @property
+    def stock_returns(self) -> FloatArray:
+        """Return the stock return column."""
+        returns: FloatArray = self.returns[0]
+        return returns
+
+    @property
+    def bond_returns(self) -> FloatArray:
+        """Return the bond return column."""
+        returns: FloatArray = self.returns[1]
+        return returns
+
+    def __len__(self) -> int:
+        """Return the number of years in the series."""
+        return int(self.years.size)
+
+    @property
+    def max_horizon(self) -> int:
+        """Return the longest retirement horizon, in years, the series can cover."""
+        return (self.max_year - self.min_year + 1) // self.periods_per_year
+
+    @property
+    def bounds(self) -> dict[str, int]:
+        """Return the first and last calendar years the series covers."""
+        return {
+            "min_year": self.min_year // self.periods_per_year,
+            "max_year": self.max_year // self.periods_per_year,
+        }
+
+    def offset(self, year: int) -> int:
+        """Return the row offset of a year."""
+        if not self.min_year <= year <= self.max_year:
+            message = f"Year {year} is outside the series ({self.min_year}-{self.max_year})."
+            raise KeyError(message)
+        return year - self.min_year
+
+    def start_years(self, horizon: int) -> range:
+        """Return every start year (or period) with a full window of ``horizon`` years."""
+        return range(self.min_year, self.max_year - horizon * self.periods_per_year + 2)
+
+    def growth_windows(self, horizon: int) -> FloatArray:
+        """Return a zero-copy (2 x starts x periods) view of rolling ``horizon``-year windows."""
+        return sliding_window_view(self.growth, horizon * self.periods_per_year, axis=1)
+
+
+def write_series_artifact(series: HistoricalSeries, path: Path = ARTIFACT_PATH) -> None:
+    """Write a series as a binary artifact that can be memory-mapped.
+
+    Layout: ``ARTIFACT_PREFIX`` (magic, format version and header length), the UTF-8 JSON
+    header, zero padding to an 8-byte boundary, then the data section: the (assets x
+    years) return matrix followed by the (assets x years) growth matrix, both row-major
+    little-endian float64. The header carries the series version, year bounds, asset
+    names and the SHA-256 of the data section. The file is written beside ``path`` and renamed into
+    place, so readers never see a partial artifact.
+    """
+    payload = (
+        np.ascontiguousarray(series.returns, dtype="<f8").tobytes()
+        + np.ascontiguousarray(series.growth, dtype="<f8").tobytes()
+    )
+    header = json.dumps(
+        {
+            "version": series.version,
+            "min_year": series.min_year,
+            "max_year": series.max_year,
+            "periods_per_year": series.periods_per_year,
+            "assets": list(series.assets),
+            "sha256": hashlib.sha256(payload).hexdigest(),
+        },
+        separators=(",", ":"),
+    ).encode()
+    prefix = ARTIFACT_PREFIX.pack(ARTIFACT_MAGIC, ARTIFACT_FORMAT, len(header)) + header
+    padding = b"\0" * (-len(prefix) % ARTIFACT_ALIGNMENT)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp")
+    staging.write_bytes(prefix + padding + payload)
+    staging.replace(path)
+
+
+def read_artifact_header(path: Path) -> tuple[dict[str, object], int]:
+    """Return an artifact's JSON header and the offset of its data section."""
+    with path.open("rb") as handle:
+        prefix = handle.read(ARTIFACT_PREFIX.size)
+        magic, version, length = (
+            ARTIFACT_PREFIX.unpack(prefix) if len(prefix) == ARTIFACT_PREFIX.size else (b"", 0, 0)
+        )
+        if magic != ARTIFACT_MAGIC or version != ARTIFACT_FORMAT:
+            message = f"{path} is not a version {ARTIFACT_FORMAT} series artifact."
+            raise ValueError(message)
+        header: dict[str, object] = json.loads(handle.read(length))
+    end = ARTIFACT_PREFIX.size + length
+    return header, end + (-end % ARTIFACT_ALIGNMENT)
+
+
+def read_series_artifact(path: Path = ARTIFACT_PATH) -> HistoricalSeries:
+    """Memory-map a binary artifact as a read-only series.
+
+    The return and growth matrices are views of the mapped file, so every process that
+    loads the same artifact shares its pages. The checksum is verified on load.
+    """
+    header, offset = read_artifact_header(path)
+    min_year = int(str(header["min_year"]))
+    max_year = int(str(header["max_year"]))
+    n_years = max_year - min_year + 1
+    assets = header.get("assets")
+    names = tuple(str(name) for name in assets) if isinstance(assets, list) else ASSETS
+    shape = (2 * len(names), n_years)
+    mapped = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=shape)
+    if hashlib.sha256(mapped.data).hexdigest() != header["sha256"]:
+        message = f"Checksum mismatch in {path}; regenerate it with fetch_shiller."
+        raise ValueError(message)
+    years = np.arange(min_year, max_year + 1, dtype=np.int64)
+    years.setflags(write=False)
+    return HistoricalSeries(
+        version=str(header["version"]),
+        min_year=min_year,
+        max_year=max_year,
+        years=years,
+        returns=mapped[: len(names)],
+        growth=mapped[len(names) :],
+        periods_per_year=int(str(header.get("periods_per_year", 1))),
+        assets=names,
+    )
+
+
+def read_series_csv(path: Path = DATA_PATH) -> HistoricalSeries:
+    """Read a historical returns CSV into a columnar series.
+
+    Files with a ``month`` column are read as monthly series indexed by absolute month.
+    Every ``<name>_return`` column besides stocks and bonds becomes an extra asset.
+    """
+    years: list[int] = []
+    stock_returns: list[float] = []
+    bond_returns: list[float] = []
+    with path.open(newline="") as handle:
         reader = csv.DictReader(handle)
+        fields = reader.fieldnames or ()
+        monthly = "month" in fields
+        extra: dict[str, list[float]] = {
+            field.removesuffix(RETURN_SUFFIX): []
+            for field in fields
+            if field.endswith(RETURN_SUFFIX) and field not in {"stock_return", "bond_return"}
+        }
         for row in reader:
             year = int(row["year"])
-            series[year] = (
-                float(row["stock_return"]),
-                float(row["bond_return"]),
-            )
+            years.append(year * MONTHS_PER_YEAR + int(row["month"]) - 1 if monthly else year)
+            stock_returns.append(float(row["stock_return"]))
+            bond_returns.append(float(row["bond_return"]))
+            for name, column in extra.items():
+                column.append(float(row[name + RETURN_SUFFIX]))
 
-    if not series:
-        message = "Historical series is empty; check data/historical.csv."
-        raise ValueError(message)
-    return series
+    return HistoricalSeries.from_columns(
+        years,
+        stock_returns,
+        bond_returns,
+        periods_per_year=MONTHS_PER_YEAR if monthly else 1,
+        extra_returns=extra,
+    )
+
+
+class SeriesLoader:
+    """Load the series from the binary artifact, falling back to CSV, and track changes.
+
+    Each ``load`` stats the source file. When it changed on disk the new version is
+    read, and listeners run if the dataset version differs from the one held, so
+    dependent caches can be dropped. An unreadable artifact falls back to the CSV.
+    """
+
+    def __init__(self, csv_path: Path = DATA_PATH, artifact_path: Path = ARTIFACT_PATH) -> None:
+        """Create a loader over the given CSV and artifact paths."""
+        self.csv_path = csv_path
+        self.artifact_path = artifact_path
+        self._lock = threading.Lock()
+        self._signature: tuple[object, ...] | None = None
+        self._series: HistoricalSeries | None = None
+        self._listeners: list[Callable[[HistoricalSeries], None]] = []
+
+    def on_reload(self, listener: Callable[[HistoricalSeries], None]) -> None:
+        """Call ``listener`` with the new series whenever the dataset version changes."""
+        self._listeners.append(listener)
+
+    def load(self) -> HistoricalSeries:
+        """Return the current series, reloading it if its source file changed."""
+        signature = self._source_signature()
+        series = self._series
+        if series is not None and signature == self._signature:
+            return series
+        with self._lock:
+            if self._series is not None and signature == self._signature:
+                return self._series
+            previous = self._series
+            series = self._read(signature)
+            self._series = series
+            self._signature = signature
+        if previous is not None and previous.version != series.version:
+            logger.info("Historical series changed: %s -> %s", previous.version, series.version)
+            for listener in self._listeners:
+                listener(series)
+        return series
+
+    def _source_signature(self) -> tuple[object, ...]:
+        """Identify the current source file by path, inode, size and modification time."""
+        for path in (self.artifact_path, self.csv_path):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            return (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        message = (
+            f"Missing historical data at {self.csv_path}. "
+            "Run python -m backend.scripts.fetch_shiller first."
+        )
+        raise FileNotFoundError(message)
+
+    def _read(self, signature: tuple[object, ...]) -> HistoricalSeries:
+        """Read the series behind a source signature."""
+        if signature[0] == self.artifact_path:
+            try:
+                header, _ = read_artifact_header(self.artifact_path)
+                if self._series is not None and header.get("version") == self._series.version:
+                    return self._series
+                return read_series_artifact(self.artifact_path)
+            except (OSError, ValueError, KeyError):
+                logger.warning("Unreadable %s; falling back to CSV.", self.artifact_path)
+                if not self.csv_path.exists():
+                    raise
+        return read_series_csv(self.csv_path)
+
+
+series_loader = SeriesLoader()
+monthly_series_loader = SeriesLoader(MONTHLY_DATA_PATH, MONTHLY_ARTIFACT_PATH)
+
+
+def load_historical_series() -> HistoricalSeries:
+    """Return the historical series, reloading it when the data files change."""
+    return series_loader.load()
 
 
-def series_year_bounds(series: dict[int, tuple[float, float]]) -> tuple[int, int]:
-    """Return the min and max year available in the series."""
-    years = sorted(series.keys())
-    return years[0], years[-1]
+def load_monthly_series() -> HistoricalSeries:
+    """Return the monthly historical series, reloading it when the data files change."""
+    return monthly_series_loader.load()
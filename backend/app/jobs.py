@@ -0,0 +1,228 @@
+"""In-process background jobs for long-running sweeps and Monte Carlo runs.
+
+Jobs run on a small thread pool behind a bounded queue. Each job keeps only its latest
+partial result, replaced after every chunk, which pollers can fetch and streamers receive
+with the progress events. Streams poll the job on the event loop, so subscribers do not
+hold worker threads. Cancellation is cooperative: a cancelled job stops at its next chunk
+boundary.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from pydantic import BaseModel
+
+from .models import JobKind, JobState, JobStatus
+
+FINISHED_STATES = frozenset({"succeeded", "failed", "cancelled"})
+DEFAULT_HISTORY = 256
+POLL_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job's work function once the job has been cancelled."""
+
+
+class Job:
+    """One submitted unit of work with its progress, partial result and event log."""
+
+    def __init__(self, kind: JobKind, total_chunks: int) -> None:
+        """Create a queued job that will report ``total_chunks`` steps of progress."""
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.total_chunks = total_chunks
+        self.completed_chunks = 0
+        self.state: JobState = "queued"
+        self.result: BaseModel | None = None
+        self.error: str | None = None
+        self._events: list[dict[str, object]] = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """Return whether the job reached a terminal state."""
+        return self.state in FINISHED_STATES
+
+    def status(self) -> JobStatus:
+        """Return the job's state and progress."""
+        with self._lock:
+            return JobStatus(
+                id=self.id,
+                kind=self.kind,
+                state=self.state,
+                completed_chunks=self.completed_chunks,
+                total_chunks=self.total_chunks,
+                error=self.error,
+            )
+
+    def advance(self, partial: BaseModel) -> None:
+        """Record one completed chunk and its partial result, or stop if cancelled.
+
+        The partial result replaces the previous one and the logged progress event only
+        carries counts, so the event log stays small however many chunks a job has.
+        """
+        if self._cancel.is_set():
+            raise JobCancelledError
+        with self._lock:
+            self.completed_chunks += 1
+            self.result = partial
+            self._publish(
+                {
+                    "type": "progress",
+                    "completed_chunks": self.completed_chunks,
+                    "total_chunks": self.total_chunks,
+                }
+            )
+
+    def latest(self) -> BaseModel | None:
+        """Return the newest partial result, or the final result once the job succeeded."""
+        with self._lock:
+            return self.result
+
+    def cancel(self) -> None:
+        """Ask the job to stop; a queued job is cancelled at once and never starts."""
+        self._cancel.set()
+        with self._lock:
+            if self.state == "queued":
+                self._finish("cancelled", {"type": "cancelled"})
+
+    async def events(
+        self, heartbeat: float, poll: float = POLL_SECONDS
+    ) -> AsyncIterator[dict[str, object]]:
+        """Yield every event from the start, then new ones until the job finishes.
+
+        The job is polled every ``poll`` seconds without blocking the event loop. The
+        newest progress event of each poll carries the latest partial result; older
+        partials are not kept. A ``heartbeat`` event is yielded whenever ``heartbeat``
+        seconds pass without one, so a stream whose client went away is noticed while
+        the job is still running.
+        """
+        index = 0
+        idle = 0.0
+        while True:
+            with self._lock:
+                pending = self._events[index:]
+                done = self.finished
+                partial = None if done else self.result
+            index += len(pending)
+            for position, event in enumerate(pending):
+                if partial is not None and position == len(pending) - 1:
+                    yield {**event, "partial": partial.model_dump(mode="json")}
+                else:
+                    yield event
+            if done:
+                return
+            if pending:
+                idle = 0.0
+                continue
+            await asyncio.sleep(poll)
+            idle += poll
+            if idle >= heartbeat:
+                idle = 0.0
+                yield {"type": "heartbeat"}
+
+    def run(self, work: Callable[["Job"], BaseModel]) -> None:
+        """Run ``work`` and record its final result, failure or cancellation."""
+        with self._lock:
+            if self.finished:
+                return
+            self.state = "running"
+        try:
+            result = work(self)
+        except JobCancelledError:
+            with self._lock:
+                self._finish("cancelled", {"type": "cancelled"})
+        except Exception as error:
+            logger.exception("Job %s failed", self.id)
+            with self._lock:
+                self.error = str(error)
+                self._finish("failed", {"type": "failed", "error": self.error})
+        else:
+            with self._lock:
+                self.result = result
+                self._finish(
+                    "succeeded", {"type": "result", "result": result.model_dump(mode="json")}
+                )
+
+    def _finish(self, state: JobState, event: dict[str, object]) -> None:
+        """Enter a terminal state and publish its event; the caller holds the lock."""
+        self.state = state
+        self._publish(event)
+
+    def _publish(self, event: dict[str, object]) -> None:
+        """Append an event to the log; the caller holds the lock."""
+        self._events.append(event)
+
+
+class JobManager:
+    """Bounded queue of jobs served by a fixed number of worker threads.
+
+    Finished jobs are kept for polling until more than ``history`` have finished; the
+    oldest are forgotten first.
+    """
+
+    def __init__(self, workers: int, max_queued: int, history: int = DEFAULT_HISTORY) -> None:
+        """Create a manager with ``workers`` threads and room for ``max_queued`` jobs."""
+        self.max_queued = max_queued
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        kind: JobKind,
+        total_chunks: int,
+        work: Callable[[Job], BaseModel],
+    ) -> Job:
+        """Queue ``work`` as a new job, or raise ``JobQueueFullError`` at capacity."""
+        job = Job(kind, total_chunks)
+        with self._lock:
+            queued = sum(1 for item in self._jobs.values() if item.state == "queued")
+            if queued >= self.max_queued:
+                message = f"Job queue is full ({self.max_queued} queued)."
+                raise JobQueueFullError(message)
+            self._jobs[job.id] = job
+            self._forget_finished()
+        self._executor.submit(job.run, work)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Return a known job, or raise ``KeyError``."""
+        with self._lock:
+            return self._jobs[job_id]
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancel a known job and return it."""
+        job = self.get(job_id)
+        job.cancel()
+        return job
+
+    def _forget_finished(self) -> None:
+        """Drop the oldest finished jobs beyond the history limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+
+@lru_cache(maxsize=1)
+def job_manager() -> JobManager:
+    """Return the shared job manager sized by ``JOB_WORKERS`` and ``JOB_QUEUE_SIZE``."""
+    return JobManager(
+        workers=int(os.environ.get("JOB_WORKERS", "2")),
+        max_queued=int(os.environ.get("JOB_QUEUE_SIZE", "16")),
+    )
@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
-from typing import Any
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-import requests
+import httpx
+
+from .cache import answer_cache, canonical_json_key
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +23,13 @@ OPENAI_URL = "https://api.openai.com/v1/chat/completions"
 HTTP_TOO_MANY_REQUESTS = 429
 HTTP_UNAUTHORIZED = 401
 HTTP_BAD_GATEWAY = 502
+REQUEST_TIMEOUT_SECONDS = 30.0
+RETRY_MAX_SECONDS = 30.0
+STUB_SUCCESS_THRESHOLD = 0.9
+DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
+SIGNIFICANT_DIGITS = 4
+REDUNDANT_SUMMARY_KEYS = frozenset({"success_count", "failure_count"})
+MEDIAN_KEY = "p50"
 
 
 class LLMError(Exception):
@@ -27,23 +42,221 @@ class LLMError(Exception):
         self.detail = detail
 
 
-def ask_with_provider(question: str, inputs: dict[str, object], summary: dict[str, object]) -> str:
-    """Route a question to the configured provider and return the answer."""
+@dataclass
+class PromptStats:
+    """Counts prompts sent to providers and their size before and after compaction."""
+
+    prompts: int = 0
+    raw_bytes: int = 0
+    compact_bytes: int = 0
+
+    def record(self, raw_bytes: int, compact_bytes: int) -> None:
+        """Count one prompt sent to a provider."""
+        self.prompts += 1
+        self.raw_bytes += raw_bytes
+        self.compact_bytes += compact_bytes
+
+
+prompt_stats = PromptStats()
+
+
+@dataclass(frozen=True)
+class LLMResources:
+    """Keep-alive client and concurrency slots shared by every provider request.
+
+    Both bind to the event loop that creates them, so ``llm_resources`` opens them in the
+    application lifespan rather than on first use.
+    """
+
+    client: httpx.AsyncClient
+    slots: asyncio.Semaphore
+
+
+_resources: dict[str, LLMResources] = {}
+
+
+@asynccontextmanager
+async def llm_resources() -> AsyncIterator[LLMResources]:
+    """Open the shared client and slots on the running loop and close them on exit.
+
+    The pool holds up to ``LLM_MAX_CONCURRENCY`` connections, matching the number of
+    requests that may be in flight at once.
+    """
+    limit = max_concurrency()
+    resources = LLMResources(
+        client=httpx.AsyncClient(
+            timeout=float(os.environ.get("LLM_TIMEOUT_SECONDS", str(REQUEST_TIMEOUT_SECONDS))),
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+        ),
+        slots=asyncio.Semaphore(limit),
+    )
+    previous = _resources.get("open")
+    _resources["open"] = resources
+    try:
+        yield resources
+    finally:
+        if previous is None:
+            del _resources["open"]
+        else:
+            _resources["open"] = previous
+        await resources.client.aclose()
+
+
+def open_resources() -> LLMResources:
+    """Return the resources opened by the innermost ``llm_resources`` block."""
+    resources = _resources.get("open")
+    if resources is None:
+        message = "LLM resources are not open; run inside llm_resources()."
+        raise RuntimeError(message)
+    return resources
+
+
+def http_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client used for every provider request."""
+    return open_resources().client
+
+
+def request_slots() -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent provider requests."""
+    return open_resources().slots
+
+
+def max_concurrency() -> int:
+    """Return how many provider requests may run at once (``LLM_MAX_CONCURRENCY``)."""
+    return max(1, int(os.environ.get("LLM_MAX_CONCURRENCY", "8")))
+
+
+async def ask_with_provider(
+    question: str,
+    inputs: dict[str, object],
+    summary: dict[str, object],
+) -> str:
+    """Route a question to the configured provider and return the answer.
+
+    ``LLM_PROVIDER`` selects ``openai`` (default) or ``stub``, a local stand-in for
+    offline load tests. Inputs and summary are compacted with ``build_prompt_digest``
+    first, and answers are cached per provider, model, normalized question and digest,
+    so rephrasings that differ only in case or spacing, or simulations that differ only
+    in rounding noise, reuse one answer. Each provider holds one of the
+    ``LLM_MAX_CONCURRENCY`` slots only while it is talking to the provider.
+    """
     provider = os.environ.get("LLM_PROVIDER", "openai").lower()
     if provider == "openai":
-        return ask_openai(question, inputs, summary)
-    message = f"Unsupported LLM provider: {provider}"
-    raise RuntimeError(message)
+        ask = ask_openai
+        model = os.environ.get("OPENAI_MODEL", DEFAULT_OPENAI_MODEL)
+    elif provider == "stub":
+        ask = ask_stub
+        model = provider
+    else:
+        message = f"Unsupported LLM provider: {provider}"
+        raise RuntimeError(message)
+
+    digest_inputs, digest_summary = build_prompt_digest(inputs, summary)
+    key = canonical_json_key(
+        {
+            "question": normalize_question(question),
+            "inputs": digest_inputs,
+            "summary": digest_summary,
+        },
+        provider,
+        model,
+    )
+    answer = answer_cache.get(key)
+    if answer is not None:
+        return answer
+
+    prompt_stats.record(
+        len(json.dumps({"question": question, "inputs": inputs, "summary": summary}).encode()),
+        len(_prompt_content(question, digest_inputs, digest_summary).encode()),
+    )
+    answer = await ask(question, digest_inputs, digest_summary)
+    answer_cache.put(key, answer)
+    return answer
+
+
+def normalize_question(question: str) -> str:
+    """Fold case and whitespace so trivially different phrasings share a cache key."""
+    return " ".join(question.split()).casefold()
+
+
+def build_prompt_digest(
+    inputs: dict[str, object],
+    summary: dict[str, object],
+) -> tuple[dict[str, object], dict[str, object]]:
+    """Compact simulation inputs and summary before they are sent to a provider.
+
+    Floats are rounded to ``SIGNIFICANT_DIGITS`` significant digits, empty values are
+    dropped, and summary fields derivable from the rest (the ending balance median
+    repeats the portfolio quantiles' median; success and failure counts follow from the
+    run count and success rate) are removed.
+    """
+    compact_summary = {
+        key: value for key, value in summary.items() if key not in REDUNDANT_SUMMARY_KEYS
+    }
+    percentiles = compact_summary.get("ending_balance_percentiles")
+    if isinstance(percentiles, dict):
+        compact_summary["ending_balance_percentiles"] = {
+            key: value for key, value in percentiles.items() if key != MEDIAN_KEY
+        }
+    return _compact(inputs), _compact(compact_summary)
+
+
+def _compact(value: dict[str, object]) -> dict[str, object]:
+    """Round floats and drop empty values throughout a JSON-like mapping."""
+    compacted = {key: _compact_value(item) for key, item in value.items()}
+    return {key: item for key, item in compacted.items() if item not in (None, {}, [])}
+
+
+def _compact_value(value: object) -> object:
+    """Round one JSON-like value, recursing into mappings and lists."""
+    if isinstance(value, float):
+        return float(f"{value:.{SIGNIFICANT_DIGITS}g}")
+    if isinstance(value, dict):
+        return _compact(value)
+    if isinstance(value, list):
+        return [_compact_value(item) for item in value]
+    return value
 
 
-def ask_openai(question: str, inputs: dict[str, object], summary: dict[str, object]) -> str:
+def _prompt_content(question: str, inputs: dict[str, object], summary: dict[str, object]) -> str:
+    """Serialize the user message sent to a provider."""
+    return json.dumps(
+        {"question": question, "inputs": inputs, "summary": summary},
+        separators=(",", ":"),
+    )
+
+
+async def ask_stub(question: str, inputs: dict[str, object], summary: dict[str, object]) -> str:
+    """Answer locally after ``LLM_STUB_LATENCY_MS`` of simulated provider latency.
+
+    The answer has the same JSON shape as a real provider's and depends only on the
+    question and success rate, so load tests exercise the full request path offline.
+    """
+    latency_ms = float(os.environ.get("LLM_STUB_LATENCY_MS", "0"))
+    async with request_slots():
+        await asyncio.sleep(latency_ms / 1000)
+    success_rate = summary.get("success_rate")
+    suggestions = []
+    if isinstance(success_rate, (int, float)) and success_rate < STUB_SUCCESS_THRESHOLD:
+        suggestions.append("Lower the starting withdrawal rate.")
+    if inputs:
+        suggestions.append("Review the management fee.")
+    return json.dumps(
+        {
+            "summary": f"Stub answer to: {question}",
+            "suggestions": suggestions,
+        }
+    )
+
+
+async def ask_openai(question: str, inputs: dict[str, object], summary: dict[str, object]) -> str:
     """Send a structured explanation request to OpenAI."""
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         message = "OPENAI_API_KEY is not set."
         raise RuntimeError(message)
 
-    model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    model = os.environ.get("OPENAI_MODEL", DEFAULT_OPENAI_MODEL)
     payload = {
         "model": model,
         "messages": [
@@ -57,13 +270,7 @@ def ask_openai(question: str, inputs: dict[str, object], summary: dict[str, obje
             },
             {
                 "role": "user",
-                "content": json.dumps(
-                    {
-                        "question": question,
-                        "inputs": inputs,
-                        "summary": summary,
-                    }
-                ),
+                "content": _prompt_content(question, inputs, summary),
             },
         ],
         "temperature": 0.3,
@@ -74,22 +281,51 @@ def ask_openai(question: str, inputs: dict[str, object], summary: dict[str, obje
         "Content-Type": "application/json",
     }
     try:
-        response = requests.post(
-            OPENAI_URL,
-            json=payload,
-            headers=headers,
-            timeout=30,
-        )
+        response = await _post_with_retry(OPENAI_URL, payload, headers)
         response.raise_for_status()
-    except requests.HTTPError as error:
+    except httpx.HTTPStatusError as error:
         raise _handle_http_error(error) from error
-    except requests.RequestException as error:
+    except httpx.RequestError as error:
         message = "LLM request failed due to a network error."
         raise LLMError(HTTP_BAD_GATEWAY, message) from error
 
     return _extract_message_content(response.json())
 
 
+async def _post_with_retry(
+    url: str,
+    payload: dict[str, Any],
+    headers: dict[str, str],
+) -> httpx.Response:
+    """POST on the shared client, retrying rate-limited responses with backoff.
+
+    Up to ``LLM_MAX_RETRIES`` retries follow a 429, waiting for the provider's
+    ``Retry-After`` when given and otherwise ``LLM_RETRY_BACKOFF_SECONDS`` doubled per
+    attempt, never longer than ``LLM_RETRY_MAX_SECONDS``. A concurrency slot is held
+    for each attempt but not while waiting, so a rate-limited request does not block
+    others. The last response is returned whatever its status.
+    """
+    retries = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+    backoff = float(os.environ.get("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+    max_delay = float(os.environ.get("LLM_RETRY_MAX_SECONDS", str(RETRY_MAX_SECONDS)))
+    for attempt in range(retries + 1):
+        async with request_slots():
+            response = await http_client().post(url, json=payload, headers=headers)
+        if response.status_code != HTTP_TOO_MANY_REQUESTS or attempt == retries:
+            break
+        delay = _retry_after(response)
+        await asyncio.sleep(min(max_delay, backoff * 2**attempt if delay is None else delay))
+    return response
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Return the delay in seconds requested by a ``Retry-After`` header, if numeric."""
+    try:
+        return max(0.0, float(response.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+
 def _extract_message_content(response: dict[str, Any]) -> str:
     """Extract the assistant message content from a chat completion response."""
     choices = response.get("choices", [])
@@ -107,9 +343,9 @@ def _extract_message_content(response: dict[str, Any]) -> str:
     return content
 
 
-def _handle_http_error(error: requests.HTTPError) -> LLMError:
+def _handle_http_error(error: httpx.HTTPStatusError) -> LLMError:
     """Translate HTTP errors into friendly LLM errors."""
-    status_code = error.response.status_code if error.response is not None else HTTP_BAD_GATEWAY
+    status_code = error.response.status_code
     if status_code == HTTP_TOO_MANY_REQUESTS:
         return LLMError(
             HTTP_TOO_MANY_REQUESTS,
@@ -1,81 +1,476 @@
 """FastAPI application entrypoints."""
 
-from fastapi import FastAPI, HTTPException
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Annotated
 
-from .data import load_historical_series, series_year_bounds
-from .llm import LLMError, ask_with_provider
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+
+from .batch import CHUNK_HOUSEHOLDS, run_batch
+from .cache import (
+    answer_cache,
+    cache_headers,
+    canonical_json_key,
+    canonical_key,
+    entity_tag,
+    etag_matches,
+    simulation_cache,
+)
+from .data import (
+    HistoricalSeries,
+    load_historical_series,
+    load_monthly_series,
+    monthly_series_loader,
+    series_loader,
+)
+from .jobs import Job, JobQueueFullError, job_manager
+from .llm import LLMError, ask_with_provider, llm_resources, prompt_stats
+from .metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    count_cache_lookup,
+    count_paths,
+    metrics_enabled,
+    registry,
+    stage,
+)
 from .models import (
     AskRequest,
     AskResponse,
-    PerStartYearResult,
+    AskStats,
+    BatchRequest,
+    BatchResponse,
+    CacheStats,
+    Engine,
+    JobKind,
+    JobStatus,
+    MonteCarloRequest,
+    MonteCarloResponse,
+    OptimizeRequest,
+    OptimizeResponse,
+    SafeWithdrawalRequest,
+    SafeWithdrawalResponse,
+    SensitivityRequest,
+    SensitivityResponse,
+    SimulateOptions,
     SimulationInput,
     SimulationResponse,
-    SimulationRun,
+    SweepRequest,
+    SweepResponse,
+)
+from .montecarlo import CHUNK_PATHS, chunk_sizes, process_pool, run_monte_carlo
+from .optimize import run_optimizer
+from .results import (
+    BINARY_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    encode_binary,
+    encode_columnar,
+    encode_json,
+    ndjson_line,
+    negotiate_format,
+    run_simulation,
+    stream_ndjson,
+)
+from .sensitivity import run_sensitivity
+from .simulate import iter_rolling
+from .sweep import run_sweep, sweep_chunks, sweep_inputs
+from .swr import solve_safe_withdrawal
+from .validation import check_simulation_input
+
+COMPRESS_MIN_BYTES = 16 * 1024
+JOB_HEARTBEAT_SECONDS = 15.0
+SIMULATE_VARY = ("Accept",)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Open the pooled LLM connections on the server's loop and release them on shutdown."""
+    async with llm_resources():
+        yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=COMPRESS_MIN_BYTES,
+    exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, NDJSON_MEDIA_TYPE),
 )
-from .simulate import simulate_one_start_year
-from .summary import compute_quantile_indices, summarize_results
+if metrics_enabled():
+    app.add_middleware(MetricsMiddleware)
+series_loader.on_reload(lambda _: simulation_cache.invalidate())
+monthly_series_loader.on_reload(lambda _: simulation_cache.invalidate())
+
+
+def validate_simulation_input(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    *,
+    check_horizon: bool = True,
+) -> None:
+    """Answer 400 for inputs that pass field validation but cannot be simulated."""
+    try:
+        check_simulation_input(req, series, check_horizon=check_horizon)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+def validated_sweep_inputs(
+    request: SweepRequest, series: HistoricalSeries
+) -> list[SimulationInput]:
+    """Expand a sweep into its grid inputs and validate every one of them.
+
+    The stock allocation can only be swept when the base input uses the two-asset
+    split, since ``allocations`` overrides it.
+    """
+    if request.base.allocations and any(axis.field == "stock_allocation" for axis in request.axes):
+        raise HTTPException(
+            status_code=400,
+            detail="Sweeping stock_allocation has no effect with allocations; omit allocations.",
+        )
+    try:
+        inputs = sweep_inputs(request)
+    except ValidationError as error:
+        raise RequestValidationError(error.errors()) from error
+    for req in inputs:
+        validate_simulation_input(req, series)
+    return inputs
+
 
-EPSILON = 0.001
+def load_rolling_series(engine: Engine) -> HistoricalSeries:
+    """Load the series the requested engine steps through: monthly or annual."""
+    if engine == "monthly":
+        return load_monthly_series()
+    return load_historical_series()
 
-app = FastAPI()
 
+def not_modified(
+    etag: str, if_none_match: str | None, vary: tuple[str, ...] = ()
+) -> Response | None:
+    """Return a 304 response when the client already holds the ``etag`` representation.
 
-@app.get("/api/v1/series/metadata")
-def series_metadata() -> dict[str, int | str]:
-    """Return metadata about the historical series coverage."""
+    Conditional lookups are counted as hits or misses of the ``http`` cache.
+    """
+    if if_none_match is None:
+        return None
+    matched = etag_matches(if_none_match, etag)
+    count_cache_lookup("http", hit=matched)
+    return Response(status_code=304, headers=cache_headers(etag, vary)) if matched else None
+
+
+@app.get("/api/v1/series/metadata", response_model=dict[str, int | str | list[str]])
+def series_metadata(if_none_match: Annotated[str | None, Header()] = None) -> Response:
+    """Return metadata about the historical series coverage and its named assets.
+
+    The ETag hashes the metadata itself, so it changes only when the dataset bounds or
+    assets do.
+    """
     series = load_historical_series()
-    min_year, max_year = series_year_bounds(series)
-    return {
-        "min_year": min_year,
-        "max_year": max_year,
+    payload: dict[str, int | str | list[str]] = {
+        "min_year": series.min_year,
+        "max_year": series.max_year,
         "stocks": "Shiller P",
         "bonds": "Shiller Long Rate",
+        "assets": list(series.assets),
     }
+    etag = entity_tag(canonical_json_key(payload))
+    cached = not_modified(etag, if_none_match)
+    if cached is not None:
+        return cached
+    return JSONResponse(payload, headers=cache_headers(etag))
 
 
-@app.post("/api/v1/simulate")
-def simulate(req: SimulationInput) -> SimulationResponse:
-    """Run rolling historical simulations based on the request payload."""
-    if abs((req.stock_allocation + req.bond_allocation) - 1.0) > EPSILON:
-        raise HTTPException(status_code=400, detail="Allocations must sum to 1.0")
-    if not (req.withdrawal_rate_min <= req.withdrawal_rate_start <= req.withdrawal_rate_max):
-        raise HTTPException(
-            status_code=400,
-            detail="withdrawal_rate_start must be between min and max",
+@app.post("/api/v1/simulate", response_model=SimulationResponse)
+def simulate(
+    req: SimulationInput,
+    options: Annotated[SimulateOptions, Query()],
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response | SimulationResponse:
+    """Run rolling historical simulations based on the request payload.
+
+    The ``engine`` query parameter selects the vectorized engine (default) or the scalar
+    reference engine, which produce identical results, or the monthly engine, which
+    rolls start months through the monthly series with monthly withdrawals, fees and
+    Social Security. Results are returned per start year (or month) by default, or as
+    dense matrices when ``format`` (or the Accept header) asks for the columnar JSON or
+    binary encoding. ``view`` swaps the runs for per-year percentile bands, or adds
+    them, in the JSON format. Outcomes are cached per canonical input, engine and
+    dataset version. The weak ETag also covers the result format and view, and a matching
+    ``If-None-Match`` is answered with 304 before anything is simulated or encoded. Each
+    stage is timed for the ``Server-Timing`` header.
+    """
+    engine = options.engine
+    selected = negotiate_format(options.response_format, accept)
+    if options.view != "runs" and selected != "json":
+        raise HTTPException(status_code=400, detail="Percentile bands are only available as JSON.")
+    with stage("load"):
+        series = load_rolling_series(engine)
+        validate_simulation_input(req, series)
+        cache_key = canonical_key(req, engine, series.version)
+        etag = entity_tag(
+            canonical_key(req, engine, series.version, selected, options.precision, options.view)
         )
+        cached = not_modified(etag, if_none_match, SIMULATE_VARY)
+        if cached is not None:
+            return cached
+        outcome = simulation_cache.get(cache_key)
+    count_cache_lookup("simulation", hit=outcome is not None)
+    if outcome is None:
+        outcome = run_simulation(req, series, engine)
+        count_paths("rolling", outcome.paths.success.size)
+        simulation_cache.put(cache_key, outcome)
+
+    headers = cache_headers(etag, SIMULATE_VARY)
+    if selected == "columnar":
+        with stage("encode"):
+            body = encode_columnar(outcome)
+        return Response(body, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+    if selected == "binary":
+        with stage("encode"):
+            body = encode_binary(outcome, options.precision)
+        return Response(body, media_type=BINARY_MEDIA_TYPE, headers=headers)
+    with stage("encode"):
+        body = encode_json(outcome, options.view)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.post("/api/v1/simulate/stream")
+def simulate_stream(req: SimulationInput, engine: Engine = "vectorized") -> StreamingResponse:
+    """Stream rolling simulation results as NDJSON, one start year (or month) per line.
+
+    A trailing record carries the summary and quantile indices, which are accumulated as
+    the results stream past. Cached outcomes are streamed without re-simulating.
+    """
+    series = load_rolling_series(engine)
+    validate_simulation_input(req, series)
+    outcome = simulation_cache.get(canonical_key(req, engine, series.version))
+    if outcome is not None:
+        runs = outcome.paths.iter_runs(req.start_year)
+    else:
+        runs = iter_rolling(req, series, series.start_years(req.retirement_years), engine)
+    return StreamingResponse(stream_ndjson(runs, series.bounds), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.post("/api/v1/simulate/batch")
+def simulate_batch(request: BatchRequest) -> BatchResponse:
+    """Summarize rolling simulations for many households in one request.
+
+    Households are validated against one loaded series, grouped by horizon into
+    vectorized passes and fanned out to the worker pool when the batch is large.
+    """
+    series = load_historical_series()
+    for index, req in enumerate(request.households):
+        try:
+            validate_simulation_input(req, series)
+        except HTTPException as error:
+            detail = f"households[{index}]: {error.detail}"
+            raise HTTPException(status_code=error.status_code, detail=detail) from error
+    executor = process_pool() if len(request.households) > CHUNK_HOUSEHOLDS else None
+    with stage("simulate"):
+        response = run_batch(request, series, executor)
+    count_paths(
+        "batch",
+        sum(len(series.start_years(req.retirement_years)) for req in request.households),
+    )
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    """Expose request, stage, cache and path counters in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/api/v1/cache/stats")
+def cache_stats() -> CacheStats:
+    """Return hit, miss and occupancy counters for the simulation cache."""
+    return simulation_cache.stats()
+
+
+@app.post("/api/v1/simulate/montecarlo")
+def simulate_monte_carlo(request: MonteCarloRequest) -> MonteCarloResponse:
+    """Summarize block-bootstrapped Monte Carlo paths, fanning chunks out to workers."""
+    series = load_historical_series()
+    validate_simulation_input(request.inputs, series, check_horizon=False)
+    executor = process_pool() if request.paths > CHUNK_PATHS else None
+    with stage("simulate"):
+        response = run_monte_carlo(request, series, executor)
+    count_paths("montecarlo", request.paths)
+    return response
+
+
+@app.post("/api/v1/sweep")
+def sweep(request: SweepRequest) -> SweepResponse:
+    """Summarize rolling simulations over a grid of one or two swept inputs."""
+    series = load_historical_series()
+    inputs = validated_sweep_inputs(request, series)
+    with stage("simulate"):
+        response = run_sweep(request, inputs, series)
+    count_paths("sweep", len(inputs) * len(series.start_years(request.base.retirement_years)))
+    return response
+
+
+@app.post("/api/v1/sensitivity")
+def sensitivity(request: SensitivityRequest) -> SensitivityResponse:
+    """Report how the success rate and median ending balance move with each input."""
+    series = load_historical_series()
+    validate_simulation_input(request.base, series)
+    with stage("simulate"):
+        response = run_sensitivity(request, series)
+    count_paths(
+        "sensitivity",
+        (2 * len(response.bars) + 1) * len(series.start_years(request.base.retirement_years)),
+    )
+    return response
+
+
+@app.post("/api/v1/swr")
+def safe_withdrawal_rate(request: SafeWithdrawalRequest) -> SafeWithdrawalResponse:
+    """Solve the maximum sustainable starting withdrawal rate per start year."""
+    series = load_historical_series()
+    validate_simulation_input(request.base, series)
+    with stage("solve"):
+        return solve_safe_withdrawal(request, series)
 
+
+@app.post("/api/v1/optimize")
+def optimize(request: OptimizeRequest) -> OptimizeResponse:
+    """Search the stock allocation, guardrails and smoothing for the best objective."""
     series = load_historical_series()
-    min_year, max_year = series_year_bounds(series)
-    max_horizon = max_year - min_year + 1
-    if req.retirement_years > max_horizon:
+    validate_simulation_input(request.base, series)
+    if request.base.allocations:
+        raise HTTPException(
+            status_code=400,
+            detail="The optimizer searches stock_allocation; omit allocations.",
+        )
+    if not (request.min_rate <= request.base.withdrawal_rate_start <= request.max_rate):
         raise HTTPException(
             status_code=400,
-            detail=f"Retirement horizon exceeds data. Max years available: {max_horizon}.",
+            detail="withdrawal_rate_start must be between min_rate and max_rate",
         )
+    with stage("optimize"):
+        response = run_optimizer(request, series)
+    count_paths(
+        "optimize",
+        response.evaluations * len(series.start_years(request.base.retirement_years)),
+    )
+    return response
+
+
+def submit_job(kind: JobKind, total_chunks: int, work: Callable[[Job], BaseModel]) -> JobStatus:
+    """Queue a background job, answering 503 while the queue is full."""
+    try:
+        return job_manager().submit(kind, total_chunks, work).status()
+    except JobQueueFullError as error:
+        raise HTTPException(status_code=503, detail=str(error)) from error
+
+
+def find_job(job_id: str) -> Job:
+    """Return a known job or answer 404."""
+    try:
+        return job_manager().get(job_id)
+    except KeyError as error:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}.") from error
 
-    last_start_year = max_year - req.retirement_years + 1
-    results: list[SimulationRun] = [
-        simulate_one_start_year(req, series, start_year)
-        for start_year in range(min_year, last_start_year + 1)
-    ]
-
-    summary = summarize_results(results)
-    typed_results = [PerStartYearResult(**item) for item in results]
-    return SimulationResponse(
-        series={"min_year": min_year, "max_year": max_year},
-        results=typed_results,
-        summary=summary,
-        quantile_indices=compute_quantile_indices(results),
+
+@app.post("/api/v1/jobs/montecarlo", status_code=202)
+def submit_monte_carlo_job(request: MonteCarloRequest) -> JobStatus:
+    """Queue a Monte Carlo run as a background job that reports progress per chunk."""
+    series = load_historical_series()
+    validate_simulation_input(request.inputs, series, check_horizon=False)
+    executor = process_pool() if request.paths > CHUNK_PATHS else None
+    return submit_job(
+        "montecarlo",
+        len(chunk_sizes(request.paths)),
+        lambda job: run_monte_carlo(request, series, executor, job.advance),
+    )
+
+
+@app.post("/api/v1/jobs/sweep", status_code=202)
+def submit_sweep_job(request: SweepRequest) -> JobStatus:
+    """Queue a sweep as a background job that reports progress per batched pass."""
+    series = load_historical_series()
+    inputs = validated_sweep_inputs(request, series)
+    return submit_job(
+        "sweep",
+        len(sweep_chunks(inputs)),
+        lambda job: run_sweep(request, inputs, series, job.advance),
     )
 
 
+@app.get("/api/v1/jobs/{job_id}")
+def job_status(job_id: str) -> JobStatus:
+    """Return a job's state and progress."""
+    return find_job(job_id).status()
+
+
+@app.get("/api/v1/jobs/{job_id}/result")
+def job_result(job_id: str) -> Response:
+    """Return the result of a finished job; 409 until it has succeeded."""
+    job = find_job(job_id)
+    status = job.status()
+    if status.state != "succeeded" or job.result is None:
+        raise HTTPException(status_code=409, detail=f"Job is {status.state}.")
+    return Response(job.result.model_dump_json(), media_type="application/json")
+
+
+@app.get("/api/v1/jobs/{job_id}/partial")
+def job_partial(job_id: str) -> Response:
+    """Return a job's latest partial result; 409 until its first chunk has finished."""
+    job = find_job(job_id)
+    partial = job.latest()
+    if partial is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status().state}.")
+    return Response(partial.model_dump_json(), media_type="application/json")
+
+
+@app.get("/api/v1/jobs/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Stream a job's progress and partial results as NDJSON until it ends.
+
+    The stream is an async generator that polls the job on the event loop, so open
+    subscriptions do not hold threadpool workers the sync endpoints need.
+    """
+    job = find_job(job_id)
+    lines = (ndjson_line(event) async for event in job.events(JOB_HEARTBEAT_SECONDS))
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.delete("/api/v1/jobs/{job_id}")
+def cancel_job(job_id: str) -> JobStatus:
+    """Cancel a job; running jobs stop at their next chunk boundary."""
+    find_job(job_id).cancel()
+    return job_status(job_id)
+
+
 @app.post("/api/v1/ask")
-def ask(request: AskRequest) -> AskResponse:
-    """Explain the latest simulation and provide improvement suggestions."""
+async def ask(request: AskRequest) -> AskResponse:
+    """Explain the latest simulation and provide improvement suggestions.
+
+    The endpoint awaits the provider on the event loop, so slow LLM calls do not hold
+    threadpool workers that the simulation endpoints need.
+    """
     try:
-        answer = ask_with_provider(request.question, request.inputs, request.summary)
+        answer = await ask_with_provider(request.question, request.inputs, request.summary)
         return AskResponse(answer=answer)
     except LLMError as error:
         raise HTTPException(status_code=error.status_code, detail=error.detail) from error
     except RuntimeError as error:
         raise HTTPException(status_code=502, detail=str(error)) from error
+
+
+@app.get("/api/v1/ask/stats")
+def ask_stats() -> AskStats:
+    """Return answer cache counters and prompt byte totals before and after compaction."""
+    return AskStats(
+        cache=answer_cache.stats(),
+        prompts=prompt_stats.prompts,
+        raw_prompt_bytes=prompt_stats.raw_bytes,
+        compact_prompt_bytes=prompt_stats.compact_bytes,
+    )
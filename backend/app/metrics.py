@@ -0,0 +1,299 @@
+"""Per-request stage timing, Server-Timing headers and Prometheus metrics."""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, MutableMapping, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from types import TracebackType
+from typing import Any
+
+Labels = tuple[str, ...]
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+MILLISECONDS = 1000
+
+_stage_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "stage_timings", default=None
+)
+_NOT_TIMED: AbstractContextManager[None] = nullcontext()
+
+
+def metrics_enabled() -> bool:
+    """Return whether instrumentation is on (``METRICS_ENABLED``, default on)."""
+    return os.environ.get("METRICS_ENABLED", "1") != "0"
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]) -> None:
+        """Create a counter with no recorded series."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1.0) -> None:
+        """Add ``amount`` to the series identified by ``labels``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels) -> float:
+        """Return the current value of one series."""
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def samples(self) -> list[str]:
+        """Render every series in the Prometheus text format."""
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.label_names, labels)} {_number(value)}"
+                for labels, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        """Create a histogram with no recorded series."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: dict[Labels, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        """Record one observation in the series identified by ``labels``."""
+        with self._lock:
+            counts, total = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def count(self, labels: Labels) -> int:
+        """Return the number of observations in one series."""
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        """Render every series in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                names = (*self.label_names, "le")
+                bounds = [*(_number(bound) for bound in self.buckets), "+Inf"]
+                for bound, count in zip(bounds, counts, strict=True):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(names, (*labels, bound))} {cumulative}"
+                    )
+                label_text = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{label_text} {_number(total[0])}")
+                lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together for a scrape."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self._metrics: list[Counter | Histogram] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str]) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str]) -> Histogram:
+        """Create and register a latency histogram."""
+        metric = Histogram(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route"),
+)
+STAGE_SECONDS = registry.histogram(
+    "request_stage_duration_seconds", "Latency of instrumented request stages.", ("stage",)
+)
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+SIMULATED_PATHS = registry.counter(
+    "simulated_paths_total", "Simulation paths run, by kind.", ("kind",)
+)
+
+
+class _Stage:
+    """Context manager that times one stage of the current request."""
+
+    __slots__ = ("_name", "_start", "_timings")
+
+    def __init__(self, name: str, timings: list[tuple[str, float]]) -> None:
+        self._name = name
+        self._timings = timings
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        elapsed = time.perf_counter() - self._start
+        self._timings.append((self._name, elapsed))
+        STAGE_SECONDS.observe((self._name,), elapsed)
+
+
+def stage(name: str) -> AbstractContextManager[None]:
+    """Time a block as a named stage of the current request.
+
+    Outside an instrumented request, or with metrics disabled, this returns a shared
+    no-op context manager, so call sites cost one context variable lookup.
+    """
+    timings = _stage_timings.get()
+    if timings is None:
+        return _NOT_TIMED
+    return _Stage(name, timings)
+
+
+def count_cache_lookup(cache: str, *, hit: bool) -> None:
+    """Count one cache lookup when metrics are enabled."""
+    if _stage_timings.get() is not None:
+        CACHE_LOOKUPS.inc((cache, "hit" if hit else "miss"))
+
+
+def count_paths(kind: str, paths: int) -> None:
+    """Count simulated paths when metrics are enabled."""
+    if _stage_timings.get() is not None:
+        SIMULATED_PATHS.inc((kind,), paths)
+
+
+def server_timing(timings: Sequence[tuple[str, float]], total: float) -> str:
+    """Format stage timings as a ``Server-Timing`` header value in milliseconds."""
+    entries = [f"{name};dur={elapsed * MILLISECONDS:.3f}" for name, elapsed in timings]
+    entries.append(f"total;dur={total * MILLISECONDS:.3f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times requests and reports stage timings.
+
+    The ``Server-Timing`` header lists every stage finished before the response
+    started, plus the time to the response start as ``total``. The latency histogram
+    records the full request, including streamed bodies, under the matched route
+    template so path parameters do not create new series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: list[tuple[str, float]] = []
+        token = _stage_timings.set(timings)
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                header = server_timing(timings, time.perf_counter() - start)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", header.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stage_timings.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUESTS.inc((scope["method"], path, status))
+            REQUEST_SECONDS.observe((scope["method"], path), time.perf_counter() - start)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a Prometheus label set, escaping values."""
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    """Render a sample value the way Prometheus clients do."""
+    return repr(float(value))
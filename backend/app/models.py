@@ -1,8 +1,33 @@
 """Pydantic models and typed results for the simulation API."""
 
-from typing import Annotated, TypedDict
+from typing import Annotated, Literal, NotRequired, TypedDict
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+RebalancePolicy = Literal["annual", "threshold", "none"]
+JobKind = Literal["montecarlo", "sweep"]
+OptimizeObjective = Literal["success_rate", "median_ending_balance"]
+SensitivityField = Literal[
+    "portfolio_start",
+    "stock_allocation",
+    "withdrawal_rate_start",
+    "withdrawal_rate_min",
+    "withdrawal_rate_max",
+    "withdrawal_smoothing_up",
+    "withdrawal_smoothing_down",
+    "management_fee",
+    "inflation_rate",
+    "ss_monthly_amount",
+    "ss_start_year",
+]
+RELATIVE_SENSITIVITY_FIELDS: frozenset[SensitivityField] = frozenset(
+    {"portfolio_start", "ss_monthly_amount"}
+)
+JobState = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+Engine = Literal["vectorized", "scalar", "monthly"]
+ResultFormat = Literal["json", "columnar", "binary"]
+Precision = Literal["float32", "float64"]
+ResultView = Literal["runs", "bands", "full"]
 
 
 class SSRecipient(BaseModel):
@@ -13,13 +38,23 @@ class SSRecipient(BaseModel):
 
 
 class SimulationInput(BaseModel):
-    """Validated input parameters for a simulation run."""
+    """Validated input parameters for a simulation run.
+
+    ``allocations`` maps named series assets to target weights and, when given,
+    replaces ``stock_allocation`` and ``bond_allocation``. ``rebalancing`` resets the
+    holdings to the targets on every retirement anniversary (``annual``), whenever any
+    weight drifts more than ``rebalance_band`` from its target (``threshold``), or never
+    (``none``).
+    """
 
     start_year: int = Field(ge=1900)
     retirement_years: int = Field(gt=0)
     portfolio_start: float = Field(gt=0)
-    stock_allocation: float = Field(ge=0, le=1)
-    bond_allocation: float = Field(ge=0, le=1)
+    stock_allocation: float = Field(ge=0, le=1, default=0.0)
+    bond_allocation: float = Field(ge=0, le=1, default=0.0)
+    allocations: dict[str, Annotated[float, Field(ge=0, le=1)]] = Field(default_factory=dict)
+    rebalancing: RebalancePolicy = "annual"
+    rebalance_band: float = Field(gt=0, le=1, default=0.05)
     withdrawal_rate_start: float = Field(gt=0, le=1)
     withdrawal_rate_min: float = Field(gt=0, le=1)
     withdrawal_rate_max: float = Field(gt=0, le=1)
@@ -31,7 +66,7 @@ class SimulationInput(BaseModel):
 
 
 class PerStartYearResult(BaseModel):
-    """Simulation outcome for a single start year."""
+    """Simulation outcome for a single start year (and start month, for monthly runs)."""
 
     start_year: int
     success: bool
@@ -40,6 +75,7 @@ class PerStartYearResult(BaseModel):
     yearly_withdrawals: list[float]
     yearly_fees: list[float]
     highlight: bool = False
+    start_month: int | None = Field(default=None, exclude_if=lambda month: month is None)
 
 
 class Summary(BaseModel):
@@ -55,13 +91,293 @@ class Summary(BaseModel):
     fee_quantiles: dict[str, float]
 
 
+class PercentileBands(BaseModel):
+    """Per-year percentiles across every run, keyed by ``pNN`` label.
+
+    Each label maps to one value per year. Balances start with the starting balance, so
+    they hold one more value than withdrawals and fees.
+    """
+
+    balances: dict[str, list[float]]
+    withdrawals: dict[str, list[float]]
+    fees: dict[str, list[float]]
+
+
 class SimulationResponse(BaseModel):
-    """Response envelope for a simulation request."""
+    """Response envelope for a simulation request.
+
+    ``results`` is omitted when only percentile ``bands`` were requested, and ``bands``
+    unless they were.
+    """
 
     series: dict[str, int]
-    results: list[PerStartYearResult]
+    results: list[PerStartYearResult] | None = Field(
+        default=None, exclude_if=lambda results: results is None
+    )
     summary: Summary
     quantile_indices: list[int]
+    bands: PercentileBands | None = Field(default=None, exclude_if=lambda bands: bands is None)
+
+
+class SimulateOptions(BaseModel):
+    """Query options selecting the engine and what the simulation response carries.
+
+    ``format`` and ``precision`` pick the encoding. ``view`` returns per-start-year runs
+    (``runs``), per-year percentile bands (``bands``) or both (``full``); bands are only
+    offered in the JSON format.
+    """
+
+    engine: Engine = "vectorized"
+    response_format: ResultFormat | None = Field(default=None, alias="format")
+    precision: Precision = "float64"
+    view: ResultView = "runs"
+
+
+SweepField = Literal[
+    "stock_allocation",
+    "withdrawal_rate_start",
+    "withdrawal_rate_min",
+    "withdrawal_rate_max",
+    "withdrawal_smoothing_up",
+    "withdrawal_smoothing_down",
+    "management_fee",
+    "inflation_rate",
+]
+
+
+class SweepAxis(BaseModel):
+    """Evenly spaced values for one swept input field."""
+
+    field: SweepField
+    start: float
+    stop: float
+    steps: int = Field(ge=1, le=101)
+
+
+class SweepRequest(BaseModel):
+    """Base simulation input plus one or two swept fields."""
+
+    base: SimulationInput
+    axes: list[SweepAxis] = Field(min_length=1, max_length=2)
+
+
+class SweepPoint(BaseModel):
+    """Summary statistics for a single grid point of a sweep."""
+
+    values: dict[str, float]
+    total_runs: int
+    success_count: int
+    success_rate: float
+    ending_balance_percentiles: dict[str, float]
+
+
+class SweepResponse(BaseModel):
+    """Response envelope for a parameter sweep in row-major grid order."""
+
+    series: dict[str, int]
+    axes: dict[str, list[float]]
+    points: list[SweepPoint]
+
+
+class SafeWithdrawalRequest(BaseModel):
+    """Base simulation input plus solver settings for the withdrawal-rate search."""
+
+    base: SimulationInput
+    target_success_rate: float = Field(gt=0, le=1, default=0.95)
+    max_rate: float = Field(gt=0, le=1, default=0.2)
+    tolerance: float = Field(gt=0, le=0.01, default=0.0001)
+
+
+class StartYearRate(BaseModel):
+    """Maximum sustainable starting withdrawal rate for one start year."""
+
+    start_year: int
+    max_withdrawal_rate: float
+
+
+class SafeWithdrawalResponse(BaseModel):
+    """Per-start-year and cohort-level maximum withdrawal rates."""
+
+    series: dict[str, int]
+    target_success_rate: float
+    cohort_withdrawal_rate: float
+    iterations: int
+    start_years: list[StartYearRate]
+
+
+class OptimizeRequest(BaseModel):
+    """Base simulation input plus the search space and budget of the optimizer.
+
+    The optimizer searches ``stock_allocation`` (bonds take the rest), the withdrawal
+    guardrails between ``min_rate`` and ``max_rate`` around the base starting rate, and
+    both smoothing factors. Candidates whose median run spends less than ``min_spend``
+    a year on average are infeasible.
+    """
+
+    base: SimulationInput
+    objective: OptimizeObjective = "success_rate"
+    min_spend: float = Field(ge=0, default=0.0)
+    min_rate: float = Field(gt=0, le=1, default=0.01)
+    max_rate: float = Field(gt=0, le=1, default=0.1)
+    initial_samples: int = Field(ge=0, le=256, default=24)
+    max_evaluations: int = Field(ge=1, le=2000, default=400)
+    tolerance: float = Field(gt=0, le=0.25, default=0.01)
+    seed: int = Field(ge=0, default=0)
+
+
+class OptimizeCandidate(BaseModel):
+    """One evaluated configuration and its rolling-simulation metrics."""
+
+    stock_allocation: float
+    withdrawal_rate_min: float
+    withdrawal_rate_max: float
+    withdrawal_smoothing_up: float
+    withdrawal_smoothing_down: float
+    success_rate: float
+    median_ending_balance: float
+    median_annual_spend: float
+    feasible: bool
+
+
+class OptimizeResponse(BaseModel):
+    """Best configuration found and the frontier of the evaluated candidates.
+
+    The frontier holds the feasible candidates no other candidate beats on both the
+    objective and the median annual spend, ordered by spend.
+    """
+
+    series: dict[str, int]
+    objective: OptimizeObjective
+    best: OptimizeCandidate
+    frontier: list[OptimizeCandidate]
+    evaluations: int
+    iterations: int
+
+
+class SensitivityRequest(BaseModel):
+    """Base simulation input plus the perturbation applied to each input field.
+
+    ``steps`` overrides the default perturbation of a field: a fraction of the value
+    for ``portfolio_start`` and ``ss_monthly_amount`` (which scales every recipient),
+    a number of years for ``ss_start_year`` (which shifts every recipient), and an
+    absolute amount for the rates, allocation and smoothing factors. Fractional steps
+    must be below one so a downward perturbation stays positive.
+    """
+
+    base: SimulationInput
+    steps: dict[SensitivityField, Annotated[float, Field(gt=0)]] = Field(default_factory=dict)
+
+    @field_validator("steps")
+    @classmethod
+    def check_relative_steps(
+        cls, steps: dict[SensitivityField, float]
+    ) -> dict[SensitivityField, float]:
+        """Reject fractional steps of one or more."""
+        for field in RELATIVE_SENSITIVITY_FIELDS:
+            if steps.get(field, 0.0) >= 1:
+                message = f"The {field} step is a fraction of the value and must be below 1"
+                raise ValueError(message)
+        return steps
+
+
+class SensitivityOutcome(BaseModel):
+    """Metrics of one perturbed scenario and their change from the base input."""
+
+    value: float
+    success_rate: float
+    median_ending_balance: float
+    success_rate_change: float
+    median_ending_balance_change: float
+
+
+class SensitivityBar(BaseModel):
+    """The downward and upward perturbation of one input field."""
+
+    field: SensitivityField
+    low: SensitivityOutcome
+    high: SensitivityOutcome
+
+
+class SensitivityResponse(BaseModel):
+    """Base metrics plus one bar per field, largest success-rate swing first.
+
+    ``skipped`` lists the fields whose perturbed inputs could not be simulated.
+    """
+
+    series: dict[str, int]
+    success_rate: float
+    median_ending_balance: float
+    bars: list[SensitivityBar]
+    skipped: list[SensitivityField] = Field(default_factory=list)
+
+
+class MonteCarloRequest(BaseModel):
+    """Simulation input plus settings for block-bootstrapped Monte Carlo paths."""
+
+    inputs: SimulationInput
+    paths: int = Field(ge=1, le=1_000_000, default=10_000)
+    mean_block_length: float = Field(ge=1, le=50, default=5.0)
+    seed: int = Field(ge=0, default=0)
+
+
+class MonteCarloResponse(BaseModel):
+    """Summary of a Monte Carlo simulation batch."""
+
+    series: dict[str, int]
+    paths: int
+    seed: int
+    mean_block_length: float
+    summary: Summary
+    rank_error: float = 0.0
+
+
+class BatchRequest(BaseModel):
+    """Simulation inputs for many households, run against one shared series."""
+
+    households: list[SimulationInput] = Field(min_length=1, max_length=10_000)
+    include_runs: bool = False
+
+
+class HouseholdResult(BaseModel):
+    """Summary for one household of a batch, with its runs when requested."""
+
+    summary: Summary
+    quantile_indices: list[int]
+    results: list[PerStartYearResult] | None = Field(
+        default=None, exclude_if=lambda results: results is None
+    )
+
+
+class BatchResponse(BaseModel):
+    """Per-household results of a batch, in request order."""
+
+    series: dict[str, int]
+    households: list[HouseholdResult]
+
+
+class JobStatus(BaseModel):
+    """Progress of a background job, counted in completed chunks."""
+
+    id: str
+    kind: JobKind
+    state: JobState
+    completed_chunks: int
+    total_chunks: int
+    error: str | None = Field(default=None, exclude_if=lambda error: error is None)
+
+
+class CacheStats(BaseModel):
+    """Occupancy and hit counters for an in-process cache."""
+
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int = 0
+    hit_rate: float = 0.0
 
 
 class SimulationRun(TypedDict):
@@ -74,6 +390,7 @@ class SimulationRun(TypedDict):
     yearly_withdrawals: list[float]
     yearly_fees: list[float]
     highlight: bool
+    start_month: NotRequired[int]
 
 
 class AskRequest(BaseModel):
@@ -88,3 +405,12 @@ class AskResponse(BaseModel):
     """Response payload for LLM explanations."""
 
     answer: str
+
+
+class AskStats(BaseModel):
+    """Answer cache counters and prompt sizes for the LLM explanation path."""
+
+    cache: CacheStats
+    prompts: int
+    raw_prompt_bytes: int
+    compact_prompt_bytes: int
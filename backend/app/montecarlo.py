@@ -0,0 +1,168 @@
+"""Monte Carlo simulations over a stationary block bootstrap of the historical series."""
+
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import MonteCarloRequest, MonteCarloResponse
+from .simulate import FloatArray, IntArray, PathParameters, PathResult, simulate_paths
+from .sketch import DEFAULT_K
+from .summary import SummaryAccumulator
+
+CHUNK_PATHS = 10_000
+EXACT_SUMMARY_PATHS = 100_000
+
+
+def stationary_bootstrap_indices(
+    rng: np.random.Generator,
+    n_years: int,
+    paths: int,
+    horizon: int,
+    mean_block_length: float,
+) -> IntArray:
+    """Draw (paths x horizon) series offsets with the Politis-Romano stationary bootstrap.
+
+    Each year either starts a new block at a uniformly drawn offset, with probability
+    ``1 / mean_block_length``, or continues the current block, wrapping around the end
+    of the series. Block lengths are therefore geometric with the requested mean.
+    """
+    starts = rng.integers(0, n_years, size=(paths, horizon), dtype=np.int64)
+    new_block = rng.random((paths, horizon)) < 1 / mean_block_length
+    indices = np.empty((paths, horizon), dtype=np.int64)
+    indices[:, 0] = starts[:, 0]
+    for year_idx in range(1, horizon):
+        continued = (indices[:, year_idx - 1] + 1) % n_years
+        indices[:, year_idx] = np.where(new_block[:, year_idx], starts[:, year_idx], continued)
+    return indices
+
+
+def simulate_chunk(
+    request: MonteCarloRequest,
+    params: PathParameters,
+    growth: FloatArray,
+    seed: np.random.SeedSequence,
+    paths: int,
+) -> PathResult:
+    """Simulate one chunk of bootstrapped paths and keep only per-path totals.
+
+    Every asset is drawn with the same offsets so their joint behaviour within a year is
+    preserved. Social Security eligibility counts calendar years from the
+    requested start year, since bootstrapped paths have no historical year of their own.
+    """
+    req = request.inputs
+    rng = np.random.default_rng(seed)
+    indices = stationary_bootstrap_indices(
+        rng, growth.shape[1], paths, req.retirement_years, request.mean_block_length
+    )
+    return simulate_paths(
+        params,
+        growth[:, indices],
+        np.full(paths, req.start_year, dtype=np.int64),
+        record=False,
+    )
+
+
+def summarize_chunk(
+    request: MonteCarloRequest,
+    params: PathParameters,
+    growth: FloatArray,
+    seed: np.random.SeedSequence,
+    paths: int,
+) -> SummaryAccumulator:
+    """Simulate one chunk and reduce it to a summary accumulator on the worker.
+
+    Sketched accumulators are a few kilobytes however large the chunk, so only they,
+    not the per-path totals, travel back to the parent process.
+    """
+    accumulator = SummaryAccumulator(sketch_size(request), seed.spawn(1)[0])
+    accumulator.add(simulate_chunk(request, params, growth, seed, paths))
+    return accumulator
+
+
+def chunk_sizes(paths: int) -> list[int]:
+    """Split a path count into fixed-size chunks so results do not depend on workers."""
+    full, remainder = divmod(paths, CHUNK_PATHS)
+    return [CHUNK_PATHS] * full + ([remainder] if remainder else [])
+
+
+@lru_cache(maxsize=1)
+def process_pool() -> ProcessPoolExecutor:
+    """Return the shared worker pool sized by ``SIMULATION_WORKERS`` or the CPU count."""
+    workers = int(os.environ.get("SIMULATION_WORKERS", "0")) or os.cpu_count() or 1
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def iter_chunks(
+    request: MonteCarloRequest,
+    series: HistoricalSeries,
+    executor: Executor | None = None,
+) -> Iterator[SummaryAccumulator]:
+    """Yield per-chunk summary accumulators in order, on ``executor`` when given.
+
+    Every chunk draws from its own child of ``SeedSequence(seed)``, so a seed always
+    reproduces the same paths regardless of how many workers run them. Requests above
+    ``EXACT_SUMMARY_PATHS`` are summarized with mergeable quantile sketches.
+    """
+    sizes = chunk_sizes(request.paths)
+    seeds = np.random.SeedSequence(request.seed).spawn(len(sizes))
+    params = PathParameters.from_inputs([request.inputs], shape=(), assets=series.assets)
+    growth = np.ascontiguousarray(series.growth)
+    args = (
+        [request] * len(sizes),
+        [params] * len(sizes),
+        [growth] * len(sizes),
+        seeds,
+        sizes,
+    )
+    if executor is None or len(sizes) == 1:
+        yield from map(summarize_chunk, *args)
+    else:
+        yield from executor.map(summarize_chunk, *args)
+
+
+def sketch_size(request: MonteCarloRequest) -> int | None:
+    """Return the sketch size used to summarize a request, or None for exact summaries."""
+    return DEFAULT_K if request.paths > EXACT_SUMMARY_PATHS else None
+
+
+def run_monte_carlo(
+    request: MonteCarloRequest,
+    series: HistoricalSeries,
+    executor: Executor | None = None,
+    on_progress: Callable[[MonteCarloResponse], None] | None = None,
+) -> MonteCarloResponse:
+    """Simulate bootstrapped paths chunk by chunk and merge them into one summary.
+
+    ``on_progress`` receives the summary of the paths merged so far after every chunk;
+    an exception it raises abandons the chunks that have not started.
+    """
+    accumulator = SummaryAccumulator(sketch_size(request))
+    for chunk in iter_chunks(request, series, executor):
+        accumulator.merge(chunk)
+        if on_progress is not None:
+            on_progress(monte_carlo_response(request, series, accumulator))
+    return monte_carlo_response(request, series, accumulator)
+
+
+def monte_carlo_response(
+    request: MonteCarloRequest,
+    series: HistoricalSeries,
+    accumulator: SummaryAccumulator,
+) -> MonteCarloResponse:
+    """Build the response for the paths merged into ``accumulator``."""
+    return MonteCarloResponse(
+        series=series.bounds,
+        paths=request.paths,
+        seed=request.seed,
+        mean_block_length=request.mean_block_length,
+        summary=accumulator.summary(),
+        rank_error=accumulator.rank_error,
+    )
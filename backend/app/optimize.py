@@ -0,0 +1,176 @@
+"""Derivative-free search for allocations and withdrawal guardrails."""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import OptimizeCandidate, OptimizeRequest, OptimizeResponse, SimulationInput
+from .simulate import FloatArray, simulate_scenarios
+from .summary import sorted_percentiles
+
+SEARCH_FIELDS = (
+    "stock_allocation",
+    "withdrawal_rate_min",
+    "withdrawal_rate_max",
+    "withdrawal_smoothing_up",
+    "withdrawal_smoothing_down",
+)
+INITIAL_STEP = 0.25
+KEY_DECIMALS = 9
+MEDIAN = (50,)
+
+Point = tuple[float, ...]
+
+
+def search_bounds(request: OptimizeRequest) -> tuple[FloatArray, FloatArray]:
+    """Return the lower and upper bound of every searched field.
+
+    The guardrails stay on either side of the base starting rate, so every candidate
+    is a valid input.
+    """
+    start = request.base.withdrawal_rate_start
+    low = np.array([0.0, request.min_rate, start, 0.0, 0.0])
+    high = np.array([1.0, start, request.max_rate, 1.0, 1.0])
+    return low, high
+
+
+def candidate_inputs(
+    request: OptimizeRequest,
+    points: Sequence[Point],
+) -> list[SimulationInput]:
+    """Map points of the unit cube to simulation inputs; bonds hold the rest."""
+    low, high = search_bounds(request)
+    inputs = []
+    for point in points:
+        values = (low + np.array(point) * (high - low)).tolist()
+        update = dict(zip(SEARCH_FIELDS, values, strict=True))
+        update["bond_allocation"] = 1 - update["stock_allocation"]
+        inputs.append(request.base.model_copy(update=update))
+    return inputs
+
+
+def evaluate(
+    request: OptimizeRequest,
+    points: Sequence[Point],
+    series: HistoricalSeries,
+) -> list[OptimizeCandidate]:
+    """Simulate every rolling start year of all candidates in one batched pass."""
+    inputs = candidate_inputs(request, points)
+    paths = simulate_scenarios(inputs, series)
+    success_rates = paths.success.mean(axis=-1).tolist()
+    balances = sorted_percentiles(np.sort(paths.ending_balances, axis=-1), MEDIAN)[..., 0]
+    spends = sorted_percentiles(np.sort(paths.total_withdrawals, axis=-1), MEDIAN)[..., 0]
+    spends = spends / request.base.retirement_years
+    return [
+        OptimizeCandidate(
+            **{field: getattr(req, field) for field in SEARCH_FIELDS},
+            success_rate=success_rate,
+            median_ending_balance=balance,
+            median_annual_spend=spend,
+            feasible=spend >= request.min_spend,
+        )
+        for req, success_rate, balance, spend in zip(
+            inputs, success_rates, balances.tolist(), spends.tolist(), strict=True
+        )
+    ]
+
+
+def score(candidate: OptimizeCandidate, request: OptimizeRequest) -> tuple[bool, float, float]:
+    """Rank feasible candidates first, then by objective, then by the other metric."""
+    if request.objective == "success_rate":
+        return candidate.feasible, candidate.success_rate, candidate.median_ending_balance
+    return candidate.feasible, candidate.median_ending_balance, candidate.success_rate
+
+
+def objective_value(candidate: OptimizeCandidate, request: OptimizeRequest) -> float:
+    """Return the candidate's value of the requested objective."""
+    return score(candidate, request)[1]
+
+
+def frontier(
+    candidates: Sequence[OptimizeCandidate],
+    request: OptimizeRequest,
+) -> list[OptimizeCandidate]:
+    """Return feasible candidates not dominated on objective and spend, by spend."""
+    ordered = sorted(
+        (candidate for candidate in candidates if candidate.feasible),
+        key=lambda candidate: (
+            -candidate.median_annual_spend,
+            -objective_value(candidate, request),
+        ),
+    )
+    kept: list[OptimizeCandidate] = []
+    for candidate in ordered:
+        if not kept or objective_value(candidate, request) > objective_value(kept[-1], request):
+            kept.append(candidate)
+    return kept[::-1]
+
+
+def neighbours(point: Point, step: float) -> list[Point]:
+    """Return the compass poll points one step along each axis, inside the cube."""
+    polls = []
+    for axis in range(len(point)):
+        for direction in (-step, step):
+            moved = list(point)
+            moved[axis] = min(1.0, max(0.0, moved[axis] + direction))
+            polls.append(key(moved))
+    return polls
+
+
+def key(point: Sequence[float]) -> Point:
+    """Round a point so repeated visits hit the evaluation memo."""
+    return tuple(round(value, KEY_DECIMALS) for value in point)
+
+
+def run_optimizer(request: OptimizeRequest, series: HistoricalSeries) -> OptimizeResponse:
+    """Search the guardrail and allocation space with a batched compass search.
+
+    The base input and ``initial_samples`` seeded random points are evaluated in one
+    batch; the search then polls one step along every axis around the best point in one
+    batch per iteration, moving to any improvement and halving the step otherwise until
+    it falls below ``tolerance`` or the evaluation budget is spent. Evaluations are
+    memoized on the rounded point, so revisited candidates are never simulated twice.
+    """
+    low, high = search_bounds(request)
+    span = np.where(high > low, high - low, 1.0)
+    base = [getattr(request.base, field) for field in SEARCH_FIELDS]
+    origin = key(np.clip((np.array(base) - low) / span, 0.0, 1.0).tolist())
+    rng = np.random.default_rng(request.seed)
+    samples = [
+        key(row) for row in rng.random((request.initial_samples, len(SEARCH_FIELDS))).tolist()
+    ]
+
+    memo: dict[Point, OptimizeCandidate] = {}
+
+    def visit(points: list[Point]) -> None:
+        fresh = list(dict.fromkeys(point for point in points if point not in memo))
+        fresh = fresh[: request.max_evaluations - len(memo)]
+        if fresh:
+            memo.update(zip(fresh, evaluate(request, fresh, series), strict=True))
+
+    visit([origin, *samples])
+    best = max(memo, key=lambda point: score(memo[point], request))
+    step = INITIAL_STEP
+    iterations = 0
+    while step >= request.tolerance and len(memo) < request.max_evaluations:
+        iterations += 1
+        polls = neighbours(best, step)
+        visit(polls)
+        improved = max(
+            (point for point in polls if point in memo),
+            key=lambda point: score(memo[point], request),
+        )
+        if score(memo[improved], request) > score(memo[best], request):
+            best = improved
+        else:
+            step /= 2
+
+    return OptimizeResponse(
+        series=series.bounds,
+        objective=request.objective,
+        best=memo[best],
+        frontier=frontier(list(memo.values()), request),
+        evaluations=len(memo),
+        iterations=iterations,
+    )
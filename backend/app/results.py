@@ -0,0 +1,292 @@
+"""Simulation outcomes and their wire encodings."""
+
+import json
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any
+
+import numpy as np
+from pydantic_core import to_json
+
+from .data import HistoricalSeries
+from .metrics import stage
+from .models import (
+    Engine,
+    PercentileBands,
+    PerStartYearResult,
+    Precision,
+    ResultFormat,
+    ResultView,
+    SimulationInput,
+    SimulationResponse,
+    SimulationRun,
+    Summary,
+)
+from .simulate import FloatArray, PathResult, simulate_rolling
+from .summary import SummaryAccumulator, percentile_bands, summarize_and_rank
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.retirement.columnar+json"
+BINARY_MEDIA_TYPE = "application/vnd.retirement.simulation"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BINARY_MAGIC = b"RPSIM\x00\x00\x01"
+ALIGNMENT = 8
+MATRICES = ("balances", "withdrawals", "fees")
+
+
+@dataclass(frozen=True)
+class SimulationOutcome:
+    """Everything a rolling simulation produces, before it is encoded."""
+
+    req: SimulationInput
+    min_year: int
+    max_year: int
+    paths: PathResult
+    summary: Summary
+    quantile_indices: list[int]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the held path arrays in bytes."""
+        return sum(self.matrix(name).nbytes for name in MATRICES)
+
+    def matrix(self, name: str) -> FloatArray:
+        """Return one of the recorded (start years x years) matrices."""
+        matrix: FloatArray | None = getattr(self.paths, name)
+        if matrix is None:
+            message = f"Matrix {name} was not recorded."
+            raise ValueError(message)
+        return matrix
+
+    @cached_property
+    def bands(self) -> PercentileBands:
+        """Return the per-year percentile bands, computed once per cached outcome."""
+        return percentile_bands(
+            self.matrix("balances"), self.matrix("withdrawals"), self.matrix("fees")
+        )
+
+
+def run_simulation(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    engine: Engine = "vectorized",
+) -> SimulationOutcome:
+    """Simulate every rolling start year (or month) and summarize the runs."""
+    with stage("simulate"):
+        paths = simulate_rolling(req, series, series.start_years(req.retirement_years), engine)
+    with stage("summarize"):
+        summary, quantile_indices = summarize_and_rank(
+            int(np.count_nonzero(paths.success)),
+            paths.ending_balances,
+            paths.total_withdrawals,
+            paths.total_fees,
+        )
+    bounds = series.bounds
+    return SimulationOutcome(
+        req=req,
+        min_year=bounds["min_year"],
+        max_year=bounds["max_year"],
+        paths=paths,
+        summary=summary,
+        quantile_indices=quantile_indices,
+    )
+
+
+def negotiate_format(requested: ResultFormat | None, accept: str | None) -> ResultFormat:
+    """Pick a result format from an explicit flag, falling back to the Accept header."""
+    if requested is not None:
+        return requested
+    accept = (accept or "").lower()
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    if BINARY_MEDIA_TYPE in accept or "application/octet-stream" in accept:
+        return "binary"
+    return "json"
+
+
+def to_response(outcome: SimulationOutcome, view: ResultView = "runs") -> SimulationResponse:
+    """Build the JSON response model with the runs, percentile bands or both.
+
+    The bands view stays the same size however many runs were simulated.
+    """
+    results = None
+    if view != "bands":
+        results = [
+            PerStartYearResult(**item) for item in outcome.paths.to_runs(outcome.req.start_year)
+        ]
+    return SimulationResponse(
+        series={"min_year": outcome.min_year, "max_year": outcome.max_year},
+        results=results,
+        summary=outcome.summary,
+        quantile_indices=outcome.quantile_indices,
+        bands=None if view == "runs" else outcome.bands,
+    )
+
+
+def encode_json(outcome: SimulationOutcome, view: ResultView = "runs") -> bytes:
+    """Encode the JSON response straight from the engine arrays.
+
+    Outcomes are produced internally, so their runs skip ``PerStartYearResult``
+    construction and validation: each matrix becomes nested lists in one call and
+    pydantic-core's encoder writes them. The bytes are the same as
+    ``to_response(outcome, view).model_dump_json()``.
+    """
+    payload: dict[str, object] = {
+        "series": {"min_year": outcome.min_year, "max_year": outcome.max_year},
+    }
+    if view != "bands":
+        payload["results"] = _json_runs(outcome)
+    payload["summary"] = outcome.summary
+    payload["quantile_indices"] = outcome.quantile_indices
+    if view != "runs":
+        payload["bands"] = outcome.bands
+    return to_json(payload)
+
+
+def _json_runs(outcome: SimulationOutcome) -> list[dict[str, object]]:
+    """Lay out the runs as ``PathResult.iter_runs`` does, converting whole matrices."""
+    paths = outcome.paths
+    periods = paths.periods_per_year
+    highlight = outcome.req.start_year * periods
+    runs: list[dict[str, object]] = []
+    for start, success, balances, withdrawals, fees in zip(
+        paths.start_years.tolist(),
+        paths.success.tolist(),
+        outcome.matrix("balances").tolist(),
+        outcome.matrix("withdrawals").tolist(),
+        outcome.matrix("fees").tolist(),
+        strict=True,
+    ):
+        run: dict[str, object] = {
+            "start_year": start // periods,
+            "success": success,
+            "ending_balance": balances[-1],
+            "yearly_balances": balances,
+            "yearly_withdrawals": withdrawals,
+            "yearly_fees": fees,
+            "highlight": start == highlight,
+        }
+        if periods != 1:
+            run["start_month"] = start % periods + 1
+        runs.append(run)
+    return runs
+
+
+def _envelope(outcome: SimulationOutcome) -> dict[str, Any]:
+    """Return the fields shared by the columnar and binary encodings.
+
+    Monthly outcomes add a ``start_months`` column parallel to ``start_years``.
+    """
+    starts = outcome.paths.start_years
+    periods = outcome.paths.periods_per_year
+    envelope: dict[str, Any] = {
+        "series": {"min_year": outcome.min_year, "max_year": outcome.max_year},
+        "start_years": (starts // periods).tolist(),
+    }
+    if periods != 1:
+        envelope["start_months"] = (starts % periods + 1).tolist()
+    envelope.update(
+        success=outcome.paths.success.tolist(),
+        highlight_start_year=outcome.req.start_year,
+        summary=outcome.summary.model_dump(mode="json"),
+        quantile_indices=outcome.quantile_indices,
+    )
+    return envelope
+
+
+def encode_columnar(outcome: SimulationOutcome) -> bytes:
+    """Encode the outcome as JSON with one dense matrix per metric.
+
+    Start years form the shared row axis, so keys are not repeated per run.
+    """
+    payload = _envelope(outcome)
+    payload["ending_balances"] = outcome.paths.ending_balances.tolist()
+    for name in MATRICES:
+        payload[name] = outcome.matrix(name).tolist()
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def encode_binary(outcome: SimulationOutcome, precision: Precision = "float64") -> bytes:
+    """Encode the outcome as a length-prefixed JSON header plus packed matrices.
+
+    Layout: the 8-byte ``BINARY_MAGIC``, a little-endian uint32 header length,
+    the UTF-8 JSON header, zero padding to an 8-byte boundary, then the data section.
+    The header lists every matrix with its shape and byte offset within the data
+    section; each matrix is row-major little-endian floats of the header's ``dtype``.
+    """
+    dtype = np.dtype(np.float32 if precision == "float32" else np.float64).newbyteorder("<")
+    blobs = [np.ascontiguousarray(outcome.matrix(name), dtype=dtype) for name in MATRICES]
+    header = _envelope(outcome)
+    header["dtype"] = dtype.str
+    header["arrays"] = []
+    offset = 0
+    for name, blob in zip(MATRICES, blobs, strict=True):
+        header["arrays"].append({"name": name, "shape": list(blob.shape), "offset": offset})
+        offset = _align(offset + blob.nbytes)
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    prefix = BINARY_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes
+    parts = [prefix, b"\0" * (_align(len(prefix)) - len(prefix))]
+    for blob in blobs:
+        parts.append(blob.tobytes())
+        parts.append(b"\0" * (_align(blob.nbytes) - blob.nbytes))
+    return b"".join(parts)
+
+
+def decode_binary(payload: bytes) -> tuple[dict[str, Any], dict[str, FloatArray]]:
+    """Decode a binary payload into its header and zero-copy matrix views."""
+    if payload[: len(BINARY_MAGIC)] != BINARY_MAGIC:
+        message = "Payload is not a binary simulation result."
+        raise ValueError(message)
+    (length,) = struct.unpack_from("<I", payload, len(BINARY_MAGIC))
+    start = len(BINARY_MAGIC) + 4
+    header: dict[str, Any] = json.loads(payload[start : start + length])
+    data_start = _align(start + length)
+    dtype = np.dtype(header["dtype"])
+    arrays = {
+        entry["name"]: np.frombuffer(
+            payload,
+            dtype=dtype,
+            count=int(np.prod(entry["shape"])),
+            offset=data_start + entry["offset"],
+        ).reshape(entry["shape"])
+        for entry in header["arrays"]
+    }
+    return header, arrays
+
+
+def stream_ndjson(
+    runs: Iterable[SimulationRun],
+    series: dict[str, int],
+) -> Iterator[bytes]:
+    """Yield one NDJSON line per run, then a trailing summary record.
+
+    Result lines are ``{"type": "result", ...}`` with the per-start-year fields. The
+    summary is accumulated as runs stream past, so no run is retained once written; the
+    final ``{"type": "summary", ...}`` line carries the series bounds, summary and
+    quantile indices.
+    """
+    accumulator = SummaryAccumulator()
+    for run in runs:
+        accumulator.add_run(run)
+        yield ndjson_line({"type": "result", **run})
+    summary, quantile_indices = accumulator.summary_and_indices()
+    yield ndjson_line(
+        {
+            "type": "summary",
+            "series": series,
+            "summary": summary.model_dump(mode="json"),
+            "quantile_indices": quantile_indices,
+        }
+    )
+
+
+def ndjson_line(record: dict[str, object]) -> bytes:
+    """Encode one compact NDJSON record."""
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the array alignment."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,172 @@
+"""Tornado sensitivity analysis of simulation inputs."""
+
+from typing import get_args
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import (
+    RELATIVE_SENSITIVITY_FIELDS,
+    SensitivityBar,
+    SensitivityField,
+    SensitivityOutcome,
+    SensitivityRequest,
+    SensitivityResponse,
+    SimulationInput,
+)
+from .simulate import simulate_scenarios
+from .summary import sorted_percentiles
+from .validation import check_simulation_input
+
+DEFAULT_STEPS: dict[SensitivityField, float] = {
+    "portfolio_start": 0.1,
+    "stock_allocation": 0.1,
+    "withdrawal_rate_start": 0.005,
+    "withdrawal_rate_min": 0.005,
+    "withdrawal_rate_max": 0.005,
+    "withdrawal_smoothing_up": 0.1,
+    "withdrawal_smoothing_down": 0.1,
+    "management_fee": 0.0025,
+    "inflation_rate": 0.005,
+    "ss_monthly_amount": 0.1,
+    "ss_start_year": 1,
+}
+UPPER_BOUNDS: dict[SensitivityField, float] = {"inflation_rate": 0.2}
+SS_FIELDS = frozenset({"ss_monthly_amount", "ss_start_year"})
+MEDIAN = (50,)
+
+
+def sensitivity_fields(base: SimulationInput) -> list[SensitivityField]:
+    """Return the fields that can be perturbed for this input.
+
+    Social Security fields need at least one recipient, and the stock allocation is
+    only meaningful when ``allocations`` is not used.
+    """
+    return [
+        field
+        for field in get_args(SensitivityField)
+        if not (field in SS_FIELDS and not base.ss_recipients)
+        and not (field == "stock_allocation" and base.allocations)
+    ]
+
+
+def field_value(req: SimulationInput, field: SensitivityField) -> float:
+    """Return the value a field reports: total monthly or earliest start for SS."""
+    if field == "ss_monthly_amount":
+        return sum(recipient.monthly_amount for recipient in req.ss_recipients)
+    if field == "ss_start_year":
+        return min(recipient.start_year for recipient in req.ss_recipients)
+    value: float = getattr(req, field)
+    return value
+
+
+def field_range(base: SimulationInput, field: SensitivityField) -> tuple[float, float]:
+    """Return the range an absolute step is clamped to.
+
+    The guardrail rates keep ``min <= start <= max``: the starting rate moves within the
+    band, and each bound moves only as far as the starting rate.
+    """
+    if field == "withdrawal_rate_start":
+        return base.withdrawal_rate_min, base.withdrawal_rate_max
+    if field == "withdrawal_rate_min":
+        return 0.0, base.withdrawal_rate_start
+    if field == "withdrawal_rate_max":
+        return base.withdrawal_rate_start, 1.0
+    return 0.0, UPPER_BOUNDS.get(field, 1.0)
+
+
+def perturb(
+    base: SimulationInput,
+    field: SensitivityField,
+    step: float,
+    direction: int,
+) -> SimulationInput:
+    """Move one field down (``direction=-1``) or up (``1``) by its step.
+
+    Absolute steps are clamped to the field's range; the bond allocation moves opposite
+    the stock allocation. The perturbed input is validated again, so a step that leaves
+    the valid range raises ``ValidationError``.
+    """
+    values = base.model_dump()
+    if field == "ss_monthly_amount":
+        for recipient in values["ss_recipients"]:
+            recipient["monthly_amount"] *= 1 + direction * step
+    elif field == "ss_start_year":
+        for recipient in values["ss_recipients"]:
+            recipient["start_year"] += direction * max(1, round(step))
+    elif field in RELATIVE_SENSITIVITY_FIELDS:
+        values[field] *= 1 + direction * step
+    else:
+        low, high = field_range(base, field)
+        values[field] = min(max(values[field] + direction * step, low), high)
+        if field == "stock_allocation":
+            values["bond_allocation"] = 1 - values[field]
+    return SimulationInput.model_validate(values)
+
+
+def perturbations(
+    request: SensitivityRequest, series: HistoricalSeries
+) -> tuple[list[SimulationInput], list[SensitivityField], list[SensitivityField]]:
+    """Return the base and perturbed inputs, the fields they cover and the skipped fields.
+
+    A field is skipped when either of its perturbations fails validation against the
+    series, such as a Social Security start year moved before 1900.
+    """
+    base = request.base
+    inputs = [base]
+    fields: list[SensitivityField] = []
+    skipped: list[SensitivityField] = []
+    for field in sensitivity_fields(base):
+        step = request.steps.get(field, DEFAULT_STEPS[field])
+        try:
+            pair = [perturb(base, field, step, direction) for direction in (-1, 1)]
+            for req in pair:
+                check_simulation_input(req, series)
+        except ValueError:
+            skipped.append(field)
+            continue
+        fields.append(field)
+        inputs.extend(pair)
+    return inputs, fields, skipped
+
+
+def run_sensitivity(request: SensitivityRequest, series: HistoricalSeries) -> SensitivityResponse:
+    """Simulate the base input and both perturbations of every field in one pass.
+
+    The 2k + 1 scenarios share the loaded series and its growth windows in a single
+    batched kernel invocation. Fields whose perturbations are invalid are reported as
+    skipped instead of bars. Bars are ordered by the spread of the success rate
+    across the two perturbations, then by the spread of the median ending balance.
+    """
+    inputs, fields, skipped = perturbations(request, series)
+    paths = simulate_scenarios(inputs, series)
+    success_rates = paths.success.mean(axis=-1).tolist()
+    balances = sorted_percentiles(np.sort(paths.ending_balances, axis=-1), MEDIAN)[..., 0].tolist()
+
+    def outcome(index: int) -> SensitivityOutcome:
+        return SensitivityOutcome(
+            value=field_value(inputs[index], fields[(index - 1) // 2]),
+            success_rate=success_rates[index],
+            median_ending_balance=balances[index],
+            success_rate_change=success_rates[index] - success_rates[0],
+            median_ending_balance_change=balances[index] - balances[0],
+        )
+
+    bars = [
+        SensitivityBar(field=field, low=outcome(2 * rank + 1), high=outcome(2 * rank + 2))
+        for rank, field in enumerate(fields)
+    ]
+    bars.sort(
+        key=lambda bar: (
+            abs(bar.high.success_rate - bar.low.success_rate),
+            abs(bar.high.median_ending_balance - bar.low.median_ending_balance),
+        ),
+        reverse=True,
+    )
+    return SensitivityResponse(
+        series=series.bounds,
+        success_rate=success_rates[0],
+        median_ending_balance=balances[0],
+        bars=bars,
+        skipped=skipped,
+    )
@@ -1,6 +1,197 @@
 """Simulation engine for retirement runs."""
 
-from .models import SimulationInput, SimulationRun
+import math
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from .data import ASSETS, MONTHS_PER_YEAR, HistoricalSeries
+from .models import Engine, SimulationInput, SimulationRun
+
+FloatArray = npt.NDArray[np.float64]
+IntArray = npt.NDArray[np.int64]
+BoolArray = npt.NDArray[np.bool_]
+
+
+@dataclass(frozen=True)
+class PathResult:
+    """Simulation outcomes for a batch of paths held as dense arrays.
+
+    Every array shares the leading path axes, e.g. (start years,) for a single input or
+    (scenarios, start years) for a batch. The per-year matrices are only present when
+    the run was recorded; balances carry one more column than the horizon because the
+    starting balance is recorded first. Sub-annual runs hold absolute start periods in
+    ``start_years`` and still record one column per year.
+    """
+
+    start_years: IntArray
+    success: BoolArray
+    ending_balances: FloatArray
+    total_withdrawals: FloatArray
+    total_fees: FloatArray
+    balances: FloatArray | None = None
+    withdrawals: FloatArray | None = None
+    fees: FloatArray | None = None
+    periods_per_year: int = 1
+
+    def to_runs(self, highlight_year: int) -> list[SimulationRun]:
+        """Convert recorded matrices into per-start-year simulation runs."""
+        return list(self.iter_runs(highlight_year))
+
+    def iter_runs(self, highlight_year: int) -> Iterator[SimulationRun]:
+        """Yield recorded matrices one start year at a time.
+
+        Monthly runs also carry their ``start_month``; the run starting in January of
+        ``highlight_year`` is highlighted.
+        """
+        if self.balances is None or self.withdrawals is None or self.fees is None:
+            message = "Per-year results were not recorded for this run."
+            raise ValueError(message)
+        highlight = highlight_year * self.periods_per_year
+        for row, start in enumerate(self.start_years.tolist()):
+            balances = self.balances[row].tolist()
+            run: SimulationRun = {
+                "start_year": start // self.periods_per_year,
+                "success": bool(self.success[row]),
+                "ending_balance": balances[-1],
+                "yearly_balances": balances,
+                "yearly_withdrawals": self.withdrawals[row].tolist(),
+                "yearly_fees": self.fees[row].tolist(),
+                "highlight": start == highlight,
+            }
+            if self.periods_per_year != 1:
+                run["start_month"] = start % self.periods_per_year + 1
+            yield run
+
+    @classmethod
+    def from_runs(cls, runs: Sequence[SimulationRun]) -> "PathResult":
+        """Stack per-start-year runs into dense matrices."""
+        return cls(
+            start_years=np.array([run["start_year"] for run in runs], dtype=np.int64),
+            success=np.array([run["success"] for run in runs], dtype=np.bool_),
+            ending_balances=np.array([run["ending_balance"] for run in runs], dtype=np.float64),
+            total_withdrawals=np.array(
+                [sum(run["yearly_withdrawals"]) for run in runs], dtype=np.float64
+            ),
+            total_fees=np.array([sum(run["yearly_fees"]) for run in runs], dtype=np.float64),
+            balances=np.array([run["yearly_balances"] for run in runs], dtype=np.float64),
+            withdrawals=np.array([run["yearly_withdrawals"] for run in runs], dtype=np.float64),
+            fees=np.array([run["yearly_fees"] for run in runs], dtype=np.float64),
+        )
+
+    def scenario(self, index: int) -> "PathResult":
+        """Return the paths of one input of a batched (inputs, start years) result."""
+        return PathResult(
+            start_years=self.start_years[index],
+            success=self.success[index],
+            ending_balances=self.ending_balances[index],
+            total_withdrawals=self.total_withdrawals[index],
+            total_fees=self.total_fees[index],
+            balances=None if self.balances is None else self.balances[index],
+            withdrawals=None if self.withdrawals is None else self.withdrawals[index],
+            fees=None if self.fees is None else self.fees[index],
+            periods_per_year=self.periods_per_year,
+        )
+
+
+@dataclass(frozen=True)
+class PathParameters:
+    """Simulation inputs held as arrays that broadcast against the path axes.
+
+    Asset weights and Social Security recipients live on trailing axes; inputs with
+    fewer recipients are padded with zero amounts, which leaves every sum unchanged.
+    ``rebalance_annual`` marks paths reset to their target weights on every retirement
+    anniversary and ``rebalance_band`` is the drift that triggers a reset at any step
+    (infinite unless the policy is ``threshold``). ``periods_per_year`` is the number of
+    kernel steps per simulated year.
+    """
+
+    portfolio_start: FloatArray
+    weights: FloatArray
+    rebalance_annual: BoolArray
+    rebalance_band: FloatArray
+    withdrawal_rate_start: FloatArray
+    withdrawal_rate_min: FloatArray
+    withdrawal_rate_max: FloatArray
+    withdrawal_smoothing_up: FloatArray
+    withdrawal_smoothing_down: FloatArray
+    management_fee: FloatArray
+    inflation_rate: FloatArray
+    ss_start_years: IntArray
+    ss_annual_amounts: FloatArray
+    periods_per_year: int = 1
+
+    @classmethod
+    def from_inputs(
+        cls,
+        inputs: Sequence[SimulationInput],
+        shape: tuple[int, ...] | None = None,
+        *,
+        periods_per_year: int = 1,
+        assets: Sequence[str] = ASSETS,
+    ) -> "PathParameters":
+        """Stack inputs into arrays of ``shape`` (default: one row per input).
+
+        Weights follow the order of ``assets``, the series' named return columns.
+        """
+        shape = (len(inputs), 1) if shape is None else shape
+        weights = np.array([asset_weights(req, assets) for req in inputs], dtype=np.float64)
+        recipients = max((len(req.ss_recipients) for req in inputs), default=0)
+        ss_start_years = np.zeros((len(inputs), recipients), dtype=np.int64)
+        ss_annual_amounts = np.zeros((len(inputs), recipients), dtype=np.float64)
+        for row, req in enumerate(inputs):
+            for slot, recipient in enumerate(req.ss_recipients):
+                ss_start_years[row, slot] = recipient.start_year
+                ss_annual_amounts[row, slot] = recipient.monthly_amount * 12
+
+        def column(name: str) -> FloatArray:
+            values = [getattr(req, name) for req in inputs]
+            return np.array(values, dtype=np.float64).reshape(shape)
+
+        return cls(
+            portfolio_start=column("portfolio_start"),
+            weights=weights.reshape((*shape, len(assets))),
+            rebalance_annual=np.array(
+                [req.rebalancing == "annual" for req in inputs], dtype=np.bool_
+            ).reshape(shape),
+            rebalance_band=np.array(
+                [
+                    req.rebalance_band if req.rebalancing == "threshold" else math.inf
+                    for req in inputs
+                ],
+                dtype=np.float64,
+            ).reshape(shape),
+            withdrawal_rate_start=column("withdrawal_rate_start"),
+            withdrawal_rate_min=column("withdrawal_rate_min"),
+            withdrawal_rate_max=column("withdrawal_rate_max"),
+            withdrawal_smoothing_up=column("withdrawal_smoothing_up"),
+            withdrawal_smoothing_down=column("withdrawal_smoothing_down"),
+            management_fee=column("management_fee"),
+            inflation_rate=column("inflation_rate"),
+            ss_start_years=ss_start_years.reshape((*shape, recipients)),
+            ss_annual_amounts=ss_annual_amounts.reshape((*shape, recipients)),
+            periods_per_year=periods_per_year,
+        )
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Return the broadcast shape of the scalar parameters."""
+        return self.portfolio_start.shape
+
+
+def asset_weights(req: SimulationInput, assets: Sequence[str]) -> list[float]:
+    """Return the target weight of each named asset, in the order of ``assets``.
+
+    Inputs without ``allocations`` hold stocks and bonds at their two allocation fields.
+    """
+    targets = req.allocations or {"stock": req.stock_allocation, "bond": req.bond_allocation}
+    unknown = sorted(targets.keys() - set(assets))
+    if unknown:
+        message = f"Unknown assets: {', '.join(unknown)}. Available: {', '.join(assets)}."
+        raise ValueError(message)
+    return [targets.get(name, 0.0) for name in assets]
 
 
 def clamp(value: float, low: float, high: float) -> float:
@@ -10,10 +201,16 @@ def clamp(value: float, low: float, high: float) -> float:
 
 def simulate_one_start_year(
     req: SimulationInput,
-    series: dict[int, tuple[float, float]],
+    series: HistoricalSeries,
     start_year: int,
 ) -> SimulationRun:
     """Simulate a single rolling start year and return its results."""
+    offset = series.offset(start_year)
+    window = slice(offset, offset + req.retirement_years)
+    growth: list[list[float]] = series.growth[:, window].T.tolist()
+    target = asset_weights(req, series.assets)
+    band = req.rebalance_band if req.rebalancing == "threshold" else math.inf
+    weights = target
     portfolio = req.portfolio_start
     withdrawal_rate = clamp(
         req.withdrawal_rate_start, req.withdrawal_rate_min, req.withdrawal_rate_max
@@ -26,14 +223,19 @@ def simulate_one_start_year(
 
     for year_idx in range(req.retirement_years):
         year = start_year + year_idx
-        stock_return, bond_return = series[year]
-
-        stock_value = portfolio * req.stock_allocation
-        bond_value = portfolio * req.bond_allocation
+        drift = max(abs(weight - goal) for weight, goal in zip(weights, target, strict=True))
+        if req.rebalancing == "annual" or portfolio <= 0 or drift > band:
+            weights = target
 
-        stock_value *= 1 + stock_return
-        bond_value *= 1 + bond_return
-        portfolio = stock_value + bond_value
+        values = [
+            portfolio * weight * factor
+            for weight, factor in zip(weights, growth[year_idx], strict=True)
+        ]
+        portfolio = values[0]
+        for value in values[1:]:
+            portfolio += value
+        if portfolio > 0:
+            weights = [value / portfolio for value in values]
         if portfolio > 0 and req.management_fee > 0:
             fee_amount = portfolio * req.management_fee
             portfolio -= fee_amount
@@ -78,3 +280,268 @@ def simulate_one_start_year(
         "yearly_fees": yearly_fees,
         "highlight": start_year == req.start_year,
     }
+
+
+def simulate_paths(
+    params: PathParameters,
+    growth: FloatArray,
+    start_years: IntArray,
+    *,
+    record: bool = True,
+) -> PathResult:
+    """Step every path at once through a growth matrix of shape (assets, ..., periods).
+
+    ``growth`` holds ``1 + return`` for each asset, path and period. Its middle axes
+    broadcast against ``params`` and ``start_years`` to form the path axes. Weights stay
+    at their targets when every path rebalances annually on an annual series; otherwise
+    they drift with the holdings and are reset by ``rebalance``. The arithmetic mirrors
+    ``simulate_one_start_year`` operation for operation so the two engines produce
+    bit-identical annual results. With ``record`` off only per-path totals are kept, so
+    memory stays proportional to the path count.
+
+    When ``params.periods_per_year`` is above one, ``start_years`` holds absolute start
+    periods and each step is one period: fees are charged, withdrawals paid and Social
+    Security received at the annual rate divided by the period count, while the
+    inflation raise and the guardrail adjustment happen once a year, on each retirement
+    anniversary. Recorded matrices stay per year: balances at each anniversary,
+    withdrawals and fees summed over the year.
+    """
+    periods_per_year = params.periods_per_year
+    growth = np.moveaxis(growth, 0, -2)
+    steps = growth.shape[-1]
+    horizon = steps // periods_per_year
+    shape = np.broadcast_shapes(growth.shape[:-2], params.shape, start_years.shape)
+    weights = np.broadcast_to(params.weights, (*shape, params.weights.shape[-1]))
+    drifts = periods_per_year > 1 or not np.all(params.rebalance_annual)
+    rate_min = params.withdrawal_rate_min
+    rate_max = params.withdrawal_rate_max
+    period_fee = params.management_fee / periods_per_year
+
+    portfolio = np.broadcast_to(params.portfolio_start, shape).astype(np.float64)
+    withdrawal_amount = portfolio * np.maximum(
+        rate_min, np.minimum(params.withdrawal_rate_start, rate_max)
+    )
+    failed = portfolio <= 0
+    total_withdrawals = np.zeros(shape, dtype=np.float64)
+    total_fees = np.zeros(shape, dtype=np.float64)
+    current_rate = np.zeros(shape, dtype=np.float64)
+    year_withdrawals = np.zeros(shape, dtype=np.float64)
+    year_fees = np.zeros(shape, dtype=np.float64)
+    balances = withdrawals = fees = None
+    if record:
+        balances = np.empty((*shape, horizon + 1), dtype=np.float64)
+        withdrawals = np.empty((*shape, horizon), dtype=np.float64)
+        fees = np.empty((*shape, horizon), dtype=np.float64)
+        balances[..., 0] = portfolio
+
+    for step in range(steps):
+        year_idx, period = divmod(step, periods_per_year)
+        if drifts:
+            weights = rebalance(params, weights, portfolio, anniversary=period == 0)
+        holdings, portfolio = grow(portfolio, weights, growth[..., step])
+        if drifts:
+            weights = np.divide(
+                holdings,
+                portfolio[..., None],
+                out=np.array(weights),
+                where=(portfolio > 0)[..., None],
+            )
+        fee_amount = np.where(portfolio > 0, portfolio * period_fee, 0.0)
+        portfolio = portfolio - fee_amount
+
+        if period == 0:
+            if year_idx > 0:
+                withdrawal_amount = withdrawal_amount * (1 + params.inflation_rate)
+            withdrawal_amount = apply_guardrails(params, withdrawal_amount, portfolio, current_rate)
+        payment = withdrawal_amount / periods_per_year
+
+        ss_annual = social_security(params, (start_years + step) // periods_per_year, shape)
+        portfolio = portfolio - payment + ss_annual / periods_per_year
+        failed |= portfolio <= 0
+        total_withdrawals += payment
+        total_fees += fee_amount
+        if balances is not None and withdrawals is not None and fees is not None:
+            year_withdrawals = payment if period == 0 else year_withdrawals + payment
+            year_fees = fee_amount if period == 0 else year_fees + fee_amount
+            if period == periods_per_year - 1:
+                balances[..., year_idx + 1] = portfolio
+                withdrawals[..., year_idx] = year_withdrawals
+                fees[..., year_idx] = year_fees
+
+    return PathResult(
+        start_years=np.broadcast_to(start_years, shape),
+        success=~failed,
+        ending_balances=portfolio,
+        total_withdrawals=total_withdrawals,
+        total_fees=total_fees,
+        balances=balances,
+        withdrawals=withdrawals,
+        fees=fees,
+        periods_per_year=periods_per_year,
+    )
+
+
+def rebalance(
+    params: PathParameters,
+    weights: FloatArray,
+    portfolio: FloatArray,
+    *,
+    anniversary: bool,
+) -> FloatArray:
+    """Reset drifted weights to their targets where the rebalancing policy calls for it.
+
+    Paths reset when any weight is further than their band from its target, on each
+    anniversary under the ``annual`` policy, and while depleted, so a path funded again
+    by Social Security restarts at its targets.
+    """
+    reset = np.abs(weights - params.weights).max(axis=-1) > params.rebalance_band
+    if anniversary:
+        reset |= params.rebalance_annual
+    return np.where((reset | (portfolio <= 0))[..., None], params.weights, weights)
+
+
+def grow(
+    portfolio: FloatArray,
+    weights: FloatArray,
+    growth: FloatArray,
+) -> tuple[FloatArray, FloatArray]:
+    """Grow each asset's holding for one period and return the holdings and their total.
+
+    Holdings are summed in asset order, as the scalar engine does, rather than with a
+    pairwise reduction.
+    """
+    holdings = portfolio[..., None] * weights * growth
+    total = holdings[..., 0]
+    for asset in range(1, holdings.shape[-1]):
+        total = total + holdings[..., asset]
+    return holdings, total
+
+
+def apply_guardrails(
+    params: PathParameters,
+    withdrawal_amount: FloatArray,
+    portfolio: FloatArray,
+    current_rate: FloatArray,
+) -> FloatArray:
+    """Move each annual withdrawal toward the guardrail band around its current rate.
+
+    ``current_rate`` is scratch space for the withdrawal rate of paths that are still
+    funded; depleted paths keep their withdrawal.
+    """
+    positive = portfolio > 0
+    np.divide(withdrawal_amount, portfolio, out=current_rate, where=positive)
+    target_rate = np.maximum(
+        params.withdrawal_rate_min, np.minimum(current_rate, params.withdrawal_rate_max)
+    )
+    delta = portfolio * target_rate - withdrawal_amount
+    smoothing = np.where(
+        delta >= 0, params.withdrawal_smoothing_up, params.withdrawal_smoothing_down
+    )
+    return np.where(positive, withdrawal_amount + smoothing * delta, withdrawal_amount)
+
+
+def social_security(
+    params: PathParameters,
+    years: IntArray,
+    shape: tuple[int, ...],
+) -> FloatArray:
+    """Return the annual Social Security income every path receives in ``years``."""
+    ss_annual = np.zeros(shape, dtype=np.float64)
+    for recipient in range(params.ss_start_years.shape[-1]):
+        ss_annual += np.where(
+            years >= params.ss_start_years[..., recipient],
+            params.ss_annual_amounts[..., recipient],
+            0.0,
+        )
+    return ss_annual
+
+
+def simulate_start_years(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    start_years: range,
+) -> PathResult:
+    """Simulate every rolling start year (or period) at once with the vectorized engine."""
+    steps = req.retirement_years * series.periods_per_year
+    first = series.offset(start_years[0])
+    series.offset(start_years[-1] + steps - 1)  # the last window must fit
+    windows = series.growth_windows(req.retirement_years)[:, first : first + len(start_years)]
+    return simulate_paths(
+        PathParameters.from_inputs(
+            [req], shape=(), periods_per_year=series.periods_per_year, assets=series.assets
+        ),
+        windows,
+        np.arange(start_years[0], start_years[-1] + 1, dtype=np.int64),
+    )
+
+
+def simulate_scenarios(
+    inputs: Sequence[SimulationInput],
+    series: HistoricalSeries,
+    *,
+    record: bool = False,
+) -> PathResult:
+    """Simulate every rolling start year of many same-horizon inputs in one pass.
+
+    Results have shape (inputs, start years) and carry per-path totals only unless
+    ``record`` is set.
+    """
+    horizons = {req.retirement_years for req in inputs}
+    if len(horizons) != 1:
+        message = "Batched scenarios must share one retirement horizon."
+        raise ValueError(message)
+    horizon = horizons.pop()
+    windows = series.growth_windows(horizon)
+    start_years = np.arange(series.min_year, series.min_year + windows.shape[1], dtype=np.int64)
+    return simulate_paths(
+        PathParameters.from_inputs(
+            inputs, periods_per_year=series.periods_per_year, assets=series.assets
+        ),
+        windows,
+        start_years,
+        record=record,
+    )
+
+
+def simulate_rolling(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    start_years: range,
+    engine: Engine = "vectorized",
+) -> PathResult:
+    """Run the requested engine over the rolling start years (or months)."""
+    _check_resolution(series, engine)
+    if not start_years:
+        return PathResult.from_runs([])
+    if engine == "scalar":
+        return PathResult.from_runs(
+            [simulate_one_start_year(req, series, start_year) for start_year in start_years]
+        )
+    return simulate_start_years(req, series, start_years)
+
+
+def iter_rolling(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    start_years: range,
+    engine: Engine = "vectorized",
+) -> Iterator[SimulationRun]:
+    """Yield rolling start-year runs one at a time.
+
+    The scalar engine computes each run only when it is requested; the vectorized and
+    monthly engines simulate every path at once and convert one row at a time.
+    """
+    _check_resolution(series, engine)
+    if engine == "scalar":
+        for start_year in start_years:
+            yield simulate_one_start_year(req, series, start_year)
+    elif start_years:
+        yield from simulate_start_years(req, series, start_years).iter_runs(req.start_year)
+
+
+def _check_resolution(series: HistoricalSeries, engine: Engine) -> None:
+    """Reject a series whose resolution does not match the engine."""
+    if (engine == "monthly") != (series.periods_per_year == MONTHS_PER_YEAR):
+        resolution = "a monthly" if engine == "monthly" else "an annual"
+        message = f"The {engine} engine needs {resolution} series."
+        raise ValueError(message)
@@ -0,0 +1,126 @@
+"""Mergeable streaming quantile sketch for very large path counts."""
+
+import math
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+FloatArray = npt.NDArray[np.float64]
+SketchSeed = int | np.random.SeedSequence | np.random.Generator | None
+
+DEFAULT_K = 200
+CAPACITY_DECAY = 2 / 3
+MIN_CAPACITY = 2
+ERROR_SCALE = 2.446
+ERROR_EXPONENT = 0.9433
+
+
+def rank_error_bound(k: int) -> float:
+    """Return the normalized rank error a sketch of size ``k`` stays within.
+
+    This is the empirical 99%-confidence fit for KLL sketches published with Apache
+    DataSketches, ``2.446 / k**0.9433``: about 0.0165 at ``k = 200``.
+    """
+    return ERROR_SCALE / math.pow(k, ERROR_EXPONENT)
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang and Liberty, 2016).
+
+    Values live in a stack of compactors; an item at level ``h`` stands for ``2**h``
+    inputs; ``levels`` holds the compactors from the bottom up. When a level outgrows its
+    capacity it is sorted and every other item (from a random offset) is promoted one
+    level up, so memory stays O(k log(n / k)) for n inputs. Sketches built on different
+    workers merge level by level.
+
+    Error bound: with 99% confidence the true rank of a returned value is within
+    ``rank_error_bound(k) * count`` of the requested rank, about 1.65% of the count at
+    the default ``k = 200``. The error shrinks roughly as ``1 / k`` and does not grow
+    with the count. Minimum and maximum are tracked exactly.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: SketchSeed = 0) -> None:
+        """Create an empty sketch with accuracy parameter ``k``."""
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.levels: list[FloatArray] = [np.zeros(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the bytes held by retained items."""
+        return sum(level.nbytes for level in self.levels)
+
+    def update(self, values: npt.ArrayLike) -> None:
+        """Add a batch of values."""
+        batch = np.asarray(values, dtype=np.float64).ravel()
+        if batch.size == 0:
+            return
+        self.count += int(batch.size)
+        self.min = min(self.min, float(batch.min()))
+        self.max = max(self.max, float(batch.max()))
+        self.levels[0] = np.concatenate([self.levels[0], batch])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold another sketch into this one."""
+        if other.count == 0:
+            return
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0, dtype=np.float64))
+        for height, level in enumerate(other.levels):
+            self.levels[height] = np.concatenate([self.levels[height], level])
+        self._compress()
+
+    def quantiles(self, fractions: Sequence[float]) -> list[float]:
+        """Return approximate values at the given rank fractions in [0, 1]."""
+        if self.count == 0:
+            return [0.0 for _ in fractions]
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(level.size, 2**height, dtype=np.float64)
+                for height, level in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        results = []
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+            elif fraction >= 1:
+                results.append(self.max)
+            else:
+                rank = fraction * cumulative[-1]
+                index = min(int(np.searchsorted(cumulative, rank)), values.size - 1)
+                results.append(float(values[index]))
+        return results
+
+    def _capacity(self, height: int) -> int:
+        """Return the capacity of a level; lower levels shrink geometrically."""
+        depth = len(self.levels) - height - 1
+        return max(MIN_CAPACITY, math.ceil(self.k * CAPACITY_DECAY**depth))
+
+    def _compress(self) -> None:
+        """Compact every level that exceeds its capacity, adding levels as needed."""
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if level.size > self._capacity(height):
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0, dtype=np.float64))
+                level = np.sort(level)
+                keep = level[: level.size % 2]
+                paired = level[level.size % 2 :]
+                promoted = paired[int(self._rng.integers(2)) :: 2]
+                self.levels[height] = keep
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+            height += 1
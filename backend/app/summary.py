@@ -1,8 +1,21 @@
 """Summary statistics and quantile index selection."""
 
-from .models import SimulationRun, Summary
+from collections.abc import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from .models import PercentileBands, SimulationRun, Summary
+from .simulate import IntArray, PathResult
+from .sketch import KLLSketch, SketchSeed, rank_error_bound
 
 PERCENT_MAX = 100.0
+ENDING_BALANCE_PERCENTILES = (10, 50, 90)
+QUANTILE_PERCENTILES = (0, 25, 50, 75, 100)
+QUANTILE_RANKS = (0, 0.25, 0.5, 0.75, 1.0)
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+
+FloatArray = npt.NDArray[np.float64]
 
 
 def percentile(values: list[float], p: float) -> float:
@@ -24,78 +37,357 @@ def percentile(values: list[float], p: float) -> float:
     return d0 + d1
 
 
+def sorted_percentiles(sorted_values: FloatArray, points: Sequence[float]) -> FloatArray:
+    """Interpolate percentiles from values already sorted along the last axis.
+
+    Matches ``percentile`` for every leading index at once and returns an array with the
+    percentiles on a trailing axis.
+    """
+    count = sorted_values.shape[-1]
+    if count == 0:
+        return np.zeros((*sorted_values.shape[:-1], len(points)), dtype=np.float64)
+    columns = []
+    for p in points:
+        if p <= 0:
+            columns.append(sorted_values[..., 0])
+            continue
+        if p >= PERCENT_MAX:
+            columns.append(sorted_values[..., -1])
+            continue
+        k = (count - 1) * (p / 100.0)
+        f = int(k)
+        c = min(f + 1, count - 1)
+        if f == c:
+            columns.append(sorted_values[..., f])
+            continue
+        columns.append(sorted_values[..., f] * (c - k) + sorted_values[..., c] * (k - f))
+    return np.stack(columns, axis=-1)
+
+
 def summarize_results(results: list[SimulationRun]) -> Summary:
     """Compute aggregate statistics for a set of simulations."""
     if not results:
-        return Summary(
-            total_runs=0,
-            success_count=0,
-            failure_count=0,
-            success_rate=0.0,
-            ending_balance_percentiles={},
-            portfolio_quantiles={},
-            spending_quantiles={},
-            fee_quantiles={},
-        )
+        return _empty_summary()
+    ending_balances, total_withdrawals, total_fees = _run_totals(results)
     successes = sum(1 for item in results if item["success"])
-    ending_balances = [item["ending_balance"] for item in results]
-    total_spend_per_run = [sum(item.get("yearly_withdrawals", [])) for item in results]
-    total_fees_per_run = [sum(item.get("yearly_fees", [])) for item in results]
-    total_runs = len(results)
+    return summarize_totals(successes, ending_balances, total_withdrawals, total_fees)
+
+
+def summarize_totals(
+    success_count: int,
+    ending_balances: FloatArray,
+    total_withdrawals: FloatArray,
+    total_fees: FloatArray,
+) -> Summary:
+    """Compute aggregate statistics from per-path totals, sorting each metric once."""
+    return _summarize_sorted(
+        success_count,
+        np.sort(ending_balances),
+        np.sort(total_withdrawals),
+        np.sort(total_fees),
+    )
+
+
+def summarize_and_rank(
+    success_count: int,
+    ending_balances: FloatArray,
+    total_withdrawals: FloatArray,
+    total_fees: FloatArray,
+) -> tuple[Summary, list[int]]:
+    """Compute the summary and quantile run indices from one ordering per metric.
+
+    The stable argsort used to pick quantile runs also yields the sorted values the
+    percentiles interpolate over, so balances and withdrawals are ordered only once.
+    """
+    balance_order = np.argsort(ending_balances, kind="stable")
+    withdrawal_order = np.argsort(total_withdrawals, kind="stable")
+    summary = _summarize_sorted(
+        success_count,
+        ending_balances[balance_order],
+        total_withdrawals[withdrawal_order],
+        np.sort(total_fees),
+    )
+    return summary, _rank_indices(balance_order, withdrawal_order)
+
+
+def _summarize_sorted(
+    success_count: int,
+    balances: FloatArray,
+    withdrawals: FloatArray,
+    fees: FloatArray,
+) -> Summary:
+    """Build a summary from metrics that are already sorted ascending."""
+    total_runs = int(balances.size)
+    if total_runs == 0:
+        return _empty_summary()
+    balance_points = sorted_percentiles(balances, ENDING_BALANCE_PERCENTILES).tolist()
+    balance_quantiles = sorted_percentiles(balances, QUANTILE_PERCENTILES).tolist()
+    spending_quantiles = sorted_percentiles(withdrawals, QUANTILE_PERCENTILES).tolist()
+    fee_quantiles = sorted_percentiles(fees, QUANTILE_PERCENTILES).tolist()
+    return _build_summary(
+        total_runs,
+        success_count,
+        balance_points,
+        (balance_quantiles, spending_quantiles, fee_quantiles),
+    )
+
+
+def _build_summary(
+    total_runs: int,
+    success_count: int,
+    balance_points: list[float],
+    quantiles: tuple[list[float], list[float], list[float]],
+) -> Summary:
+    """Assemble a summary from percentile values in the standard point order.
+
+    ``quantiles`` holds the portfolio, spending and fee quantiles in that order.
+    """
+    balance_quantiles, spending_quantiles, fee_quantiles = quantiles
     return Summary(
         total_runs=total_runs,
-        success_count=successes,
-        failure_count=total_runs - successes,
-        success_rate=successes / total_runs,
-        ending_balance_percentiles={
-            "p10": percentile(ending_balances, 10),
-            "p50": percentile(ending_balances, 50),
-            "p90": percentile(ending_balances, 90),
-        },
-        portfolio_quantiles={
-            "p0": percentile(ending_balances, 0),
-            "p25": percentile(ending_balances, 25),
-            "p50": percentile(ending_balances, 50),
-            "p75": percentile(ending_balances, 75),
-            "p100": percentile(ending_balances, 100),
-        },
-        spending_quantiles={
-            "p0": percentile(total_spend_per_run, 0),
-            "p25": percentile(total_spend_per_run, 25),
-            "p50": percentile(total_spend_per_run, 50),
-            "p75": percentile(total_spend_per_run, 75),
-            "p100": percentile(total_spend_per_run, 100),
-        },
-        fee_quantiles={
-            "p0": percentile(total_fees_per_run, 0),
-            "p25": percentile(total_fees_per_run, 25),
-            "p50": percentile(total_fees_per_run, 50),
-            "p75": percentile(total_fees_per_run, 75),
-            "p100": percentile(total_fees_per_run, 100),
-        },
+        success_count=success_count,
+        failure_count=total_runs - success_count,
+        success_rate=success_count / total_runs,
+        ending_balance_percentiles=_label(ENDING_BALANCE_PERCENTILES, balance_points),
+        portfolio_quantiles=_label(QUANTILE_PERCENTILES, balance_quantiles),
+        spending_quantiles=_label(QUANTILE_PERCENTILES, spending_quantiles),
+        fee_quantiles=_label(QUANTILE_PERCENTILES, fee_quantiles),
     )
 
 
-def compute_quantile_indices(results: list[SimulationRun]) -> list[int]:
-    """Compute indices for portfolio and withdrawl quantile runs."""
-    if not results:
-        return []
+def percentile_bands(
+    balances: FloatArray,
+    withdrawals: FloatArray,
+    fees: FloatArray,
+) -> PercentileBands:
+    """Compute per-year percentile bands from (runs x years) matrices."""
+    return PercentileBands(
+        balances=yearly_percentiles(balances),
+        withdrawals=yearly_percentiles(withdrawals),
+        fees=yearly_percentiles(fees),
+    )
 
-    def total_withdrawals(item: SimulationRun) -> float:
-        return sum(item["yearly_withdrawals"])
 
-    def rank_indices(values: list[tuple[int, float]]) -> list[int]:
-        values = sorted(values, key=lambda item: (item[1], item[0]))
-        last = len(values) - 1
-        quantiles = [0, 0.25, 0.5, 0.75, 1.0]
-        indices = []
-        for q in quantiles:
-            rank = round(q * last)
-            indices.append(values[rank][0])
-        return indices
+def yearly_percentiles(
+    matrix: FloatArray,
+    points: Sequence[int] = BAND_PERCENTILES,
+) -> dict[str, list[float]]:
+    """Interpolate percentiles of every year column of a (runs x years) matrix.
+
+    All years are sorted across runs in one pass, so the cost does not depend on how
+    the runs are later drawn.
+    """
+    values = sorted_percentiles(np.sort(matrix.T, axis=-1), points)
+    return {f"p{p}": column.tolist() for p, column in zip(points, values.T, strict=True)}
+
+
+def _empty_summary() -> Summary:
+    """Return the summary of zero runs."""
+    return Summary(
+        total_runs=0,
+        success_count=0,
+        failure_count=0,
+        success_rate=0.0,
+        ending_balance_percentiles={},
+        portfolio_quantiles={},
+        spending_quantiles={},
+        fee_quantiles={},
+    )
+
+
+def _run_totals(results: list[SimulationRun]) -> tuple[FloatArray, FloatArray, FloatArray]:
+    """Collect ending balances and total withdrawals and fees per run."""
+    return (
+        np.array([item["ending_balance"] for item in results], dtype=np.float64),
+        np.array([sum(item.get("yearly_withdrawals", [])) for item in results], dtype=np.float64),
+        np.array([sum(item.get("yearly_fees", [])) for item in results], dtype=np.float64),
+    )
 
-    portfolio = [(idx, item["ending_balance"]) for idx, item in enumerate(results)]
-    withdrawl = [(idx, total_withdrawals(item)) for idx, item in enumerate(results)]
 
-    combined = rank_indices(portfolio) + rank_indices(withdrawl)
-    return sorted(set(combined))
+def _label(points: Sequence[int], values: list[float]) -> dict[str, float]:
+    """Key percentile values by their ``pNN`` labels."""
+    return {f"p{p}": value for p, value in zip(points, values, strict=True)}
+
+
+class SummaryAccumulator:
+    """Collect per-path totals incrementally and summarize them at the end.
+
+    Paths arrive either as chunks of simulated paths or as single runs. By default only
+    four scalars per path are retained, never the per-year matrices, and the summary is
+    exact. With ``sketch_k`` set, each metric instead feeds a ``KLLSketch``: memory stays
+    bounded however many paths arrive, percentiles carry the sketch's rank error, and
+    quantile run indices are unavailable. Accumulators of either kind merge, so workers
+    can summarize their own chunks and the parent folds the results together.
+    """
+
+    def __init__(self, sketch_k: int | None = None, sketch_seed: SketchSeed = 0) -> None:
+        """Create an empty accumulator, sketching metrics when ``sketch_k`` is given."""
+        self.success_count = 0
+        self._chunks: list[tuple[FloatArray, FloatArray, FloatArray]] = []
+        self._ending_balances: list[float] = []
+        self._total_withdrawals: list[float] = []
+        self._total_fees: list[float] = []
+        self._sketches: tuple[KLLSketch, KLLSketch, KLLSketch] | None = None
+        if sketch_k is not None:
+            rngs = np.random.default_rng(sketch_seed).spawn(3)
+            self._sketches = (
+                KLLSketch(sketch_k, rngs[0]),
+                KLLSketch(sketch_k, rngs[1]),
+                KLLSketch(sketch_k, rngs[2]),
+            )
+
+    @property
+    def sketches(self) -> tuple[KLLSketch, KLLSketch, KLLSketch] | None:
+        """Return the ending balance, withdrawal and fee sketches, or None when exact."""
+        self._flush()
+        return self._sketches
+
+    @property
+    def rank_error(self) -> float:
+        """Return the normalized rank error of the percentiles; zero when exact."""
+        if self._sketches is None:
+            return 0.0
+        return rank_error_bound(self._sketches[0].k)
+
+    def add(self, paths: PathResult) -> None:
+        """Fold a chunk of simulated paths into the aggregates."""
+        self.success_count += int(np.count_nonzero(paths.success))
+        self._add_totals(
+            paths.ending_balances.ravel(),
+            paths.total_withdrawals.ravel(),
+            paths.total_fees.ravel(),
+        )
+
+    def add_run(self, run: SimulationRun) -> None:
+        """Fold a single simulation run into the aggregates."""
+        self.success_count += int(run["success"])
+        self._ending_balances.append(run["ending_balance"])
+        self._total_withdrawals.append(sum(run["yearly_withdrawals"]))
+        self._total_fees.append(sum(run["yearly_fees"]))
+
+    def merge(self, other: "SummaryAccumulator") -> None:
+        """Fold another accumulator in, keeping this one's paths first."""
+        other_sketches = other.sketches
+        if other_sketches is None:
+            self._add_totals(*other.totals())
+        elif self._sketches is None:
+            message = "Cannot merge a sketched summary into an exact one."
+            raise ValueError(message)
+        else:
+            self._flush()
+            for mine, theirs in zip(self._sketches, other_sketches, strict=True):
+                mine.merge(theirs)
+        self.success_count += other.success_count
+
+    def summary(self) -> Summary:
+        """Summarize every path added so far."""
+        if self._sketches is not None:
+            return self._sketch_summary(self._sketches)
+        ending_balances, total_withdrawals, total_fees = self.totals()
+        return summarize_totals(self.success_count, ending_balances, total_withdrawals, total_fees)
+
+    def quantile_indices(self) -> list[int]:
+        """Return quantile run indices in the order paths were added."""
+        ending_balances, total_withdrawals, _ = self.totals()
+        return quantile_indices_from_totals(ending_balances, total_withdrawals)
+
+    def summary_and_indices(self) -> tuple[Summary, list[int]]:
+        """Return the summary and quantile run indices, ordering each metric once."""
+        ending_balances, total_withdrawals, total_fees = self.totals()
+        return summarize_and_rank(
+            self.success_count, ending_balances, total_withdrawals, total_fees
+        )
+
+    def _add_totals(
+        self,
+        ending_balances: FloatArray,
+        total_withdrawals: FloatArray,
+        total_fees: FloatArray,
+    ) -> None:
+        """Append per-path totals to the retained chunks or the sketches."""
+        self._flush()
+        if self._sketches is None:
+            self._chunks.append((ending_balances, total_withdrawals, total_fees))
+            return
+        for sketch, values in zip(
+            self._sketches, (ending_balances, total_withdrawals, total_fees), strict=True
+        ):
+            sketch.update(values)
+
+    def _sketch_summary(self, sketches: tuple[KLLSketch, KLLSketch, KLLSketch]) -> Summary:
+        """Build an approximate summary from the metric sketches."""
+        self._flush()
+        balances, withdrawals, fees = sketches
+        if balances.count == 0:
+            return _empty_summary()
+        fractions = [p / PERCENT_MAX for p in QUANTILE_PERCENTILES]
+        return _build_summary(
+            balances.count,
+            self.success_count,
+            balances.quantiles([p / PERCENT_MAX for p in ENDING_BALANCE_PERCENTILES]),
+            (
+                balances.quantiles(fractions),
+                withdrawals.quantiles(fractions),
+                fees.quantiles(fractions),
+            ),
+        )
+
+    def _flush(self) -> None:
+        """Move single-run values into a chunk so insertion order is preserved."""
+        if self._ending_balances:
+            pending = (
+                np.array(self._ending_balances, dtype=np.float64),
+                np.array(self._total_withdrawals, dtype=np.float64),
+                np.array(self._total_fees, dtype=np.float64),
+            )
+            self._ending_balances = []
+            self._total_withdrawals = []
+            self._total_fees = []
+            self._add_totals(*pending)
+
+    def totals(self) -> tuple[FloatArray, FloatArray, FloatArray]:
+        """Concatenate every retained per-path total into one array per metric."""
+        if self._sketches is not None:
+            message = "Per-path totals are not retained by a sketched summary."
+            raise ValueError(message)
+        self._flush()
+        empty = np.zeros(0, dtype=np.float64)
+        ending, withdrawals, fees = (
+            zip(*self._chunks, strict=True) if self._chunks else ((), (), ())
+        )
+        return (
+            np.concatenate([empty, *ending]),
+            np.concatenate([empty, *withdrawals]),
+            np.concatenate([empty, *fees]),
+        )
+
+
+def quantile_indices_from_totals(
+    ending_balances: FloatArray,
+    total_withdrawals: FloatArray,
+) -> list[int]:
+    """Compute portfolio and withdrawal quantile run indices from per-run totals.
+
+    Ties rank by run index and ranks are rounded to the nearest run.
+    """
+    return _rank_indices(
+        np.argsort(ending_balances, kind="stable"),
+        np.argsort(total_withdrawals, kind="stable"),
+    )
+
+
+def _rank_indices(*orders: IntArray) -> list[int]:
+    """Pick the runs at each quantile rank of every ordering, deduplicated and sorted."""
+    if not orders or orders[0].size == 0:
+        return []
+    last = orders[0].size - 1
+    combined: set[int] = set()
+    for order in orders:
+        combined.update(int(order[round(q * last)]) for q in QUANTILE_RANKS)
+    return sorted(combined)
+
+
+def compute_quantile_indices(results: list[SimulationRun]) -> list[int]:
+    """Compute indices for portfolio and withdrawl quantile runs."""
+    ending_balances, total_withdrawals, _ = _run_totals(results)
+    return quantile_indices_from_totals(ending_balances, total_withdrawals)
@@ -0,0 +1,116 @@
+"""Parameter sweeps that report success-rate surfaces over input grids."""
+
+import itertools
+from collections.abc import Callable
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import SimulationInput, SweepAxis, SweepPoint, SweepRequest, SweepResponse
+from .simulate import simulate_scenarios
+from .summary import sorted_percentiles
+
+SWEEP_PERCENTILES = (10, 50, 90)
+CHUNK_POINTS = 256
+
+
+def axis_values(axis: SweepAxis) -> list[float]:
+    """Return the evenly spaced values of a sweep axis."""
+    values: list[float] = np.linspace(axis.start, axis.stop, axis.steps).tolist()
+    return values
+
+
+def sweep_inputs(request: SweepRequest) -> list[SimulationInput]:
+    """Expand a sweep request into one simulation input per grid point.
+
+    Both ends of every axis are validated against the input model, so every value in
+    between is in range too. Sweeping the stock allocation moves the bond allocation
+    with it unless bonds are swept as well.
+    """
+    swept = {axis.field for axis in request.axes}
+    base = request.base.model_dump()
+    for axis in request.axes:
+        for value in (axis.start, axis.stop):
+            SimulationInput.model_validate({**base, axis.field: value})
+
+    inputs = []
+    for values in itertools.product(*(axis_values(axis) for axis in request.axes)):
+        update: dict[str, float] = {}
+        for axis, value in zip(request.axes, values, strict=True):
+            update[axis.field] = value
+            if axis.field == "stock_allocation" and "bond_allocation" not in swept:
+                update["bond_allocation"] = 1 - value
+        inputs.append(request.base.model_copy(update=update))
+    return inputs
+
+
+def sweep_chunks(inputs: list[SimulationInput]) -> list[range]:
+    """Split grid point indices into the chunks simulated in one batched pass each."""
+    return [
+        range(start, min(start + CHUNK_POINTS, len(inputs)))
+        for start in range(0, len(inputs), CHUNK_POINTS)
+    ]
+
+
+def run_sweep(
+    request: SweepRequest,
+    inputs: list[SimulationInput],
+    series: HistoricalSeries,
+    on_progress: Callable[[SweepResponse], None] | None = None,
+) -> SweepResponse:
+    """Simulate the grid in batched passes of up to ``CHUNK_POINTS`` and summarize each point.
+
+    ``on_progress`` receives the points finished so far after every pass; an exception it
+    raises abandons the remaining passes.
+    """
+    grid = list(itertools.product(*(axis_values(axis) for axis in request.axes)))
+    points: list[SweepPoint] = []
+    for chunk in sweep_chunks(inputs):
+        points.extend(
+            sweep_points(
+                request, grid[chunk.start : chunk.stop], inputs[chunk.start : chunk.stop], series
+            )
+        )
+        if on_progress is not None:
+            on_progress(sweep_response(request, series, points))
+    return sweep_response(request, series, points)
+
+
+def sweep_points(
+    request: SweepRequest,
+    grid: list[tuple[float, ...]],
+    inputs: list[SimulationInput],
+    series: HistoricalSeries,
+) -> list[SweepPoint]:
+    """Simulate grid points in one batched pass and summarize each of them."""
+    paths = simulate_scenarios(inputs, series)
+    total_runs = paths.success.shape[-1]
+    success_counts = paths.success.sum(axis=-1).tolist()
+    percentiles = sorted_percentiles(
+        np.sort(paths.ending_balances, axis=-1), SWEEP_PERCENTILES
+    ).tolist()
+    return [
+        SweepPoint(
+            values={axis.field: value for axis, value in zip(request.axes, values, strict=True)},
+            total_runs=total_runs,
+            success_count=success_count,
+            success_rate=success_count / total_runs if total_runs else 0.0,
+            ending_balance_percentiles={
+                f"p{p}": value for p, value in zip(SWEEP_PERCENTILES, row, strict=True)
+            },
+        )
+        for values, success_count, row in zip(grid, success_counts, percentiles, strict=True)
+    ]
+
+
+def sweep_response(
+    request: SweepRequest,
+    series: HistoricalSeries,
+    points: list[SweepPoint],
+) -> SweepResponse:
+    """Build the response envelope for the points summarized so far."""
+    return SweepResponse(
+        series=series.bounds,
+        axes={axis.field: axis_values(axis) for axis in request.axes},
+        points=points,
+    )
@@ -0,0 +1,76 @@
+"""Maximum sustainable withdrawal rate solver."""
+
+import dataclasses
+import math
+
+import numpy as np
+
+from .data import HistoricalSeries
+from .models import SafeWithdrawalRequest, SafeWithdrawalResponse, StartYearRate
+from .simulate import BoolArray, FloatArray, PathParameters, simulate_paths
+
+
+def solve_start_year_rates(
+    request: SafeWithdrawalRequest,
+    series: HistoricalSeries,
+) -> tuple[FloatArray, int]:
+    """Bisect the highest surviving starting withdrawal rate for every start year.
+
+    All start years are searched in lockstep: each iteration is one kernel call with a
+    different candidate rate per path. The guardrail band is widened to contain each
+    candidate so the candidate is the rate actually withdrawn in the first year. Success
+    is assumed to be monotone in the starting rate. Returns the rates and iteration count.
+    """
+    base = request.base
+    windows = series.growth_windows(base.retirement_years)
+    start_years = np.arange(series.min_year, series.min_year + windows.shape[1], dtype=np.int64)
+    params = PathParameters.from_inputs([base], shape=(), assets=series.assets)
+
+    def survives(rates: FloatArray) -> BoolArray:
+        candidate = dataclasses.replace(
+            params,
+            withdrawal_rate_start=rates,
+            withdrawal_rate_min=np.minimum(params.withdrawal_rate_min, rates),
+            withdrawal_rate_max=np.maximum(params.withdrawal_rate_max, rates),
+        )
+        result = simulate_paths(candidate, windows, start_years, record=False)
+        return result.success
+
+    low = np.zeros(start_years.shape, dtype=np.float64)
+    high = np.full(start_years.shape, request.max_rate, dtype=np.float64)
+    low = np.where(survives(high), high, low)
+    iterations = 1
+    while np.any(high - low > request.tolerance):
+        middle = (low + high) / 2
+        ok = survives(middle)
+        low = np.where(ok, middle, low)
+        high = np.where(ok, high, middle)
+        iterations += 1
+    return low, iterations
+
+
+def cohort_rate(rates: FloatArray, target_success_rate: float) -> float:
+    """Return the highest rate that at least the target share of start years survive."""
+    if rates.size == 0:
+        return 0.0
+    descending = np.sort(rates)[::-1]
+    needed = max(1, math.ceil(round(target_success_rate * rates.size, 9)))
+    return float(descending[needed - 1])
+
+
+def solve_safe_withdrawal(
+    request: SafeWithdrawalRequest,
+    series: HistoricalSeries,
+) -> SafeWithdrawalResponse:
+    """Solve per-start-year and cohort-level maximum withdrawal rates."""
+    rates, iterations = solve_start_year_rates(request, series)
+    return SafeWithdrawalResponse(
+        series=series.bounds,
+        target_success_rate=request.target_success_rate,
+        cohort_withdrawal_rate=cohort_rate(rates, request.target_success_rate),
+        iterations=iterations,
+        start_years=[
+            StartYearRate(start_year=series.min_year + offset, max_withdrawal_rate=rate)
+            for offset, rate in enumerate(rates.tolist())
+        ],
+    )
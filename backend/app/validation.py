@@ -0,0 +1,31 @@
+"""Checks that simulation inputs can be run against a loaded series."""
+
+from .data import HistoricalSeries
+from .models import SimulationInput
+from .simulate import asset_weights
+
+EPSILON = 0.001
+
+
+def check_simulation_input(
+    req: SimulationInput,
+    series: HistoricalSeries,
+    *,
+    check_horizon: bool = True,
+) -> None:
+    """Raise ``ValueError`` for inputs that pass field validation but cannot be simulated.
+
+    Resampled simulations are not bound by the series length, so they skip the horizon
+    check. Allocations must name assets of the series and sum to one.
+    """
+    weights = asset_weights(req, series.assets)
+    if abs(sum(weights) - 1.0) > EPSILON:
+        message = "Allocations must sum to 1.0"
+        raise ValueError(message)
+    if not (req.withdrawal_rate_min <= req.withdrawal_rate_start <= req.withdrawal_rate_max):
+        message = "withdrawal_rate_start must be between min and max"
+        raise ValueError(message)
+    max_horizon = series.max_horizon
+    if check_horizon and req.retirement_years > max_horizon:
+        message = f"Retirement horizon exceeds data. Max years available: {max_horizon}."
+        raise ValueError(message)
@@ -0,0 +1,377 @@
+"""Run scenario files through the simulation engine and write Parquet summaries.
+
+``python -m backend.scripts.batch_run scenarios.csv results/`` reads one
+``SimulationInput`` per row from a CSV or Parquet file, simulates every rolling start
+year of each scenario on a process pool and writes one row per scenario to numbered
+Parquet part files in ``results/``. Nested fields (``ss_recipients``, ``allocations``)
+are JSON strings in CSV files. An optional ``scenario_id`` column names each row;
+otherwise the row number is used.
+
+Each part file holds one row group of at most ``--rows-per-part`` rows and is renamed
+into place only once complete, so an interrupted run leaves whole parts behind.
+``--resume`` skips the scenarios already written and appends new parts.
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic import ValidationError
+
+from backend.app.batch import household_chunks, summarize_households
+from backend.app.data import DATA_PATH, HistoricalSeries, SeriesLoader
+from backend.app.models import HouseholdResult, SimulationInput
+from backend.app.summary import ENDING_BALANCE_PERCENTILES, QUANTILE_PERCENTILES
+from backend.app.validation import check_simulation_input
+
+SCENARIO_ID = "scenario_id"
+JSON_COLUMNS = ("ss_recipients", "allocations")
+PART_GLOB = "part-*.parquet"
+DEFAULT_CHUNK = 256
+DEFAULT_ROWS_PER_PART = 10_000
+SUMMARY_POINTS = (
+    ("ending_balance_percentiles", ENDING_BALANCE_PERCENTILES),
+    ("portfolio_quantiles", QUANTILE_PERCENTILES),
+    ("spending_quantiles", QUANTILE_PERCENTILES),
+    ("fee_quantiles", QUANTILE_PERCENTILES),
+)
+PATH_COLUMNS = ("balances", "withdrawals", "fees")
+
+logger = logging.getLogger(__name__)
+
+_worker_series: dict[str, HistoricalSeries] = {}
+
+
+@dataclass(frozen=True)
+class RunOptions:
+    """Settings of one batch run."""
+
+    series_path: Path = DATA_PATH
+    workers: int = 1
+    chunk_size: int = DEFAULT_CHUNK
+    rows_per_part: int = DEFAULT_ROWS_PER_PART
+    include_paths: bool = False
+    resume: bool = False
+
+
+@dataclass(frozen=True)
+class RunStats:
+    """Counts and wall-clock time of one batch run."""
+
+    simulated: int
+    invalid: int
+    skipped: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        """Return the simulated scenarios per second."""
+        return self.simulated / self.seconds if self.seconds > 0 else 0.0
+
+
+def output_schema(*, include_paths: bool) -> pa.Schema:
+    """Return the Parquet schema of the output rows.
+
+    Summary percentiles are flattened into one column each, e.g.
+    ``portfolio_quantiles_p25``. Invalid scenarios carry an ``error`` and null metrics.
+    """
+    fields = [
+        pa.field(SCENARIO_ID, pa.string()),
+        pa.field("error", pa.string()),
+        pa.field("total_runs", pa.int64()),
+        pa.field("success_count", pa.int64()),
+        pa.field("failure_count", pa.int64()),
+        pa.field("success_rate", pa.float64()),
+    ]
+    fields.extend(
+        pa.field(f"{name}_p{point}", pa.float64())
+        for name, points in SUMMARY_POINTS
+        for point in points
+    )
+    if include_paths:
+        fields.extend(
+            [
+                pa.field("start_years", pa.list_(pa.int64())),
+                pa.field("success", pa.list_(pa.bool_())),
+                pa.field("ending_balances", pa.list_(pa.float64())),
+            ]
+        )
+        fields.extend(pa.field(name, pa.list_(pa.list_(pa.float64()))) for name in PATH_COLUMNS)
+    return pa.schema(fields)
+
+
+def read_records(path: Path, batch_size: int) -> Iterator[dict[str, object]]:
+    """Stream raw scenario rows from a CSV or Parquet file, ``batch_size`` at a time."""
+    if path.suffix == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+    for frame in pd.read_csv(path, chunksize=batch_size, dtype={SCENARIO_ID: str}):
+        yield from frame.to_dict("records")
+
+
+def parse_scenario(record: dict[str, object]) -> SimulationInput:
+    """Validate one raw row, dropping empty cells and decoding JSON columns."""
+    values = {
+        name: value
+        for name, value in record.items()
+        if value is not None and not (isinstance(value, float) and math.isnan(value))
+    }
+    for name in JSON_COLUMNS:
+        if isinstance(values.get(name), str):
+            values[name] = json.loads(str(values[name]))
+    return SimulationInput.model_validate(values)
+
+
+def summary_row(
+    scenario_id: str,
+    result: HouseholdResult | None = None,
+    error: str | None = None,
+) -> dict[str, object]:
+    """Flatten one scenario's summary, and its paths when recorded, into an output row."""
+    row: dict[str, object] = {SCENARIO_ID: scenario_id, "error": error}
+    if result is None:
+        return row
+    summary = result.summary
+    row.update(
+        total_runs=summary.total_runs,
+        success_count=summary.success_count,
+        failure_count=summary.failure_count,
+        success_rate=summary.success_rate,
+    )
+    for name, _ in SUMMARY_POINTS:
+        labelled: dict[str, float] = getattr(summary, name)
+        row.update({f"{name}_{label}": value for label, value in labelled.items()})
+    if result.results is not None:
+        runs = result.results
+        row.update(
+            start_years=[run.start_year for run in runs],
+            success=[run.success for run in runs],
+            ending_balances=[run.ending_balance for run in runs],
+            balances=[run.yearly_balances for run in runs],
+            withdrawals=[run.yearly_withdrawals for run in runs],
+            fees=[run.yearly_fees for run in runs],
+        )
+    return row
+
+
+def load_worker_series(series_path: Path) -> None:
+    """Load the historical series once per worker process."""
+    _worker_series["series"] = SeriesLoader(series_path, series_path.with_suffix(".bin")).load()
+
+
+def simulate_task(
+    scenario_ids: list[str],
+    inputs: list[SimulationInput],
+    *,
+    include_paths: bool,
+) -> list[dict[str, object]]:
+    """Simulate same-horizon scenarios in one pass on this worker's series."""
+    results = summarize_households(inputs, _worker_series["series"], include_runs=include_paths)
+    return [
+        summary_row(scenario_id, result)
+        for scenario_id, result in zip(scenario_ids, results, strict=True)
+    ]
+
+
+class PartWriter:
+    """Buffer output rows and write them as numbered single-row-group Parquet parts."""
+
+    def __init__(self, directory: Path, schema: pa.Schema, rows_per_part: int) -> None:
+        """Write parts into ``directory`` after any parts it already holds."""
+        self.directory = directory
+        self.schema = schema
+        self.rows_per_part = rows_per_part
+        self.written = 0
+        self._rows: list[dict[str, object]] = []
+        self._next_part = len(list(directory.glob(PART_GLOB)))
+
+    def add(self, rows: Iterable[dict[str, object]]) -> None:
+        """Buffer rows, writing a part whenever a full row group is ready."""
+        self._rows.extend(rows)
+        while len(self._rows) >= self.rows_per_part:
+            self._write(self.rows_per_part)
+
+    def close(self) -> None:
+        """Write the remaining rows as a final, shorter part."""
+        if self._rows:
+            self._write(len(self._rows))
+
+    def _write(self, count: int) -> None:
+        """Write the first ``count`` buffered rows and rename the part into place."""
+        table = pa.Table.from_pylist(self._rows[:count], schema=self.schema)
+        del self._rows[:count]
+        path = self.directory / f"part-{self._next_part:05d}.parquet"
+        staging = path.with_name(f".{path.name}.tmp")
+        pq.write_table(table, staging, row_group_size=count)
+        staging.replace(path)
+        self._next_part += 1
+        self.written += count
+
+
+def completed_ids(directory: Path, schema: pa.Schema) -> set[str]:
+    """Return the scenario ids already written to ``directory``.
+
+    Parts written with a different schema (e.g. without paths) are rejected, since the
+    resumed dataset must stay readable as one table.
+    """
+    done: set[str] = set()
+    for part in sorted(directory.glob(PART_GLOB)):
+        if not pq.read_schema(part).equals(schema):
+            message = f"{part} was written with different options; cannot resume."
+            raise ValueError(message)
+        done.update(pq.read_table(part, columns=[SCENARIO_ID]).column(0).to_pylist())
+    return done
+
+
+def iter_tasks(
+    records: Iterable[dict[str, object]],
+    series: HistoricalSeries,
+    skip: set[str],
+    chunk_size: int,
+) -> Iterator[tuple[list[str], list[SimulationInput]] | dict[str, object]]:
+    """Yield same-horizon scenario groups to simulate and error rows for invalid ones.
+
+    Rows are read ``chunk_size`` valid scenarios at a time and each block is split by
+    retirement horizon, so every task is a single vectorized pass.
+    """
+    ids: list[str] = []
+    inputs: list[SimulationInput] = []
+    for row_number, record in enumerate(records):
+        scenario_id = str(record.pop(SCENARIO_ID, None) or row_number)
+        if scenario_id in skip:
+            continue
+        try:
+            req = parse_scenario(record)
+            check_simulation_input(req, series)
+        except (ValidationError, ValueError) as error:
+            yield summary_row(scenario_id, error=str(error))
+            continue
+        ids.append(scenario_id)
+        inputs.append(req)
+        if len(inputs) == chunk_size:
+            yield from _group(ids, inputs)
+            ids, inputs = [], []
+    yield from _group(ids, inputs)
+
+
+def _group(
+    ids: list[str], inputs: list[SimulationInput]
+) -> Iterator[tuple[list[str], list[SimulationInput]]]:
+    """Split a block of scenarios into same-horizon tasks."""
+    for chunk in household_chunks(inputs):
+        yield [ids[index] for index in chunk], [inputs[index] for index in chunk]
+
+
+def run(scenarios: Path, output: Path, options: RunOptions) -> RunStats:
+    """Simulate every scenario in ``scenarios`` and write the summaries to ``output``.
+
+    At most two tasks per worker are in flight, so memory stays bounded however large
+    the input file is.
+    """
+    schema = output_schema(include_paths=options.include_paths)
+    output.mkdir(parents=True, exist_ok=True)
+    if any(output.glob(PART_GLOB)) and not options.resume:
+        message = f"{output} already holds results; pass --resume to continue the run."
+        raise ValueError(message)
+    skip = completed_ids(output, schema)
+    series = SeriesLoader(options.series_path, options.series_path.with_suffix(".bin")).load()
+    writer = PartWriter(output, schema, options.rows_per_part)
+    simulate = partial(simulate_task, include_paths=options.include_paths)
+    started = time.perf_counter()
+    simulated = invalid = 0
+
+    def collect(done: Iterable[Future[list[dict[str, object]]]]) -> None:
+        nonlocal simulated
+        for future in done:
+            rows = future.result()
+            simulated += len(rows)
+            writer.add(rows)
+        _log_progress(simulated, time.perf_counter() - started)
+
+    executor: Executor = ProcessPoolExecutor(
+        max_workers=options.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=load_worker_series,
+        initargs=(options.series_path,),
+    )
+    with executor:
+        pending: set[Future[list[dict[str, object]]]] = set()
+        records = read_records(scenarios, options.chunk_size)
+        for task in iter_tasks(records, series, skip, options.chunk_size):
+            if isinstance(task, dict):
+                invalid += 1
+                writer.add([task])
+                continue
+            if len(pending) >= 2 * options.workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(simulate, *task))
+        collect(wait(pending).done)
+    writer.close()
+    return RunStats(
+        simulated=simulated,
+        invalid=invalid,
+        skipped=len(skip),
+        seconds=time.perf_counter() - started,
+    )
+
+
+def _log_progress(simulated: int, seconds: float) -> None:
+    """Log the running scenario count and throughput."""
+    rate = simulated / seconds if seconds > 0 else 0.0
+    logger.info("%s scenarios simulated (%.1f scenarios/s)", simulated, rate)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry point for offline batch runs."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", type=Path, help="CSV or Parquet file of scenarios")
+    parser.add_argument("output", type=Path, help="directory for the Parquet part files")
+    parser.add_argument("--series", type=Path, default=DATA_PATH, help="historical CSV")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK)
+    parser.add_argument("--rows-per-part", type=int, default=DEFAULT_ROWS_PER_PART)
+    parser.add_argument("--paths", action="store_true", help="also write per-year paths")
+    parser.add_argument("--resume", action="store_true", help="skip scenarios already written")
+    args = parser.parse_args(argv)
+
+    options = RunOptions(
+        series_path=args.series,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        rows_per_part=args.rows_per_part,
+        include_paths=args.paths,
+        resume=args.resume,
+    )
+    try:
+        stats = run(args.scenarios, args.output, options)
+    except ValueError as error:
+        parser.error(str(error))
+    logger.info(
+        "Simulated %s scenarios in %.2f s (%.1f scenarios/s); %s invalid, %s already done.",
+        stats.simulated,
+        stats.seconds,
+        stats.rate,
+        stats.invalid,
+        stats.skipped,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""Benchmark the simulation engine, summaries and HTTP endpoints offline.
+
+``python -m backend.scripts.benchmark run --output current.json`` times every benchmark
+against a synthetic historical series and writes the results as JSON.
+``python -m backend.scripts.benchmark compare baseline.json current.json`` diffs two
+result files and exits non-zero when a benchmark's median slowed down by more than its
+threshold.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app import main as api
+from backend.app.cache import simulation_cache
+from backend.app.data import HistoricalSeries
+from backend.app.models import SimulationInput, SimulationRun, SSRecipient, Summary
+from backend.app.montecarlo import CHUNK_PATHS
+from backend.app.simulate import FloatArray, PathResult, simulate_one_start_year, simulate_rolling
+from backend.app.sketch import DEFAULT_K
+from backend.app.summary import (
+    SummaryAccumulator,
+    compute_quantile_indices,
+    summarize_results,
+    summarize_totals,
+)
+
+RESULTS_VERSION = 1
+SYNTHETIC_START_YEAR = 1900
+SYNTHETIC_YEARS = 300
+HORIZONS = (10, 30, 60, 100, 150)
+RUN_COUNTS = (100, 10_000, 1_000_000)
+HTTP_HORIZON = 30
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.10
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Wall-clock timings of one benchmark, in seconds."""
+
+    name: str
+    params: dict[str, object]
+    repeats: int
+    best: float
+    median: float
+
+    @property
+    def key(self) -> str:
+        """Return the identifier used to match results across runs."""
+        params = ",".join(f"{name}={value}" for name, value in self.params.items())
+        return f"{self.name}[{params}]" if params else self.name
+
+
+def synthetic_series(years: int = SYNTHETIC_YEARS, seed: int = 0) -> HistoricalSeries:
+    """Build a deterministic series with roughly historical return moments."""
+    rng = np.random.default_rng(seed)
+    return HistoricalSeries.from_columns(
+        range(SYNTHETIC_START_YEAR, SYNTHETIC_START_YEAR + years),
+        rng.normal(0.08, 0.18, size=years),
+        rng.normal(0.04, 0.06, size=years),
+    )
+
+
+def synthetic_input(series: HistoricalSeries, horizon: int) -> SimulationInput:
+    """Build a typical simulation request over the given horizon."""
+    return SimulationInput(
+        start_year=series.min_year,
+        retirement_years=horizon,
+        portfolio_start=1_000_000,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.04,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.05,
+        management_fee=0.005,
+        inflation_rate=0.025,
+        ss_recipients=[SSRecipient(start_year=series.min_year + 10, monthly_amount=2000)],
+    )
+
+
+def synthetic_runs(count: int, seed: int = 0) -> list[SimulationRun]:
+    """Build per-run results with one-year histories, so totals dominate the cost."""
+    rng = np.random.default_rng(seed)
+    balances = rng.lognormal(13.0, 1.0, size=count).tolist()
+    withdrawals = rng.normal(40_000.0, 5_000.0, size=count).tolist()
+    fees = rng.uniform(1_000.0, 5_000.0, size=count).tolist()
+    return [
+        {
+            "start_year": index,
+            "success": balance > 0,
+            "ending_balance": balance,
+            "yearly_balances": [balance],
+            "yearly_withdrawals": [withdrawal],
+            "yearly_fees": [fee],
+            "highlight": False,
+        }
+        for index, (balance, withdrawal, fee) in enumerate(
+            zip(balances, withdrawals, fees, strict=True)
+        )
+    ]
+
+
+def measure(
+    name: str,
+    params: dict[str, object],
+    call: Callable[[], object],
+    repeats: int,
+) -> BenchmarkResult:
+    """Time ``call`` after one warm-up run and keep the best and median timings."""
+    call()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    result = BenchmarkResult(name, params, repeats, min(timings), statistics.median(timings))
+    logger.info("%-60s best %10.6fs  median %10.6fs", result.key, result.best, result.median)
+    return result
+
+
+def engine_benchmarks(series: HistoricalSeries, repeats: int) -> Iterator[BenchmarkResult]:
+    """Time the scalar reference for one start year and the vectorized rolling engine."""
+    for horizon in HORIZONS:
+        req = synthetic_input(series, horizon)
+        yield measure(
+            "engine.simulate_one_start_year",
+            {"horizon": horizon},
+            partial(simulate_one_start_year, req, series, series.min_year),
+            repeats,
+        )
+        start_years = series.start_years(horizon)
+        yield measure(
+            "engine.simulate_rolling",
+            {"horizon": horizon, "start_years": len(start_years)},
+            partial(simulate_rolling, req, series, start_years),
+            repeats,
+        )
+
+
+def summary_benchmarks(run_counts: Sequence[int], repeats: int) -> Iterator[BenchmarkResult]:
+    """Time run-list and array summaries, quantile indices and sketched summaries."""
+    for count in run_counts:
+        runs = synthetic_runs(count)
+        ending = np.array([run["ending_balance"] for run in runs])
+        withdrawals = np.array([run["yearly_withdrawals"][0] for run in runs])
+        fees = np.array([run["yearly_fees"][0] for run in runs])
+        yield measure(
+            "summary.summarize_results",
+            {"runs": count},
+            partial(summarize_results, runs),
+            repeats,
+        )
+        yield measure(
+            "summary.compute_quantile_indices",
+            {"runs": count},
+            partial(compute_quantile_indices, runs),
+            repeats,
+        )
+        yield measure(
+            "summary.summarize_totals",
+            {"runs": count},
+            partial(summarize_totals, count, ending, withdrawals, fees),
+            repeats,
+        )
+        yield measure(
+            "summary.sketch",
+            {"runs": count},
+            partial(_sketch_summary, ending, withdrawals, fees),
+            repeats,
+        )
+
+
+def _sketch_summary(ending: FloatArray, withdrawals: FloatArray, fees: FloatArray) -> Summary:
+    """Summarize per-run totals through a sketched accumulator in worker-sized chunks."""
+    accumulator = SummaryAccumulator(sketch_k=DEFAULT_K)
+    for start in range(0, ending.size, CHUNK_PATHS):
+        chunk = slice(start, start + CHUNK_PATHS)
+        accumulator.add(
+            PathResult(
+                start_years=np.arange(ending[chunk].size),
+                success=ending[chunk] > 0,
+                ending_balances=ending[chunk],
+                total_withdrawals=withdrawals[chunk],
+                total_fees=fees[chunk],
+            )
+        )
+    return accumulator.summary()
+
+
+@contextmanager
+def serving(series: HistoricalSeries) -> Iterator[TestClient]:
+    """Serve the API in-process against the given series with an empty cache."""
+    simulation_cache.invalidate()
+    with patch.object(api, "load_historical_series", return_value=series):
+        yield TestClient(api.app)
+    simulation_cache.invalidate()
+
+
+def http_benchmarks(series: HistoricalSeries, repeats: int) -> Iterator[BenchmarkResult]:
+    """Time /api/v1/simulate end to end through the ASGI test client."""
+    payload = synthetic_input(series, HTTP_HORIZON).model_dump(mode="json")
+    with serving(series) as client:
+
+        def cold() -> object:
+            simulation_cache.invalidate()
+            return client.post("/api/v1/simulate", json=payload).raise_for_status()
+
+        def warm(fmt: str) -> object:
+            return client.post(f"/api/v1/simulate?format={fmt}", json=payload).raise_for_status()
+
+        yield measure("http.simulate", {"cache": "cold"}, cold, repeats)
+        for fmt in ("json", "columnar", "binary"):
+            yield measure(
+                "http.simulate",
+                {"cache": "warm", "format": fmt},
+                partial(warm, fmt),
+                repeats,
+            )
+
+
+def run_benchmarks(
+    repeats: int = DEFAULT_REPEATS,
+    run_counts: Sequence[int] = RUN_COUNTS,
+    groups: Sequence[str] = ("engine", "summary", "http"),
+) -> dict[str, Any]:
+    """Run the selected benchmark groups and return a JSON-ready results document."""
+    series = synthetic_series()
+    results: list[BenchmarkResult] = []
+    if "engine" in groups:
+        results.extend(engine_benchmarks(series, repeats))
+    if "summary" in groups:
+        results.extend(summary_benchmarks(run_counts, repeats))
+    if "http" in groups:
+        results.extend(http_benchmarks(series, repeats))
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": {result.key: asdict(result) for result in results},
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    overrides: dict[str, float] | None = None,
+) -> list[str]:
+    """Return the keys of benchmarks whose median regressed beyond their threshold.
+
+    ``overrides`` maps a benchmark name or key prefix to its own threshold; the longest
+    matching prefix wins. Benchmarks missing from either run are reported but never
+    count as regressions.
+    """
+    overrides = overrides or {}
+    regressions = []
+    for key in sorted(baseline["results"].keys() | current["results"].keys()):
+        before = baseline["results"].get(key)
+        after = current["results"].get(key)
+        if before is None or after is None:
+            logger.info("%-60s %s", key, "new" if before is None else "removed")
+            continue
+        matches = [prefix for prefix in overrides if key.startswith(prefix)]
+        limit = overrides[max(matches, key=len)] if matches else threshold
+        change = after["median"] / before["median"] - 1
+        regressed = change > limit
+        logger.info(
+            "%-60s %+8.1f%% (limit %+.1f%%)%s",
+            key,
+            change * 100,
+            limit * 100,
+            "  REGRESSION" if regressed else "",
+        )
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def parse_threshold(value: str) -> tuple[str, float]:
+    """Parse a ``name=fraction`` threshold override."""
+    name, _, fraction = value.partition("=")
+    return name, float(fraction)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Entry point for running and comparing benchmarks."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run benchmarks and write JSON results")
+    run.add_argument("--output", type=Path, required=True)
+    run.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run.add_argument(
+        "--runs",
+        type=int,
+        nargs="+",
+        default=list(RUN_COUNTS),
+        help="run counts for the summary benchmarks",
+    )
+    run.add_argument(
+        "--group",
+        choices=("engine", "summary", "http"),
+        action="append",
+        help="benchmark group to run (repeatable; default: all)",
+    )
+
+    compare = commands.add_parser("compare", help="diff two result files")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare.add_argument(
+        "--override",
+        type=parse_threshold,
+        action="append",
+        default=[],
+        help="per-benchmark threshold as name=fraction, e.g. http.simulate=0.25",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        groups = args.group or ("engine", "summary", "http")
+        document = run_benchmarks(args.repeats, args.runs, groups)
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+        logger.info("Wrote %s", args.output)
+        return 0
+
+    regressions = compare_results(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+        args.threshold,
+        dict(args.override),
+    )
+    if regressions:
+        logger.info("%s benchmark(s) regressed.", len(regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
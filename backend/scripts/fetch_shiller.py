@@ -1,38 +1,80 @@
-"""Fetch and convert Shiller data into annual returns."""
+"""Fetch and convert Shiller data into monthly and annual returns.
 
+The raw workbook is cached beside the generated files, and ``ingest.json`` records the
+SHA-256 of the workbook the outputs were built from. Reruns with an unchanged workbook
+skip the rebuild. Set ``SHILLER_REFRESH=1`` to download the workbook again, and
+``SHILLER_FORCE=1`` to rebuild even when it is unchanged.
+"""
+
+import hashlib
 import io
+import json
 import logging
 import os
 from collections.abc import Iterable
 from pathlib import Path
 from urllib.request import urlopen
 
+import numpy as np
 import pandas as pd
-from pandas._libs.tslibs.nattype import NaTType
+
+from backend.app.data import (
+    ARTIFACT_PATH,
+    DATA_DIR,
+    DATA_PATH,
+    MONTHLY_ARTIFACT_PATH,
+    MONTHLY_DATA_PATH,
+    MONTHS_PER_YEAR,
+    HistoricalSeries,
+    write_series_artifact,
+)
 
 SHILLER_URL = "https://www.econ.yale.edu/~shiller/data/ie_data.xls"
-LOCAL_DEFAULT = Path(__file__).resolve().parents[1] / "data" / "ie_data.xls"
+LOCAL_DEFAULT = DATA_DIR / "ie_data.xls"
+MANIFEST_NAME = "ingest.json"
+OUTPUT_NAMES = (
+    DATA_PATH.name,
+    MONTHLY_DATA_PATH.name,
+    ARTIFACT_PATH.name,
+    MONTHLY_ARTIFACT_PATH.name,
+)
 MONTH_MIN = 1
 MONTH_MAX = 12
+EPOCH_YEAR = 1970
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_shiller_data(local_path: Path | None = None) -> pd.DataFrame:
-    """Load the Shiller dataset from a local file or the public URL."""
-    if local_path and local_path.exists():
-        return pd.read_excel(local_path, sheet_name="Data", skiprows=7)
+def load_raw(local_path: Path = LOCAL_DEFAULT, *, refresh: bool = False) -> bytes:
+    """Return the raw workbook, downloading it into ``local_path`` when not cached."""
+    if local_path.exists() and not refresh:
+        return local_path.read_bytes()
 
     try:
         with urlopen(SHILLER_URL) as response:  # noqa: S310
-            data = response.read()
-        return pd.read_excel(io.BytesIO(data), sheet_name="Data", skiprows=7)
+            data: bytes = response.read()
     except Exception as exc:
         message = (
             "Unable to download Shiller data. Download ie_data.xls manually and "
             f"place it at {LOCAL_DEFAULT}, or set SHILLER_XLS_PATH to the file."
         )
         raise RuntimeError(message) from exc
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = local_path.with_name(f".{local_path.name}.tmp")
+    staging.write_bytes(data)
+    staging.replace(local_path)
+    logger.info("Cached %s", local_path)
+    return data
+
+
+def read_workbook(raw: bytes) -> pd.DataFrame:
+    """Parse the data sheet of the raw Shiller workbook."""
+    return pd.read_excel(io.BytesIO(raw), sheet_name="Data", skiprows=7)
+
+
+def fetch_shiller_data(local_path: Path | None = None) -> pd.DataFrame:
+    """Load the Shiller dataset from a local file or the public URL."""
+    return read_workbook(load_raw(local_path or LOCAL_DEFAULT))
 
 
 def normalize_columns(frame: pd.DataFrame) -> pd.DataFrame:
@@ -52,30 +94,37 @@ def find_column(frame: pd.DataFrame, candidates: Iterable[str]) -> str:
 
 
 def parse_date_column(series: pd.Series) -> pd.Series:
-    """Parse the Shiller date column into a datetime index."""
+    """Parse the Shiller date column into datetimes.
+
+    Shiller encodes dates as ``year.month`` floats (1871.01 is January, 1871.1 is
+    October). The year and month are split with array arithmetic and combined as
+    month offsets from the epoch; values that are not numbers are parsed as date
+    strings. Anything else, including month digits outside 1-12, becomes ``NaT``.
+    """
     if pd.api.types.is_datetime64_any_dtype(series):
         return series
 
-    def to_datetime(value: object) -> pd.Timestamp | NaTType:
-        if pd.isna(value):
-            return pd.NaT
-        if isinstance(value, str) and value.strip():
-            try:
-                return pd.to_datetime(value)
-            except ValueError:
-                pass
-        numeric = float(value) if isinstance(value, (int, float)) else float(str(value))
-        year = int(numeric)
-        month = round((numeric - year) * 100)
-        if month < MONTH_MIN or month > MONTH_MAX:
-            return pd.NaT
-        return pd.Timestamp(year=year, month=month, day=1)
+    numeric = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+    year = np.floor(numeric)
+    month = np.rint((numeric - year) * 100)
+    valid = (month >= MONTH_MIN) & (month <= MONTH_MAX)
+    offsets = np.where(valid, (year - EPOCH_YEAR) * MONTHS_PER_YEAR + month - 1, 0)
+    dates = offsets.astype(np.int64).astype("datetime64[M]").astype("datetime64[ns]")
+    parsed = pd.Series(np.where(valid, dates, np.datetime64("NaT")), index=series.index)
 
-    return series.apply(to_datetime)
+    text = np.isnan(numeric) & series.notna().to_numpy()
+    if text.any():
+        parsed[text] = pd.to_datetime(series[text].astype(str), errors="coerce", format="mixed")
+    return parsed
 
 
-def build_annual_returns(frame: pd.DataFrame) -> pd.DataFrame:
-    """Compute annual stock and bond return series."""
+def build_returns(frame: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Compute monthly and annual stock and bond return series in one pass.
+
+    Monthly stock returns are month-over-month price changes and monthly bond returns
+    accrue a twelfth of the long rate. The annual series compounds prices year end to
+    year end and uses the year's mean long rate, as before.
+    """
     date_col = find_column(frame, ["Date", "date"])
     price_col = find_column(frame, ["P", "Price", "SP500"])
     bond_col = find_column(frame, ["Rate GS10", "GS10", "LT", "Long Interest Rate"])
@@ -88,37 +137,98 @@ def build_annual_returns(frame: pd.DataFrame) -> pd.DataFrame:
     prices = frame[price_col].astype(float)
     yields = frame[bond_col].astype(float)
 
+    monthly = pd.concat(
+        [
+            prices.pct_change().rename("stock_return"),
+            (yields / 100.0 / MONTHS_PER_YEAR).rename("bond_return"),
+        ],
+        axis=1,
+    ).dropna()
+    monthly.index = pd.MultiIndex.from_arrays(
+        [monthly.index.year, monthly.index.month], names=["year", "month"]
+    )
+
     stock_annual = prices.resample("YE").last().pct_change().dropna()
     bond_annual = yields.resample("YE").mean().dropna() / 100.0
-
     annual = pd.concat(
         [stock_annual.rename("stock_return"), bond_annual.rename("bond_return")],
         axis=1,
+        sort=True,
     ).dropna()
     annual.index = annual.index.year
     annual.index.name = "year"
-    return annual
+    return monthly, annual
 
 
-def main() -> None:
-    """Entry point for building the historical returns CSV."""
-    local_path = Path(os.environ.get("SHILLER_XLS_PATH", str(LOCAL_DEFAULT)))
-    data = normalize_columns(fetch_shiller_data(local_path))
-    if os.environ.get("SHILLER_SHOW_COLUMNS") == "1":
-        logger.info("Available columns: %s", ", ".join(data.columns))
-        return
-    annual = build_annual_returns(data)
-
-    output_path = Path(__file__).resolve().parents[1] / "data" / "historical.csv"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    annual.to_csv(output_path)
-    logger.info("Wrote %s", output_path)
+def build_annual_returns(frame: pd.DataFrame) -> pd.DataFrame:
+    """Compute annual stock and bond return series."""
+    return build_returns(frame)[1]
+
+
+def outputs_current(source_sha256: str, output_dir: Path = DATA_DIR) -> bool:
+    """Return whether every output exists and was built from the given workbook."""
+    manifest = output_dir / MANIFEST_NAME
+    if not manifest.exists() or not all((output_dir / name).exists() for name in OUTPUT_NAMES):
+        return False
+    return bool(json.loads(manifest.read_text()).get("source_sha256") == source_sha256)
+
+
+def write_outputs(
+    frame: pd.DataFrame, source_sha256: str, output_dir: Path = DATA_DIR
+) -> HistoricalSeries:
+    """Write the monthly and annual CSVs, their binary artifacts and the ingest manifest."""
+    monthly, annual = build_returns(frame)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    annual.to_csv(output_dir / DATA_PATH.name)
+    monthly.to_csv(output_dir / MONTHLY_DATA_PATH.name)
+    series = HistoricalSeries.from_columns(
+        annual.index.to_numpy(),
+        annual["stock_return"].to_numpy(),
+        annual["bond_return"].to_numpy(),
+    )
+    write_series_artifact(series, output_dir / ARTIFACT_PATH.name)
+    years = monthly.index.get_level_values("year").to_numpy()
+    months = monthly.index.get_level_values("month").to_numpy()
+    monthly_series = HistoricalSeries.from_columns(
+        years * MONTHS_PER_YEAR + months - 1,
+        monthly["stock_return"].to_numpy(),
+        monthly["bond_return"].to_numpy(),
+        periods_per_year=MONTHS_PER_YEAR,
+    )
+    write_series_artifact(monthly_series, output_dir / MONTHLY_ARTIFACT_PATH.name)
+    manifest = {
+        "source_sha256": source_sha256,
+        "version": series.version,
+        "outputs": list(OUTPUT_NAMES),
+    }
+    (output_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+    logger.info("Wrote %s (version %s)", ", ".join(OUTPUT_NAMES), series.version)
     logger.info(
-        "Series coverage: %s - %s (%s years)",
+        "Series coverage: %s - %s (%s years, %s months)",
         annual.index.min(),
         annual.index.max(),
         len(annual),
+        len(monthly),
     )
+    return series
+
+
+def main() -> None:
+    """Entry point for building the historical return files."""
+    local_path = Path(os.environ.get("SHILLER_XLS_PATH", str(LOCAL_DEFAULT)))
+    raw = load_raw(local_path, refresh=os.environ.get("SHILLER_REFRESH") == "1")
+    source_sha256 = hashlib.sha256(raw).hexdigest()
+    show_columns = os.environ.get("SHILLER_SHOW_COLUMNS") == "1"
+    force = os.environ.get("SHILLER_FORCE") == "1"
+    if not show_columns and not force and outputs_current(source_sha256):
+        logger.info("Workbook unchanged (sha256 %s); outputs are current.", source_sha256[:12])
+        return
+
+    data = normalize_columns(read_workbook(raw))
+    if show_columns:
+        logger.info("Available columns: %s", ", ".join(data.columns))
+        return
+    write_outputs(data, source_sha256)
 
 
 if __name__ == "__main__":
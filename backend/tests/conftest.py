@@ -0,0 +1,34 @@
+"""Shared fixtures for the backend tests."""
+
+from collections.abc import Iterator
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.cache import simulation_cache
+from backend.app.data import HistoricalSeries
+
+SERIES_START = 1900
+SERIES_YEARS = 100
+
+
+@pytest.fixture
+def series() -> HistoricalSeries:
+    """Build a deterministic century of synthetic stock and bond returns."""
+    rng = np.random.default_rng(17)
+    return HistoricalSeries.from_columns(
+        range(SERIES_START, SERIES_START + SERIES_YEARS),
+        rng.normal(0.07, 0.18, size=SERIES_YEARS),
+        rng.normal(0.04, 0.02, size=SERIES_YEARS),
+    )
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries) -> Iterator[TestClient]:
+    """Serve the app against ``series`` with an empty simulation cache."""
+    monkeypatch.setattr(main, "load_historical_series", lambda: series)
+    simulation_cache.invalidate()
+    yield TestClient(main.app)
+    simulation_cache.invalidate()
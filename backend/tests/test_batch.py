@@ -0,0 +1,76 @@
+"""Tests for batched household simulations."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import batch
+from backend.app.batch import household_chunks, run_batch
+from backend.app.data import HistoricalSeries
+from backend.app.models import BatchRequest, SimulationInput
+from backend.app.results import run_simulation, to_response
+
+CHUNK = 2
+HTTP_BAD_REQUEST = 400
+
+
+def make_households() -> list[SimulationInput]:
+    """Build households with two interleaved horizons."""
+    return [
+        SimulationInput(
+            start_year=1950,
+            retirement_years=20 if index % 2 else 30,
+            portfolio_start=500_000.0 + 50_000.0 * index,
+            stock_allocation=0.6,
+            bond_allocation=0.4,
+            withdrawal_rate_start=0.03 + 0.005 * index,
+            withdrawal_rate_min=0.02,
+            withdrawal_rate_max=0.08,
+            management_fee=0.005,
+            inflation_rate=0.02,
+        )
+        for index in range(5)
+    ]
+
+
+def test_household_chunks_group_horizons() -> None:
+    """Group indices by horizon and cap each chunk."""
+    assert household_chunks(make_households()) == [[0, 2, 4], [1, 3]]
+
+
+def test_batch_matches_individual_simulations(
+    monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries
+) -> None:
+    """Return each household's summary and runs, in order, inline and on a pool."""
+    monkeypatch.setattr(batch, "CHUNK_HOUSEHOLDS", CHUNK)
+    households = make_households()
+    request = BatchRequest(households=households, include_runs=True)
+
+    inline = run_batch(request, series)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pooled = run_batch(request, series, executor)
+
+    assert pooled == inline
+    for req, result in zip(households, inline.households, strict=True):
+        single = to_response(run_simulation(req, series))
+        assert result.summary == single.summary
+        assert result.quantile_indices == single.quantile_indices
+        assert result.results == single.results
+
+
+def test_batch_endpoint_omits_runs_and_names_invalid_households(
+    client: TestClient,
+) -> None:
+    """Serve summaries only by default and point at the household that failed."""
+    households = [req.model_dump(mode="json") for req in make_households()]
+
+    response = client.post("/api/v1/simulate/batch", json={"households": households})
+    households[3]["bond_allocation"] = 0.9
+    invalid = client.post("/api/v1/simulate/batch", json={"households": households})
+
+    body = response.json()
+    assert len(body["households"]) == len(households)
+    assert "results" not in body["households"][0]
+    assert invalid.status_code == HTTP_BAD_REQUEST
+    assert invalid.json()["detail"] == "households[3]: Allocations must sum to 1.0"
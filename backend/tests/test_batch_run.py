@@ -0,0 +1,116 @@
+"""Tests for the offline batch runner."""
+
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+
+from backend.app.batch import summarize_households
+from backend.app.data import SeriesLoader
+from backend.app.models import SimulationInput
+from backend.scripts.batch_run import RunOptions, run
+
+HEADER = (
+    "scenario_id,start_year,retirement_years,portfolio_start,stock_allocation,"
+    "bond_allocation,allocations,withdrawal_rate_start,withdrawal_rate_min,"
+    "withdrawal_rate_max,inflation_rate\n"
+)
+ROWS = (
+    "a,2000,3,1000000,0.6,0.4,,0.04,0.03,0.05,0.02\n",
+    "b,2000,5,500000,0.8,0.2,,0.05,0.03,0.06,0.03\n",
+    'c,2000,3,750000,,,"{""stock"": 0.5, ""bond"": 0.5}",0.04,0.03,0.05,0.02\n',
+    "bad,2000,3,1000000,0.6,0.6,,0.04,0.03,0.05,0.02\n",
+)
+ROWS_PER_PART = 2
+VALID_IDS = {"a", "b", "c"}
+HORIZON = 3
+START_YEARS = 8
+
+
+@pytest.fixture
+def series_path(tmp_path: Path) -> Path:
+    """Write a ten-year synthetic series and return its path."""
+    path = tmp_path / "historical.csv"
+    lines = [
+        f"{2000 + year},{0.02 * (year % 5) - 0.03},{0.01 + 0.002 * year}" for year in range(10)
+    ]
+    path.write_text("year,stock_return,bond_return\n" + "\n".join(lines) + "\n")
+    return path
+
+
+def write_scenarios(path: Path, rows: tuple[str, ...]) -> Path:
+    """Write scenario rows under the shared header."""
+    path.write_text(HEADER + "".join(rows))
+    return path
+
+
+def read_output(directory: Path) -> list[dict[str, object]]:
+    """Read every part file of a run as rows."""
+    return pq.read_table(directory).to_pylist()
+
+
+def test_run_writes_summaries_and_errors(tmp_path: Path, series_path: Path) -> None:
+    """Match the batch endpoint's summaries and record invalid rows with their error."""
+    scenarios = write_scenarios(tmp_path / "scenarios.csv", ROWS)
+    output = tmp_path / "out"
+
+    stats = run(scenarios, output, RunOptions(series_path=series_path, rows_per_part=ROWS_PER_PART))
+
+    assert (stats.simulated, stats.invalid, stats.skipped) == (len(VALID_IDS), 1, 0)
+    assert all(
+        pq.ParquetFile(part).metadata.num_row_groups == 1 for part in output.glob("*.parquet")
+    )
+    rows = {row["scenario_id"]: row for row in read_output(output)}
+    assert "sum to 1" in str(rows["bad"]["error"])
+    assert rows["bad"]["success_rate"] is None
+    series = SeriesLoader(series_path, tmp_path / "missing.bin").load()
+    req = SimulationInput(
+        start_year=2000,
+        retirement_years=5,
+        portfolio_start=500000,
+        stock_allocation=0.8,
+        bond_allocation=0.2,
+        withdrawal_rate_start=0.05,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.06,
+        inflation_rate=0.03,
+    )
+    (expected,) = summarize_households([req], series, include_runs=False)
+    assert rows["b"]["error"] is None
+    assert rows["b"]["success_rate"] == expected.summary.success_rate
+    assert rows["b"]["portfolio_quantiles_p50"] == expected.summary.portfolio_quantiles["p50"]
+    assert rows["c"]["total_runs"] == START_YEARS
+
+
+def test_resume_skips_written_scenarios(tmp_path: Path, series_path: Path) -> None:
+    """Continue an interrupted run without simulating finished scenarios again."""
+    output = tmp_path / "out"
+    options = RunOptions(series_path=series_path, rows_per_part=ROWS_PER_PART)
+    run(write_scenarios(tmp_path / "first.csv", ROWS[:2]), output, options)
+    scenarios = write_scenarios(tmp_path / "all.csv", ROWS)
+
+    with pytest.raises(ValueError, match="--resume"):
+        run(scenarios, output, options)
+    stats = run(
+        scenarios,
+        output,
+        RunOptions(series_path=series_path, rows_per_part=ROWS_PER_PART, resume=True),
+    )
+
+    assert (stats.simulated, stats.skipped) == (1, ROWS_PER_PART)
+    ids = [row["scenario_id"] for row in read_output(output)]
+    assert sorted(ids) == sorted([*VALID_IDS, "bad"])
+
+
+def test_paths_are_written_as_list_columns(tmp_path: Path, series_path: Path) -> None:
+    """Store per-start-year paths when requested."""
+    scenarios = write_scenarios(tmp_path / "scenarios.csv", ROWS[:1])
+    output = tmp_path / "out"
+
+    run(scenarios, output, RunOptions(series_path=series_path, include_paths=True))
+
+    (row,) = read_output(output)
+    assert row["start_years"] == list(range(2000, 2000 + START_YEARS))
+    assert len(row["success"]) == START_YEARS
+    assert [len(balances) for balances in row["balances"]] == [HORIZON + 1] * START_YEARS
+    assert [len(fees) for fees in row["fees"]] == [HORIZON] * START_YEARS
@@ -0,0 +1,28 @@
+"""Tests for the benchmark runner and baseline comparison."""
+
+from backend.scripts.benchmark import compare_results, run_benchmarks
+
+SMOKE_RUNS = 10
+
+
+def document(**medians: float) -> dict[str, object]:
+    """Build a results document with the given median timings."""
+    return {"results": {key: {"median": median} for key, median in medians.items()}}
+
+
+def test_compare_flags_regressions_beyond_threshold() -> None:
+    """Report only slowdowns beyond the default or the longest matching override."""
+    baseline = document(fast=1.0, slow=1.0, noisy=1.0, gone=1.0)
+    current = document(fast=1.05, slow=1.5, noisy=1.5, added=1.0)
+
+    regressions = compare_results(baseline, current, 0.1, {"no": 0.1, "noisy": 0.6})
+
+    assert regressions == ["slow"]
+
+
+def test_run_benchmarks_writes_keyed_results() -> None:
+    """Smoke-test one tiny summary pass."""
+    results = run_benchmarks(repeats=1, run_counts=(SMOKE_RUNS,), groups=("summary",))
+
+    assert f"summary.summarize_results[runs={SMOKE_RUNS}]" in results["results"]
+    assert all(entry["median"] >= 0 for entry in results["results"].values())
@@ -0,0 +1,167 @@
+"""Tests for the simulation result cache."""
+
+from fastapi.testclient import TestClient
+
+from backend.app.cache import LRUCache, canonical_key, etag_matches, simulation_cache
+from backend.app.data import HistoricalSeries
+from backend.app.models import SimulationInput
+
+ENTRY_SIZE = 10
+ENTRIES_WITHIN_BYTES = 2
+TTL_SECONDS = 60.0
+HALF = 0.5
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+
+
+def make_input(**overrides: float) -> SimulationInput:
+    """Build a simulation input with optional overrides."""
+    payload: dict[str, object] = {
+        "start_year": 1960,
+        "retirement_years": 10,
+        "portfolio_start": 1000,
+        "stock_allocation": 0.6,
+        "bond_allocation": 0.4,
+        "withdrawal_rate_start": 0.04,
+        "withdrawal_rate_min": 0.03,
+        "withdrawal_rate_max": 0.05,
+        "inflation_rate": 0.02,
+        **overrides,
+    }
+    return SimulationInput.model_validate(payload)
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    """Evict the oldest untouched entry when the entry bound is exceeded."""
+    cache: LRUCache[str] = LRUCache(max_entries=2, max_bytes=1000, sizeof=lambda _: ENTRY_SIZE)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (2, 1, 1, 2)
+
+
+def test_lru_cache_expires_entries_after_ttl() -> None:
+    """Treat entries older than the TTL as misses and report the hit rate."""
+    now = [0.0]
+    cache: LRUCache[str] = LRUCache(
+        max_entries=10,
+        max_bytes=1000,
+        sizeof=lambda _: ENTRY_SIZE,
+        ttl_seconds=TTL_SECONDS,
+        clock=lambda: now[0],
+    )
+    cache.put("a", "A")
+    assert cache.get("a") == "A"
+    now[0] = TTL_SECONDS
+
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.expirations, stats.entries, stats.bytes) == (
+        1,
+        1,
+        1,
+        0,
+        0,
+    )
+    assert stats.hit_rate == HALF
+
+
+def test_lru_cache_respects_byte_bound_and_invalidation() -> None:
+    """Evict by size, skip oversized values and drop everything on invalidate."""
+    cache: LRUCache[str] = LRUCache(max_entries=10, max_bytes=25, sizeof=lambda _: ENTRY_SIZE)
+    for key in "abc":
+        cache.put(key, key)
+    assert cache.stats().entries == ENTRIES_WITHIN_BYTES
+    assert cache.get("a") is None
+
+    cache.invalidate()
+
+    assert cache.stats().bytes == 0
+    assert cache.get("c") is None
+
+
+def test_canonical_key_ignores_spelling_and_tracks_version() -> None:
+    """Equivalent inputs share a key; data versions and fields do not."""
+    key = canonical_key(make_input(), "vectorized", "v1")
+
+    assert canonical_key(make_input(portfolio_start=1000.0), "vectorized", "v1") == key
+    assert canonical_key(make_input(), "vectorized", "v2") != key
+    assert canonical_key(make_input(inflation_rate=0.03), "vectorized", "v1") != key
+
+
+def test_simulate_endpoint_serves_repeats_from_cache(client: TestClient) -> None:
+    """A repeated request is answered from the cache."""
+    payload = make_input().model_dump(mode="json")
+
+    first = client.post("/api/v1/simulate", json=payload)
+    before = simulation_cache.stats()
+    second = client.post("/api/v1/simulate", json=payload)
+    after = simulation_cache.stats()
+
+    assert first.json() == second.json()
+    assert after.hits == before.hits + 1
+    assert after.misses == before.misses
+
+
+def test_etag_matches_lists_wildcards_and_weak_tags() -> None:
+    """Match any listed tag, ``*`` or a weak form of the tag."""
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"c"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+    assert etag_matches('"b"', 'W/"b"')
+
+
+def test_conditional_requests_return_not_modified(
+    client: TestClient, series: HistoricalSeries
+) -> None:
+    """Answer a matching If-None-Match with 304 without simulating again."""
+    payload = make_input().model_dump(mode="json")
+
+    first = client.post("/api/v1/simulate", json=payload)
+    etag = first.headers["etag"]
+    before = simulation_cache.stats()
+    revalidated = client.post("/api/v1/simulate", json=payload, headers={"If-None-Match": etag})
+    after = simulation_cache.stats()
+    columnar = client.post("/api/v1/simulate?format=columnar", json=payload)
+    changed = client.post(
+        "/api/v1/simulate",
+        json=make_input(inflation_rate=0.03).model_dump(mode="json"),
+        headers={"If-None-Match": etag},
+    )
+    metadata = client.get("/api/v1/series/metadata")
+    metadata_again = client.get(
+        "/api/v1/series/metadata", headers={"If-None-Match": metadata.headers["etag"]}
+    )
+
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    assert etag.startswith('W/"')
+    assert revalidated.status_code == HTTP_NOT_MODIFIED
+    assert revalidated.headers["etag"] == etag
+    assert first.headers["vary"] == "Accept, Accept-Encoding"
+    assert revalidated.headers["vary"] == "Accept"
+    assert not revalidated.content
+    assert (after.hits, after.misses) == (before.hits, before.misses)
+    assert columnar.headers["etag"] != etag
+    assert changed.status_code == HTTP_OK
+    assert changed.headers["etag"] != etag
+    assert metadata.json()["min_year"] == series.min_year
+    assert metadata_again.status_code == HTTP_NOT_MODIFIED
+    assert "vary" not in metadata.headers
+
+
+def test_gzipped_responses_name_each_vary_header_once(client: TestClient) -> None:
+    """Leave Accept-Encoding to the gzip middleware so it is listed once."""
+    response = client.post(
+        "/api/v1/simulate",
+        json=make_input(start_year=1900).model_dump(mode="json"),
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
@@ -0,0 +1,145 @@
+"""Tests for the columnar historical series store."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from backend.app.data import (
+    HistoricalSeries,
+    SeriesLoader,
+    read_series_artifact,
+    write_series_artifact,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+MIN_YEAR = 2000
+MAX_YEAR = 2003
+HORIZON = 2
+SERIES = {2000: (0.1, 0.01), 2001: (0.2, 0.02), 2002: (0.3, 0.03), 2003: (-0.1, 0.04)}
+
+
+def test_from_mapping_sorts_years_and_builds_growth() -> None:
+    """Ensure years are ordered and growth factors are precomputed."""
+    series = HistoricalSeries.from_mapping(
+        {
+            2001: (0.2, 0.02),
+            2000: (0.1, 0.01),
+        }
+    )
+
+    assert series.min_year == MIN_YEAR
+    assert series.years.tolist() == [2000, 2001]
+    assert series.stock_returns.tolist() == [0.1, 0.2]
+    assert series.growth[1].tolist() == [1.01, 1.02]
+    assert series.offset(2001) == 1
+
+
+def test_from_columns_rejects_gaps() -> None:
+    """Reject series with missing years."""
+    with pytest.raises(ValueError, match="contiguous"):
+        HistoricalSeries.from_columns([2000, 2002], [0.1, 0.1], [0.0, 0.0])
+
+
+def test_offset_outside_series_raises() -> None:
+    """Raise when a year is outside the series."""
+    series = HistoricalSeries.from_columns([2000], [0.1], [0.0])
+    with pytest.raises(KeyError):
+        series.offset(1999)
+
+
+def test_growth_windows_are_zero_copy_views() -> None:
+    """Ensure rolling windows share memory with the growth matrix."""
+    series = HistoricalSeries.from_columns(
+        range(MIN_YEAR, MAX_YEAR + 1), [0.1, 0.2, 0.3, 0.4], [0.0, 0.0, 0.0, 0.0]
+    )
+
+    windows = series.growth_windows(HORIZON)
+
+    assert windows.shape == (2, 3, HORIZON)
+    assert np.shares_memory(windows, series.growth)
+    assert windows[0, 1].tolist() == [1.2, 1.3]
+    assert series.start_years(HORIZON) == range(MIN_YEAR, MAX_YEAR)
+    assert not series.growth.flags.writeable
+
+
+def test_load_historical_series_reads_csv(tmp_path: Path) -> None:
+    """Load the CSV into contiguous columns when there is no artifact."""
+    csv_path = tmp_path / "historical.csv"
+    csv_path.write_text("year,stock_return,bond_return\n2001,0.2,0.02\n2000,0.1,0.01\n")
+
+    series = SeriesLoader(csv_path, tmp_path / "historical.bin").load()
+
+    assert (series.min_year, series.max_year) == (MIN_YEAR, 2001)
+    assert series.bond_returns.tolist() == [0.01, 0.02]
+
+
+def test_extra_return_columns_become_named_assets(tmp_path: Path) -> None:
+    """Read extra ``<asset>_return`` columns and keep their names through the artifact."""
+    csv_path = tmp_path / "historical.csv"
+    csv_path.write_text(
+        "year,stock_return,bond_return,gold_return\n2000,0.1,0.01,0.05\n2001,0.2,0.02,-0.05\n"
+    )
+
+    series = SeriesLoader(csv_path, tmp_path / "missing.bin").load()
+    write_series_artifact(series, tmp_path / "historical.bin")
+    mapped = read_series_artifact(tmp_path / "historical.bin")
+
+    assert series.assets == mapped.assets == ("stock", "bond", "gold")
+    assert mapped.version == series.version
+    np.testing.assert_array_equal(mapped.growth[2], [1.05, 0.95])
+
+
+def test_artifact_round_trips_through_memory_map(tmp_path: Path) -> None:
+    """Map the artifact read-only with the same contents and version as the source."""
+    source = HistoricalSeries.from_mapping(SERIES)
+    path = tmp_path / "historical.bin"
+    write_series_artifact(source, path)
+
+    mapped = read_series_artifact(path)
+
+    assert mapped.version == source.version
+    assert (mapped.min_year, mapped.max_year) == (source.min_year, source.max_year)
+    np.testing.assert_array_equal(mapped.growth, source.growth)
+    np.testing.assert_array_equal(mapped.stock_returns, source.stock_returns)
+    assert isinstance(mapped.growth, np.memmap)
+    assert not mapped.growth.flags.writeable
+
+
+def test_artifact_checksum_mismatch_is_rejected(tmp_path: Path) -> None:
+    """Refuse an artifact whose data section was modified."""
+    path = tmp_path / "historical.bin"
+    write_series_artifact(HistoricalSeries.from_mapping(SERIES), path)
+    payload = bytearray(path.read_bytes())
+    payload[-1] ^= 0xFF
+    path.write_bytes(bytes(payload))
+
+    with pytest.raises(ValueError, match="Checksum"):
+        read_series_artifact(path)
+
+
+def test_loader_reloads_changed_artifact_and_notifies(tmp_path: Path) -> None:
+    """Reload when the artifact changes and fall back to CSV when it is unreadable."""
+    csv_path = tmp_path / "historical.csv"
+    csv_path.write_text("year,stock_return,bond_return\n2000,0.5,0.05\n")
+    artifact = tmp_path / "historical.bin"
+    write_series_artifact(HistoricalSeries.from_mapping(SERIES), artifact)
+    loader = SeriesLoader(csv_path, artifact)
+    reloaded: list[str] = []
+    loader.on_reload(lambda series: reloaded.append(series.version))
+
+    first = loader.load()
+    assert loader.load() is first
+    changed = HistoricalSeries.from_mapping({**SERIES, MIN_YEAR: (0.9, 0.09)})
+    write_series_artifact(changed, artifact)
+    second = loader.load()
+    artifact.write_bytes(b"garbage")
+    fallback = loader.load()
+
+    assert second.version == changed.version
+    assert fallback.stock_returns.tolist() == [0.5]
+    assert reloaded == [changed.version, fallback.version]
@@ -0,0 +1,89 @@
+"""Tests for Shiller ingestion."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.app.data import MONTHS_PER_YEAR, read_series_artifact
+from backend.scripts.fetch_shiller import (
+    build_returns,
+    load_raw,
+    outputs_current,
+    parse_date_column,
+    write_outputs,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+YEARS = 3
+MONTHS = YEARS * MONTHS_PER_YEAR
+SOURCE_SHA = "a" * 64
+
+
+def shiller_frame() -> pd.DataFrame:
+    """Build a frame shaped like the Shiller data sheet, with a trailing blank row."""
+    dates = [round(2000 + year + month / 100, 2) for year in range(YEARS) for month in range(1, 13)]
+    prices = 100 * 1.01 ** np.arange(MONTHS)
+    return pd.DataFrame(
+        {
+            "Date": [*dates, np.nan],
+            "P": [*prices, np.nan],
+            "Rate GS10": [*np.full(MONTHS, 6.0), np.nan],
+        }
+    )
+
+
+def test_parse_date_column_splits_year_and_month() -> None:
+    """Parse year.month floats and date strings; reject invalid months."""
+    parsed = parse_date_column(pd.Series([1871.01, 1871.1, 1871.12, 1871.13, None, "2020-05-01"]))
+
+    assert list(parsed) == [
+        pd.Timestamp(1871, 1, 1),
+        pd.Timestamp(1871, 10, 1),
+        pd.Timestamp(1871, 12, 1),
+        pd.NaT,
+        pd.NaT,
+        pd.Timestamp(2020, 5, 1),
+    ]
+
+
+def test_build_returns_emits_monthly_and_annual_series() -> None:
+    """Build both resolutions from one frame."""
+    monthly, annual = build_returns(shiller_frame())
+
+    assert len(monthly) == MONTHS - 1
+    assert monthly.index.names == ["year", "month"]
+    assert monthly["stock_return"].to_numpy() == pytest.approx(0.01)
+    assert monthly["bond_return"].to_numpy() == pytest.approx(0.005)
+    assert list(annual.index) == [2001, 2002]
+    assert annual["stock_return"].to_numpy() == pytest.approx(1.01**12 - 1)
+    assert annual["bond_return"].to_numpy() == pytest.approx(0.06)
+
+
+def test_outputs_are_skipped_when_the_source_is_unchanged(tmp_path: Path) -> None:
+    """Record the source hash and report outputs current only for that hash."""
+    assert not outputs_current(SOURCE_SHA, tmp_path)
+
+    series = write_outputs(shiller_frame(), SOURCE_SHA, tmp_path)
+
+    assert outputs_current(SOURCE_SHA, tmp_path)
+    assert not outputs_current("b" * 64, tmp_path)
+    assert read_series_artifact(tmp_path / "historical.bin").version == series.version
+    monthly = read_series_artifact(tmp_path / "historical_monthly.bin")
+    assert monthly.periods_per_year == MONTHS_PER_YEAR
+    assert monthly.bounds == {"min_year": 2000, "max_year": 2002}
+    (tmp_path / "historical_monthly.csv").unlink()
+    assert not outputs_current(SOURCE_SHA, tmp_path)
+
+
+def test_load_raw_reads_the_cached_workbook(tmp_path: Path) -> None:
+    """Serve the cached download without touching the network."""
+    cached = tmp_path / "ie_data.xls"
+    cached.write_bytes(b"workbook")
+
+    assert load_raw(cached) == b"workbook"
@@ -0,0 +1,204 @@
+"""Tests for in-process background jobs."""
+
+import asyncio
+import json
+import threading
+
+import anyio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from backend.app import sweep
+from backend.app.jobs import Job, JobManager, JobQueueFullError, job_manager
+from backend.tests.test_sweep import make_request
+
+CHUNKS = 3
+WAIT_SECONDS = 5.0
+HEARTBEAT_SECONDS = 0.01
+POLL_SECONDS = 0.001
+THREAD_TOKENS = 2
+SUBSCRIBERS = 4
+HTTP_OK = 200
+SWEEP_CHUNK = 4
+HTTP_ACCEPTED = 202
+HTTP_NOT_FOUND = 404
+
+
+class Count(BaseModel):
+    """Partial result counting finished chunks."""
+
+    value: int
+
+
+def count_chunks(job: Job) -> Count:
+    """Report one partial result per chunk."""
+    for value in range(1, CHUNKS + 1):
+        job.advance(Count(value=value))
+    return Count(value=CHUNKS)
+
+
+def collect(job: Job, heartbeat: float = WAIT_SECONDS) -> list[dict[str, object]]:
+    """Drain a job's event stream on a fresh event loop."""
+
+    async def drain() -> list[dict[str, object]]:
+        return [event async for event in job.events(heartbeat, POLL_SECONDS)]
+
+    return asyncio.run(drain())
+
+
+def test_job_reports_progress_and_result() -> None:
+    """Publish a progress event per chunk, then the final result."""
+    manager = JobManager(workers=1, max_queued=1)
+
+    job = manager.submit("sweep", CHUNKS, count_chunks)
+    events = collect(job)
+
+    assert [event["type"] for event in events] == ["progress"] * CHUNKS + ["result"]
+    assert events[0]["completed_chunks"] == 1
+    assert events[0]["total_chunks"] == CHUNKS
+    assert job.status().state == "succeeded"
+    assert job.status().completed_chunks == CHUNKS
+    assert manager.get(job.id).result == Count(value=CHUNKS)
+
+
+def test_job_keeps_only_the_latest_partial() -> None:
+    """Replace the partial result after every chunk."""
+    job = Job("sweep", CHUNKS)
+    seen: list[BaseModel | None] = []
+
+    def record(job: Job) -> Count:
+        for value in range(1, CHUNKS + 1):
+            job.advance(Count(value=value))
+            seen.append(job.latest())
+        return Count(value=0)
+
+    job.run(record)
+
+    assert seen == [Count(value=value) for value in range(1, CHUNKS + 1)]
+    assert job.latest() == Count(value=0)
+
+
+def test_progress_events_stream_the_latest_partial() -> None:
+    """Attach the partial current at emission to each progress event while running."""
+    manager = JobManager(workers=1, max_queued=1)
+    consumed = [threading.Event() for _ in range(CHUNKS)]
+
+    def stepped(job: Job) -> Count:
+        for value in range(1, CHUNKS + 1):
+            job.advance(Count(value=value))
+            consumed[value - 1].wait(WAIT_SECONDS)
+        return Count(value=0)
+
+    async def follow(job: Job) -> list[dict[str, object]]:
+        events = []
+        async for event in job.events(WAIT_SECONDS, POLL_SECONDS):
+            events.append(event)
+            if event["type"] == "progress":
+                consumed[int(str(event["completed_chunks"])) - 1].set()
+        return events
+
+    events = asyncio.run(follow(manager.submit("sweep", CHUNKS, stepped)))
+
+    assert [event.get("partial") for event in events[:-1]] == [
+        {"value": value} for value in range(1, CHUNKS + 1)
+    ]
+    assert events[-1] == {"type": "result", "result": {"value": 0}}
+
+
+def test_jobs_cancel_and_bound_the_queue() -> None:
+    """Stop running jobs at a chunk boundary and refuse work beyond the queue."""
+    manager = JobManager(workers=1, max_queued=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocked(job: Job) -> Count:
+        started.set()
+        release.wait(WAIT_SECONDS)
+        job.advance(Count(value=1))
+        return Count(value=1)
+
+    running = manager.submit("montecarlo", 1, blocked)
+    assert started.wait(WAIT_SECONDS)
+    queued = manager.submit("montecarlo", 1, blocked)
+    with pytest.raises(JobQueueFullError):
+        manager.submit("montecarlo", 1, blocked)
+
+    manager.cancel(queued.id)
+    manager.cancel(running.id)
+    release.set()
+
+    assert [event["type"] for event in collect(running)] == ["cancelled"]
+    assert running.status().state == queued.status().state == "cancelled"
+    assert running.status().completed_chunks == 0
+
+
+def test_job_events_send_heartbeats_while_idle() -> None:
+    """Yield heartbeats while a running job has nothing new to report."""
+    manager = JobManager(workers=1, max_queued=1)
+    release = threading.Event()
+    job = manager.submit("sweep", 1, lambda _: Count(value=int(release.wait(WAIT_SECONDS))))
+
+    async def follow() -> tuple[dict[str, object], list[dict[str, object]]]:
+        events = job.events(HEARTBEAT_SECONDS, POLL_SECONDS)
+        first = await anext(events)
+        release.set()
+        return first, [event async for event in events]
+
+    first, rest = asyncio.run(follow())
+
+    assert first == {"type": "heartbeat"}
+    assert rest[-1] == {"type": "result", "result": {"value": 1}}
+
+
+def test_event_streams_do_not_hold_worker_threads(client: TestClient) -> None:
+    """Keep answering sync endpoints while more streams are open than worker threads."""
+    release = threading.Event()
+    job = job_manager().submit("sweep", 1, lambda _: Count(value=int(release.wait(WAIT_SECONDS))))
+    payload = make_request().base.model_dump(mode="json")
+
+    async def exercise() -> tuple[int, list[httpx.Response]]:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_TOKENS
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as remote:
+            streams = [
+                asyncio.create_task(remote.get(f"/api/v1/jobs/{job.id}/events"))
+                for _ in range(SUBSCRIBERS)
+            ]
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                simulated = await asyncio.wait_for(
+                    remote.post("/api/v1/simulate", json=payload), WAIT_SECONDS
+                )
+            finally:
+                release.set()
+            return simulated.status_code, await asyncio.gather(*streams)
+
+    status, streams = asyncio.run(exercise())
+
+    assert status == HTTP_OK
+    assert all(json.loads(stream.text.splitlines()[-1])["type"] == "result" for stream in streams)
+
+
+def test_sweep_job_matches_synchronous_sweep(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    """Stream partial sweeps per pass and finish with the synchronous response."""
+    monkeypatch.setattr(sweep, "CHUNK_POINTS", SWEEP_CHUNK)
+    payload = make_request().model_dump(mode="json")
+
+    submitted = client.post("/api/v1/jobs/sweep", json=payload)
+    job_id = submitted.json()["id"]
+    with client.stream("GET", f"/api/v1/jobs/{job_id}/events") as stream:
+        events = [json.loads(line) for line in stream.iter_lines()]
+    result = client.get(f"/api/v1/jobs/{job_id}/result")
+    partial = client.get(f"/api/v1/jobs/{job_id}/partial")
+    expected = client.post("/api/v1/sweep", json=payload)
+
+    assert submitted.status_code == HTTP_ACCEPTED
+    assert [event["completed_chunks"] for event in events[:-1]] == [1, 2]
+    assert submitted.json()["total_chunks"] == len(events) - 1
+    assert events[-1]["result"] == result.json() == partial.json() == expected.json()
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["state"] == "succeeded"
+    assert client.get("/api/v1/jobs/missing").status_code == HTTP_NOT_FOUND
@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
-from typing import Any
-from unittest.mock import Mock
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, TypeVar
+from unittest.mock import AsyncMock
 
+import httpx
 import pytest
-import requests
+from fastapi.testclient import TestClient
 
+from backend.app import llm
+from backend.app.cache import answer_cache
 from backend.app.llm import (
     HTTP_BAD_GATEWAY,
     HTTP_TOO_MANY_REQUESTS,
@@ -17,17 +22,60 @@ from backend.app.llm import (
     _handle_http_error,
     ask_openai,
     ask_with_provider,
+    build_prompt_digest,
 )
+from backend.app.main import app
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+T = TypeVar("T")
+
+OK_BODY = {"choices": [{"message": {"content": "OK"}}]}
+CONCURRENCY = 2
+STUB_REQUESTS = 6
+RETRIED_ATTEMPTS = 2
+DISTINCT_QUESTIONS = 2
+RETRY_CAP_SECONDS = 0.01
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    """Build an HTTP status error for a response with the given status."""
+    request = httpx.Request("POST", llm.OPENAI_URL)
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def use_transport(
+    monkeypatch: pytest.MonkeyPatch,
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> None:
+    """Route the shared client through a mock transport."""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm, "http_client", lambda: client)
+
+
+def run_llm(make: Callable[[], Awaitable[T]]) -> T:
+    """Await a provider call on a fresh loop with the shared resources open."""
+
+    async def session() -> T:
+        async with llm.llm_resources():
+            return await make()
+
+    return asyncio.run(session())
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Give every test an empty answer cache and instant retries."""
+    answer_cache.invalidate()
+    monkeypatch.setattr(llm, "prompt_stats", llm.PromptStats())
+    monkeypatch.setenv("LLM_RETRY_BACKOFF_SECONDS", "0")
 
 
 def test_handle_http_error_rate_limit() -> None:
     """Ensure 429 errors map to user-friendly rate limit responses."""
-    response = requests.Response()
-    response.status_code = HTTP_TOO_MANY_REQUESTS
-    error = requests.HTTPError()
-    error.response = response
-
-    handled = _handle_http_error(error)
+    handled = _handle_http_error(status_error(HTTP_TOO_MANY_REQUESTS))
 
     assert isinstance(handled, LLMError)
     assert handled.status_code == HTTP_TOO_MANY_REQUESTS
@@ -35,12 +83,7 @@ def test_handle_http_error_rate_limit() -> None:
 
 def test_handle_http_error_unauthorized() -> None:
     """Ensure 401 errors map to API key messages."""
-    response = requests.Response()
-    response.status_code = HTTP_UNAUTHORIZED
-    error = requests.HTTPError()
-    error.response = response
-
-    handled = _handle_http_error(error)
+    handled = _handle_http_error(status_error(HTTP_UNAUTHORIZED))
 
     assert handled.status_code == HTTP_UNAUTHORIZED
     assert "API key" in handled.detail
@@ -48,12 +91,7 @@ def test_handle_http_error_unauthorized() -> None:
 
 def test_handle_http_error_unknown_defaults_to_bad_gateway() -> None:
     """Ensure unknown HTTP statuses map to 502."""
-    response = requests.Response()
-    response.status_code = 418
-    error = requests.HTTPError()
-    error.response = response
-
-    handled = _handle_http_error(error)
+    handled = _handle_http_error(status_error(418))
 
     assert handled.status_code == HTTP_BAD_GATEWAY
     assert "418" in handled.detail
@@ -84,59 +122,76 @@ def test_extract_message_content_missing_content() -> None:
 def test_ask_openai_success(monkeypatch: pytest.MonkeyPatch) -> None:
     """Return content for a successful OpenAI response."""
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=OK_BODY)
 
-    response = Mock()
-    response.raise_for_status = Mock()
-    response.json.return_value = {"choices": [{"message": {"content": "OK"}}]}
-    post = Mock(return_value=response)
-    monkeypatch.setattr(requests, "post", post)
+    use_transport(monkeypatch, handler)
 
-    answer = ask_openai("Question?", {"portfolio": 100}, {"success_rate": 0.5})
+    answer = run_llm(lambda: ask_openai("Question?", {"portfolio": 100}, {"success_rate": 0.5}))
 
     assert answer == "OK"
-    post.assert_called_once()
+    assert len(requests) == 1
+    assert requests[0].headers["Authorization"] == "Bearer test-key"
 
 
 def test_ask_openai_missing_api_key(monkeypatch: pytest.MonkeyPatch) -> None:
     """Raise when OPENAI_API_KEY is missing."""
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
     with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
-        ask_openai("Question?", {}, {})
+        asyncio.run(ask_openai("Question?", {}, {}))
+
+
+def test_ask_openai_retries_rate_limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retry 429 responses and return the first successful answer."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    statuses = iter([HTTP_TOO_MANY_REQUESTS, HTTP_TOO_MANY_REQUESTS, 200])
+    use_transport(monkeypatch, lambda _: httpx.Response(next(statuses), json=OK_BODY))
+
+    assert run_llm(lambda: ask_openai("Question?", {}, {})) == "OK"
 
 
 def test_ask_openai_http_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Map HTTP errors into LLMError responses."""
+    """Map HTTP errors into LLMError responses once retries are exhausted."""
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_MAX_RETRIES", "1")
+    attempts: list[httpx.Request] = []
 
-    response = Mock()
-    response.raise_for_status.side_effect = requests.HTTPError(
-        response=requests.Response()
-    )
-    response.raise_for_status.side_effect.response.status_code = HTTP_TOO_MANY_REQUESTS
-    post = Mock(return_value=response)
-    monkeypatch.setattr(requests, "post", post)
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        return httpx.Response(HTTP_TOO_MANY_REQUESTS, headers={"Retry-After": "0"})
+
+    use_transport(monkeypatch, handler)
 
     with pytest.raises(LLMError, match="Rate limited"):
-        ask_openai("Question?", {}, {})
+        run_llm(lambda: ask_openai("Question?", {}, {}))
+    assert len(attempts) == RETRIED_ATTEMPTS
 
 
 def test_ask_openai_request_exception(monkeypatch: pytest.MonkeyPatch) -> None:
     """Map network exceptions into LLMError."""
     monkeypatch.setenv("OPENAI_API_KEY", "test-key")
-    monkeypatch.setattr(requests, "post", Mock(side_effect=requests.RequestException))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        message = "offline"
+        raise httpx.ConnectError(message, request=request)
+
+    use_transport(monkeypatch, handler)
 
     with pytest.raises(LLMError) as exc:
-        ask_openai("Question?", {}, {})
+        run_llm(lambda: ask_openai("Question?", {}, {}))
 
     assert exc.value.status_code == HTTP_BAD_GATEWAY
 
 
 def test_ask_with_provider_openai(monkeypatch: pytest.MonkeyPatch) -> None:
     """Route to OpenAI by default."""
-    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
-    monkeypatch.setattr("backend.app.llm.ask_openai", Mock(return_value="OK"))
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    monkeypatch.setattr("backend.app.llm.ask_openai", AsyncMock(return_value="OK"))
 
-    answer = ask_with_provider("Question?", {}, {})
+    answer = run_llm(lambda: ask_with_provider("Question?", {}, {}))
 
     assert answer == "OK"
 
@@ -145,4 +200,117 @@ def test_ask_with_provider_unsupported(monkeypatch: pytest.MonkeyPatch) -> None:
     """Raise when an unsupported provider is requested."""
     monkeypatch.setenv("LLM_PROVIDER", "unknown")
     with pytest.raises(RuntimeError, match="Unsupported LLM provider"):
-        ask_with_provider("Question?", {}, {})
+        asyncio.run(ask_with_provider("Question?", {}, {}))
+
+
+def test_stub_provider_respects_concurrency_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The stub answers offline and never exceeds the configured concurrency."""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", str(CONCURRENCY))
+    monkeypatch.setenv("LLM_STUB_LATENCY_MS", "10")
+    active = 0
+    peak = 0
+    sleep = asyncio.sleep
+
+    async def tracked(delay: float) -> None:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await sleep(delay)
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(llm.asyncio, "sleep", tracked)
+
+    async def burst() -> list[str]:
+        return await asyncio.gather(
+            *(ask_with_provider("Why?", {}, {"success_rate": 0.5}) for _ in range(STUB_REQUESTS))
+        )
+
+    answers = run_llm(burst)
+
+    assert peak == CONCURRENCY
+    assert len(answers) == STUB_REQUESTS
+    assert json.loads(answers[0])["suggestions"] == ["Lower the starting withdrawal rate."]
+
+
+def test_retry_waits_are_capped_and_release_the_slot(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Cap a long Retry-After and wait for it without holding a concurrency slot."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "1")
+    monkeypatch.setenv("LLM_RETRY_MAX_SECONDS", str(RETRY_CAP_SECONDS))
+    statuses = iter([HTTP_TOO_MANY_REQUESTS, 200])
+    use_transport(
+        monkeypatch,
+        lambda _: httpx.Response(next(statuses), headers={"Retry-After": "3600"}, json=OK_BODY),
+    )
+    waits: list[tuple[float, bool]] = []
+    sleep = asyncio.sleep
+
+    async def recorded(delay: float) -> None:
+        waits.append((delay, llm.request_slots().locked()))
+        await sleep(delay)
+
+    monkeypatch.setattr(llm.asyncio, "sleep", recorded)
+
+    assert run_llm(lambda: ask_openai("Question?", {}, {})) == "OK"
+    assert waits == [(RETRY_CAP_SECONDS, False)]
+
+
+def test_ask_endpoint_uses_stub_provider(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Serve /api/v1/ask from the local stub without network access."""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/ask",
+            json={"question": "Why?", "inputs": {}, "summary": {"success_rate": 0.95}},
+        )
+
+    assert response.is_success
+    assert json.loads(response.json()["answer"])["summary"] == "Stub answer to: Why?"
+
+
+def test_prompt_digest_rounds_and_drops_redundant_fields() -> None:
+    """Round floats to significant digits and drop derivable summary fields."""
+    inputs, summary = build_prompt_digest(
+        {"portfolio_start": 1234567.891, "ss_recipients": [], "stock_allocation": 0.6},
+        {
+            "total_runs": 94,
+            "success_count": 77,
+            "failure_count": 17,
+            "success_rate": 0.819148936,
+            "ending_balance_percentiles": {"p10": 12345.678, "p50": 800000.0, "p90": 2e6},
+            "portfolio_quantiles": {"p0": -150123.45, "p50": 800000.0},
+        },
+    )
+
+    assert inputs == {"portfolio_start": 1235000.0, "stock_allocation": 0.6}
+    assert summary == {
+        "total_runs": 94,
+        "success_rate": 0.8191,
+        "ending_balance_percentiles": {"p10": 12350.0, "p90": 2e6},
+        "portfolio_quantiles": {"p0": -150100.0, "p50": 800000.0},
+    }
+
+
+def test_answers_are_cached_per_normalized_question(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Serve repeated questions from the cache and count compacted prompt bytes."""
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    provider = AsyncMock(return_value="Answer")
+    monkeypatch.setattr(llm, "ask_stub", provider)
+    summary: dict[str, object] = {"success_rate": 0.8191489, "success_count": 77}
+    before = answer_cache.stats()
+
+    first = run_llm(lambda: ask_with_provider("Why did it fail?", {}, summary))
+    second = run_llm(lambda: ask_with_provider("  why did it  FAIL? ", {}, summary))
+    run_llm(lambda: ask_with_provider("What now?", {}, summary))
+
+    assert first == second == "Answer"
+    assert provider.await_count == DISTINCT_QUESTIONS
+    after = answer_cache.stats()
+    assert after.hits - before.hits == 1
+    assert after.misses - before.misses == DISTINCT_QUESTIONS
+    assert llm.prompt_stats.prompts == DISTINCT_QUESTIONS
+    assert 0 < llm.prompt_stats.compact_bytes < llm.prompt_stats.raw_bytes
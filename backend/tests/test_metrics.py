@@ -0,0 +1,76 @@
+"""Tests for stage timing and the Prometheus metrics endpoint."""
+
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from backend.app.metrics import (
+    CACHE_LOOKUPS,
+    Registry,
+    server_timing,
+    stage,
+)
+from backend.app.models import SimulationInput, SimulationResponse
+
+START_YEAR = 1950
+HORIZON = 10
+
+
+def make_payload() -> dict[str, object]:
+    """Build a simulate request body that fits the synthetic series."""
+    return SimulationInput(
+        start_year=START_YEAR,
+        retirement_years=HORIZON,
+        portfolio_start=1000,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.04,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.05,
+        inflation_rate=0.02,
+    ).model_dump(mode="json")
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Render buckets cumulatively with sum and count lines."""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",))
+    histogram.observe(("/a",), 0.002)
+    histogram.observe(("/a",), 20.0)
+
+    text = registry.render()
+
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.001"} 0' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.0025"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{route="/a"} 2' in text
+
+
+def test_stage_is_a_no_op_outside_requests() -> None:
+    """Stages outside an instrumented request record nothing."""
+    with stage("load"):
+        pass
+
+    assert server_timing([("load", 0.0015)], 0.002) == "load;dur=1.500, total;dur=2.000"
+
+
+def test_simulate_reports_stage_timings_and_metrics(client: TestClient) -> None:
+    """Time each simulate stage, keep the JSON body unchanged and count cache lookups."""
+    hits = CACHE_LOOKUPS.value(("simulation", "hit"))
+
+    first = client.post("/api/v1/simulate", json=make_payload())
+    second = client.post("/api/v1/simulate", json=make_payload())
+    scrape = client.get("/metrics")
+
+    stages = [entry.split(";")[0] for entry in first.headers["server-timing"].split(", ")]
+    assert stages == ["load", "simulate", "summarize", "encode", "total"]
+    assert "simulate" not in second.headers["server-timing"]
+    adapter = TypeAdapter(SimulationResponse)
+    assert first.content == adapter.dump_json(adapter.validate_json(first.content))
+    assert CACHE_LOOKUPS.value(("simulation", "hit")) == hits + 1
+    assert scrape.headers["content-type"].startswith("text/plain")
+    assert 'http_requests_total{method="POST",route="/api/v1/simulate",status="200"}' in (
+        scrape.text
+    )
+    assert 'request_stage_duration_seconds_count{stage="encode"}' in scrape.text
+    assert 'simulated_paths_total{kind="rolling"}' in scrape.text
@@ -0,0 +1,90 @@
+"""Tests for block-bootstrapped Monte Carlo simulations."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.app import montecarlo
+from backend.app.data import HistoricalSeries
+from backend.app.models import MonteCarloRequest, SimulationInput
+from backend.app.montecarlo import chunk_sizes, run_monte_carlo, stationary_bootstrap_indices
+
+N_YEARS = 40
+PATHS = 2_000
+HORIZON = 30
+CHUNK = 700
+MEAN_BLOCK_LENGTH = 4.0
+CONTINUE_TOLERANCE = 0.02
+
+
+def make_request(seed: int = 1) -> MonteCarloRequest:
+    """Build a Monte Carlo request longer than the series itself."""
+    inputs = SimulationInput(
+        start_year=2030,
+        retirement_years=N_YEARS + 10,
+        portfolio_start=1000.0,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.05,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.06,
+        management_fee=0.01,
+        inflation_rate=0.03,
+        ss_recipients=[],
+    )
+    return MonteCarloRequest(inputs=inputs, paths=PATHS, seed=seed)
+
+
+def test_bootstrap_blocks_have_requested_mean_length() -> None:
+    """Ensure blocks continue consecutively and restart at the requested rate."""
+    rng = np.random.default_rng(0)
+    indices = stationary_bootstrap_indices(rng, N_YEARS, PATHS, HORIZON, MEAN_BLOCK_LENGTH)
+
+    continued = indices[:, 1:] == (indices[:, :-1] + 1) % N_YEARS
+    assert indices.shape == (PATHS, HORIZON)
+    assert indices.min() >= 0
+    assert indices.max() < N_YEARS
+    expected = 1 - 1 / MEAN_BLOCK_LENGTH
+    assert abs(continued.mean() - expected) < CONTINUE_TOLERANCE
+
+
+def test_chunk_sizes_cover_all_paths() -> None:
+    """Split paths into fixed-size chunks plus a remainder."""
+    assert chunk_sizes(25_001) == [10_000, 10_000, 5_001]
+
+
+def test_monte_carlo_is_reproducible_across_executors(
+    monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries
+) -> None:
+    """The same seed yields the same summary inline and on a worker pool."""
+    monkeypatch.setattr(montecarlo, "CHUNK_PATHS", CHUNK)
+
+    inline = run_monte_carlo(make_request(), series)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pooled = run_monte_carlo(make_request(), series, executor)
+    reseeded = run_monte_carlo(make_request(seed=2), series)
+
+    assert inline.summary == pooled.summary
+    assert inline.summary.total_runs == PATHS
+    assert inline.summary != reseeded.summary
+    assert 0 < inline.summary.success_count <= PATHS
+
+
+def test_large_runs_merge_worker_sketches(
+    monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries
+) -> None:
+    """Sketched summaries are reproducible across executors and report their error."""
+    monkeypatch.setattr(montecarlo, "CHUNK_PATHS", CHUNK)
+    exact = run_monte_carlo(make_request(), series)
+
+    monkeypatch.setattr(montecarlo, "EXACT_SUMMARY_PATHS", CHUNK)
+    inline = run_monte_carlo(make_request(), series)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pooled = run_monte_carlo(make_request(), series, executor)
+
+    assert exact.rank_error == 0
+    assert 0 < inline.rank_error < 1
+    assert inline == pooled
+    assert inline.summary.success_count == exact.summary.success_count
+    assert inline.summary.portfolio_quantiles["p100"] == exact.summary.portfolio_quantiles["p100"]
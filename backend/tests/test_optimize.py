@@ -0,0 +1,94 @@
+"""Tests for the allocation and guardrail optimizer."""
+
+from collections.abc import Sequence
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import optimize
+from backend.app.data import HistoricalSeries
+from backend.app.models import OptimizeCandidate, OptimizeRequest, SimulationInput
+from backend.app.optimize import Point, frontier, run_optimizer, score
+
+MAX_EVALUATIONS = 60
+HTTP_BAD_REQUEST = 400
+
+
+def make_request(**settings: object) -> OptimizeRequest:
+    """Build an optimizer request around a 60/40 guardrail plan."""
+    base = SimulationInput(
+        start_year=1950,
+        retirement_years=30,
+        portfolio_start=1_000_000.0,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.045,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.06,
+        management_fee=0.005,
+        inflation_rate=0.03,
+        ss_recipients=[],
+    )
+    return OptimizeRequest.model_validate(
+        {"base": base, "max_evaluations": MAX_EVALUATIONS, **settings}
+    )
+
+
+def candidate(success_rate: float, spend: float, *, feasible: bool = True) -> OptimizeCandidate:
+    """Build a candidate that differs only in its metrics."""
+    return OptimizeCandidate(
+        stock_allocation=0.5,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.05,
+        withdrawal_smoothing_up=1.0,
+        withdrawal_smoothing_down=1.0,
+        success_rate=success_rate,
+        median_ending_balance=0.0,
+        median_annual_spend=spend,
+        feasible=feasible,
+    )
+
+
+def test_frontier_keeps_feasible_non_dominated_candidates() -> None:
+    """Drop infeasible and dominated candidates and order the rest by spend."""
+    kept = [candidate(1.0, 30.0), candidate(0.9, 40.0), candidate(0.7, 50.0)]
+    dominated = [candidate(0.8, 35.0), candidate(0.7, 40.0), candidate(1.0, 60.0, feasible=False)]
+
+    assert frontier([*dominated, *kept], make_request()) == kept
+
+
+def test_optimizer_memoizes_and_returns_the_best_candidate(
+    monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries
+) -> None:
+    """Simulate each candidate once and return the best feasible one."""
+    request = make_request(min_spend=35_000.0)
+    simulated: list[Point] = []
+    evaluate = optimize.evaluate
+
+    def counting(
+        request: OptimizeRequest,
+        points: Sequence[Point],
+        series: HistoricalSeries,
+    ) -> list[OptimizeCandidate]:
+        simulated.extend(points)
+        return evaluate(request, points, series)
+
+    monkeypatch.setattr(optimize, "evaluate", counting)
+    response = run_optimizer(request, series)
+
+    assert len(simulated) == len(set(simulated)) == response.evaluations <= MAX_EVALUATIONS
+    assert response.best.feasible
+    assert response.best.median_annual_spend >= request.min_spend
+    assert response.frontier
+    assert all(score(item, request) <= score(response.best, request) for item in response.frontier)
+
+
+def test_optimize_endpoint_rejects_rates_outside_the_search_range(
+    client: TestClient,
+) -> None:
+    """Answer 400 when the starting rate lies outside the guardrail search range."""
+    payload = make_request(min_rate=0.05).model_dump(mode="json")
+
+    response = client.post("/api/v1/optimize", json=payload)
+
+    assert response.status_code == HTTP_BAD_REQUEST
@@ -0,0 +1,205 @@
+"""Tests for simulation outcome encodings."""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app import main
+from backend.app.data import HistoricalSeries
+from backend.app.models import ResultView, SimulationInput
+from backend.app.results import (
+    BINARY_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    decode_binary,
+    encode_binary,
+    encode_columnar,
+    encode_json,
+    negotiate_format,
+    run_simulation,
+    to_response,
+)
+
+HORIZON = 20
+HTTP_BAD_REQUEST = 400
+
+
+def make_input() -> SimulationInput:
+    """Build a simulation input with fees and Social Security."""
+    return SimulationInput.model_validate(
+        {
+            "start_year": 1950,
+            "retirement_years": HORIZON,
+            "portfolio_start": 500000,
+            "stock_allocation": 0.6,
+            "bond_allocation": 0.4,
+            "withdrawal_rate_start": 0.04,
+            "withdrawal_rate_min": 0.03,
+            "withdrawal_rate_max": 0.06,
+            "management_fee": 0.01,
+            "inflation_rate": 0.02,
+            "ss_recipients": [{"start_year": 1960, "monthly_amount": 1000}],
+        }
+    )
+
+
+def test_negotiate_format_prefers_flag_then_accept() -> None:
+    """Use the explicit flag first and the Accept header otherwise."""
+    assert negotiate_format("binary", COLUMNAR_MEDIA_TYPE) == "binary"
+    assert negotiate_format(None, COLUMNAR_MEDIA_TYPE) == "columnar"
+    assert negotiate_format(None, "application/octet-stream") == "binary"
+    assert negotiate_format(None, "application/json") == "json"
+    assert negotiate_format(None, None) == "json"
+
+
+def test_columnar_matches_per_start_year_results(series: HistoricalSeries) -> None:
+    """Columnar matrices carry the same values as the per-start-year results."""
+    outcome = run_simulation(make_input(), series)
+    response = to_response(outcome)
+
+    payload = json.loads(encode_columnar(outcome))
+
+    assert payload["start_years"] == [item.start_year for item in response.results]
+    assert payload["balances"] == [item.yearly_balances for item in response.results]
+    assert payload["fees"] == [item.yearly_fees for item in response.results]
+    assert payload["withdrawals"][3] == response.results[3].yearly_withdrawals
+    assert payload["summary"] == response.summary.model_dump(mode="json")
+
+
+def test_binary_round_trips_in_both_precisions(series: HistoricalSeries) -> None:
+    """Binary payloads decode to the original matrices."""
+    outcome = run_simulation(make_input(), series)
+
+    header, arrays = decode_binary(encode_binary(outcome))
+    _, narrow = decode_binary(encode_binary(outcome, "float32"))
+
+    assert header["dtype"] == "<f8"
+    assert arrays["balances"].shape == (len(header["start_years"]), HORIZON + 1)
+    np.testing.assert_array_equal(arrays["withdrawals"], outcome.matrix("withdrawals"))
+    np.testing.assert_allclose(narrow["fees"], outcome.matrix("fees"), rtol=1e-6)
+
+
+@pytest.mark.parametrize("view", ["runs", "bands", "full"])
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {},
+        {"portfolio_start": 5e16},
+        {"portfolio_start": 1.0, "management_fee": 1e-9},
+        {"withdrawal_rate_start": 0.3, "withdrawal_rate_min": 0.2, "withdrawal_rate_max": 0.4},
+    ],
+)
+def test_encode_json_matches_response_model(
+    view: ResultView, overrides: dict[str, float], series: HistoricalSeries
+) -> None:
+    """The trusted fast path writes the same bytes as the validated response model."""
+    req = make_input().model_copy(update=overrides)
+    outcome = run_simulation(req, series, "scalar")
+
+    assert encode_json(outcome, view) == to_response(outcome, view).model_dump_json().encode()
+
+
+def test_simulate_endpoint_negotiates_and_compresses(client: TestClient) -> None:
+    """Serve the compact encodings on request and gzip large bodies."""
+    payload = make_input().model_dump(mode="json")
+
+    default = client.post("/api/v1/simulate", json=payload)
+    columnar = client.post(
+        "/api/v1/simulate", json=payload, headers={"Accept": COLUMNAR_MEDIA_TYPE}
+    )
+    binary = client.post("/api/v1/simulate?format=binary&precision=float32", json=payload)
+
+    assert default.headers["content-encoding"] == "gzip"
+    assert columnar.headers["content-type"] == COLUMNAR_MEDIA_TYPE
+    assert len(columnar.content) < len(default.content)
+    assert binary.headers["content-type"] == BINARY_MEDIA_TYPE
+    header, _ = decode_binary(binary.content)
+    assert header["dtype"] == "<f4"
+
+
+def test_simulate_views_return_runs_bands_or_both(client: TestClient) -> None:
+    """Swap the runs for fixed-size percentile bands, or add them, in the JSON format."""
+    payload = make_input().model_dump(mode="json")
+
+    runs = client.post("/api/v1/simulate", json=payload).json()
+    bands = client.post("/api/v1/simulate?view=bands", json=payload).json()
+    full = client.post("/api/v1/simulate?view=full", json=payload).json()
+    columnar = client.post("/api/v1/simulate?view=bands&format=columnar", json=payload)
+
+    assert "bands" not in runs
+    assert "results" not in bands
+    assert bands["summary"] == runs["summary"]
+    assert full["results"] == runs["results"]
+    assert full["bands"] == bands["bands"]
+    assert len(bands["bands"]["balances"]["p50"]) == HORIZON + 1
+    assert len(bands["bands"]["withdrawals"]["p95"]) == HORIZON
+    first_year = [result["yearly_balances"][0] for result in runs["results"]]
+    assert bands["bands"]["balances"]["p5"][0] == min(first_year)
+    assert columnar.status_code == HTTP_BAD_REQUEST
+
+
+def test_ndjson_stream_matches_full_response(client: TestClient) -> None:
+    """Stream one line per start year and a trailing summary equal to the full response."""
+    payload = make_input().model_dump(mode="json")
+
+    full = client.post("/api/v1/simulate", json=payload).json()
+    streams = [
+        client.post(f"/api/v1/simulate/stream?engine={engine}", json=payload)
+        for engine in ("scalar", "vectorized", "vectorized")
+    ]
+
+    for stream in streams:
+        assert stream.headers["content-type"] == NDJSON_MEDIA_TYPE
+        records = [json.loads(line) for line in stream.text.splitlines()]
+        trailer = records.pop()
+        assert trailer["type"] == "summary"
+        assert trailer["summary"] == full["summary"]
+        assert trailer["quantile_indices"] == full["quantile_indices"]
+        assert [{k: v for k, v in r.items() if k != "type"} for r in records] == full["results"]
+
+
+def test_monthly_engine_reports_start_months(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    """Serve monthly runs with start months; annual runs keep their original shape."""
+    rng = np.random.default_rng(5)
+    months = 40 * 12
+    monthly = HistoricalSeries.from_columns(
+        range(1950 * 12, 1950 * 12 + months),
+        rng.uniform(-0.05, 0.05, months),
+        rng.uniform(0.0, 0.005, months),
+        periods_per_year=12,
+    )
+    monkeypatch.setattr(main, "load_monthly_series", lambda: monthly)
+    payload = make_input().model_dump(mode="json")
+
+    yearly = client.post("/api/v1/simulate", json=payload).json()
+    response = client.post("/api/v1/simulate?engine=monthly", json=payload).json()
+    columnar = client.post("/api/v1/simulate?engine=monthly&format=columnar", json=payload)
+
+    assert "start_month" not in yearly["results"][0]
+    assert response["series"] == {"min_year": 1950, "max_year": 1989}
+    assert len(response["results"]) == months - HORIZON * 12 + 1
+    assert response["summary"]["total_runs"] == len(response["results"])
+    first = response["results"][0]
+    assert (first["start_year"], first["start_month"], first["highlight"]) == (1950, 1, True)
+    assert len(first["yearly_balances"]) == HORIZON + 1
+    assert columnar.json()["start_months"][:13] == [*range(1, 13), 1]
+    outcome = run_simulation(make_input(), monthly, "monthly")
+    assert encode_json(outcome) == to_response(outcome).model_dump_json().encode()
+
+
+def test_simulate_rejects_unknown_or_unbalanced_assets(client: TestClient) -> None:
+    """Answer 400 for allocations naming missing assets or not summing to one."""
+    payload = make_input().model_dump(mode="json")
+
+    unknown = client.post(
+        "/api/v1/simulate", json={**payload, "allocations": {"stock": 0.5, "gold": 0.5}}
+    )
+    unbalanced = client.post("/api/v1/simulate", json={**payload, "allocations": {"stock": 0.5}})
+
+    assert unknown.status_code == HTTP_BAD_REQUEST
+    assert unknown.json()["detail"] == "Unknown assets: gold. Available: stock, bond."
+    assert unbalanced.status_code == HTTP_BAD_REQUEST
@@ -0,0 +1,116 @@
+"""Tests for tornado sensitivity analysis."""
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from backend.app import sensitivity
+from backend.app.data import HistoricalSeries
+from backend.app.models import SensitivityRequest, SimulationInput, SSRecipient
+from backend.app.sensitivity import perturb, run_sensitivity
+from backend.app.simulate import PathResult, simulate_scenarios
+
+SS_START = 1965
+FIELDS = 11
+HTTP_UNPROCESSABLE = 422
+BASE_RATE = 0.05
+MAX_RATE = 0.07
+
+
+def make_base() -> SimulationInput:
+    """Build a guardrail plan with fees and Social Security."""
+    return SimulationInput(
+        start_year=1950,
+        retirement_years=25,
+        portfolio_start=1_000_000.0,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.05,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.07,
+        withdrawal_smoothing_up=0.5,
+        withdrawal_smoothing_down=0.5,
+        management_fee=0.0,
+        inflation_rate=0.03,
+        ss_recipients=[SSRecipient(start_year=SS_START, monthly_amount=2000.0)],
+    )
+
+
+def test_perturb_keeps_fields_in_range() -> None:
+    """Clamp absolute steps, move bonds with stocks and shift Social Security."""
+    base = make_base()
+
+    assert perturb(base, "management_fee", 0.0025, -1).management_fee == 0.0
+    assert perturb(base, "stock_allocation", 0.1, 1).bond_allocation == pytest.approx(0.3)
+    assert perturb(base, "ss_start_year", 2, -1).ss_recipients[0].start_year == SS_START - 2
+    assert perturb(base, "portfolio_start", 0.1, 1).portfolio_start == pytest.approx(1.1e6)
+
+
+def test_perturb_keeps_the_guardrail_band_ordered() -> None:
+    """Clamp the starting rate to the band and each bound to the starting rate."""
+    base = make_base()
+
+    assert perturb(base, "withdrawal_rate_start", 0.05, 1).withdrawal_rate_start == MAX_RATE
+    assert perturb(base, "withdrawal_rate_min", 0.05, 1).withdrawal_rate_min == BASE_RATE
+    assert perturb(base, "withdrawal_rate_max", 0.05, -1).withdrawal_rate_max == BASE_RATE
+    with pytest.raises(ValidationError):
+        perturb(base, "withdrawal_rate_min", 0.05, -1)
+
+
+def test_relative_steps_must_stay_below_one() -> None:
+    """Reject fractional steps that would make the portfolio negative."""
+    with pytest.raises(ValidationError, match="below 1"):
+        SensitivityRequest(base=make_base(), steps={"portfolio_start": 2.0})
+
+
+def test_sensitivity_reports_fields_with_invalid_perturbations(series: HistoricalSeries) -> None:
+    """Skip a field whose perturbation fails validation instead of simulating it."""
+    base = make_base().model_copy(
+        update={"ss_recipients": [SSRecipient(start_year=1900, monthly_amount=1.0)]}
+    )
+
+    response = run_sensitivity(SensitivityRequest(base=base), series)
+
+    assert response.skipped == ["ss_start_year"]
+    assert len(response.bars) == FIELDS - 1
+
+
+def test_sensitivity_runs_every_scenario_in_one_pass(
+    monkeypatch: pytest.MonkeyPatch, series: HistoricalSeries
+) -> None:
+    """Batch the base and 2k perturbations into one kernel call, widest swing first."""
+    calls: list[int] = []
+
+    def counting(inputs: list[SimulationInput], series: HistoricalSeries) -> PathResult:
+        calls.append(len(inputs))
+        return simulate_scenarios(inputs, series)
+
+    monkeypatch.setattr(sensitivity, "simulate_scenarios", counting)
+    response = run_sensitivity(SensitivityRequest(base=make_base()), series)
+
+    assert calls == [2 * FIELDS + 1]
+    assert len(response.bars) == FIELDS
+    swings = [abs(bar.high.success_rate - bar.low.success_rate) for bar in response.bars]
+    assert swings == sorted(swings, reverse=True)
+    rate = next(bar for bar in response.bars if bar.field == "withdrawal_rate_start")
+    assert rate.low.value == pytest.approx(0.045)
+    assert rate.low.success_rate >= response.success_rate >= rate.high.success_rate
+    assert rate.high.success_rate_change == rate.high.success_rate - response.success_rate
+
+
+def test_sensitivity_endpoint_skips_social_security_without_recipients(
+    client: TestClient,
+) -> None:
+    """Leave out Social Security bars when nobody receives benefits."""
+    base = make_base().model_copy(update={"ss_recipients": []})
+
+    response = client.post("/api/v1/sensitivity", json={"base": base.model_dump(mode="json")})
+
+    fields = {bar["field"] for bar in response.json()["bars"]}
+    assert len(fields) == FIELDS - 2
+    assert "ss_monthly_amount" not in fields
+    invalid = client.post(
+        "/api/v1/sensitivity",
+        json={"base": base.model_dump(mode="json"), "steps": {"portfolio_start": 2.0}},
+    )
+    assert invalid.status_code == HTTP_UNPROCESSABLE
@@ -2,8 +2,12 @@
 
 import math
 
-from backend.app.models import SimulationInput
-from backend.app.simulate import simulate_one_start_year
+import numpy as np
+import pytest
+
+from backend.app.data import HistoricalSeries
+from backend.app.models import SimulationInput, SSRecipient
+from backend.app.simulate import simulate_one_start_year, simulate_rolling
 
 YEARS = 2
 START_BALANCE = 100.0
@@ -16,10 +20,12 @@ NEGATIVE_YEAR_COUNT = 3
 
 def test_simulation_tracks_withdrawals_and_fees() -> None:
     """Ensure withdrawals and fees are recorded per year."""
-    series = {
-        2000: (0.0, 0.0),
-        2001: (0.0, 0.0),
-    }
+    series = HistoricalSeries.from_mapping(
+        {
+            2000: (0.0, 0.0),
+            2001: (0.0, 0.0),
+        }
+    )
     req = SimulationInput(
         start_year=2000,
         retirement_years=YEARS,
@@ -46,10 +52,12 @@ def test_simulation_tracks_withdrawals_and_fees() -> None:
 
 def test_simulation_allows_negative_balances() -> None:
     """Ensure simulations continue after falling below zero."""
-    series = {
-        2000: (0.0, 0.0),
-        2001: (0.0, 0.0),
-    }
+    series = HistoricalSeries.from_mapping(
+        {
+            2000: (0.0, 0.0),
+            2001: (0.0, 0.0),
+        }
+    )
     req = SimulationInput(
         start_year=2000,
         retirement_years=YEARS,
@@ -75,10 +83,12 @@ def test_simulation_allows_negative_balances() -> None:
 
 def test_smoothing_up_adjusts_gradually() -> None:
     """Ensure smoothing_up moderates withdrawal increases."""
-    series = {
-        2000: (0.5, 0.0),
-        2001: (0.5, 0.0),
-    }
+    series = HistoricalSeries.from_mapping(
+        {
+            2000: (0.5, 0.0),
+            2001: (0.5, 0.0),
+        }
+    )
     req = SimulationInput(
         start_year=2000,
         retirement_years=2,
@@ -103,10 +113,12 @@ def test_smoothing_up_adjusts_gradually() -> None:
 
 def test_smoothing_down_adjusts_gradually() -> None:
     """Ensure smoothing_down moderates withdrawal decreases."""
-    series = {
-        2000: (-0.5, 0.0),
-        2001: (-0.5, 0.0),
-    }
+    series = HistoricalSeries.from_mapping(
+        {
+            2000: (-0.5, 0.0),
+            2001: (-0.5, 0.0),
+        }
+    )
     req = SimulationInput(
         start_year=2000,
         retirement_years=2,
@@ -127,3 +139,172 @@ def test_smoothing_down_adjusts_gradually() -> None:
 
     assert math.isclose(result["yearly_withdrawals"][0], 4.5, rel_tol=1e-6)
     assert math.isclose(result["yearly_withdrawals"][1], 2.9325, rel_tol=1e-6)
+
+
+def test_vectorized_engine_matches_scalar_engine() -> None:
+    """Ensure the vectorized engine reproduces the scalar engine exactly."""
+    rng = np.random.default_rng(7)
+    series = HistoricalSeries.from_columns(
+        range(1900, 1960),
+        rng.uniform(-0.4, 0.4, size=60),
+        rng.uniform(-0.05, 0.08, size=60),
+    )
+    req = SimulationInput(
+        start_year=1910,
+        retirement_years=30,
+        portfolio_start=1_000_000.0,
+        stock_allocation=0.7,
+        bond_allocation=0.3,
+        withdrawal_rate_start=0.05,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.08,
+        withdrawal_smoothing_up=0.4,
+        withdrawal_smoothing_down=0.1,
+        management_fee=0.01,
+        inflation_rate=0.03,
+        ss_recipients=[
+            SSRecipient(start_year=1925, monthly_amount=1500.0),
+            SSRecipient(start_year=1940, monthly_amount=900.0),
+        ],
+    )
+    start_years = range(1900, 1931)
+
+    scalar = simulate_rolling(req, series, start_years, engine="scalar")
+    vectorized = simulate_rolling(req, series, start_years, engine="vectorized")
+
+    assert not vectorized.success.all()
+    assert vectorized.to_runs(req.start_year) == scalar.to_runs(req.start_year)
+
+
+def test_monthly_engine_rolls_start_months() -> None:
+    """Pay monthly, record per year and roll every start month."""
+    months = 36
+    series = HistoricalSeries.from_columns(
+        range(2000 * 12, 2000 * 12 + months),
+        np.zeros(months),
+        np.zeros(months),
+        periods_per_year=12,
+    )
+    req = SimulationInput(
+        start_year=2000,
+        retirement_years=YEARS,
+        portfolio_start=1200.0,
+        stock_allocation=1.0,
+        bond_allocation=0.0,
+        withdrawal_rate_start=WITHDRAWAL_RATE,
+        withdrawal_rate_min=WITHDRAWAL_RATE / 2,
+        withdrawal_rate_max=WITHDRAWAL_RATE * 2,
+        inflation_rate=0.0,
+        ss_recipients=[SSRecipient(start_year=2001, monthly_amount=1.0)],
+    )
+
+    runs = simulate_rolling(
+        req, series, series.start_years(req.retirement_years), engine="monthly"
+    ).to_runs(req.start_year)
+
+    assert len(runs) == months - YEARS * 12 + 1
+    assert [(run["start_year"], run["start_month"]) for run in runs[:2]] == [(2000, 1), (2000, 2)]
+    assert [run["highlight"] for run in runs].count(True) == 1
+    first, last = runs[0], runs[-1]
+    assert first["yearly_withdrawals"] == pytest.approx([12.0, 12.0])
+    assert first["yearly_balances"] == pytest.approx([1200.0, 1188.0, 1188.0])
+    assert last["yearly_balances"] == pytest.approx([1200.0, 1200.0, 1200.0])
+
+
+def test_monthly_series_requires_the_monthly_engine() -> None:
+    """Reject mismatched engine and series resolutions."""
+    series = HistoricalSeries.from_columns(
+        range(24), np.zeros(24), np.zeros(24), periods_per_year=12
+    )
+    req = SimulationInput(
+        start_year=1900,
+        retirement_years=1,
+        portfolio_start=START_BALANCE,
+        stock_allocation=1.0,
+        bond_allocation=0.0,
+        withdrawal_rate_start=WITHDRAWAL_RATE,
+        withdrawal_rate_min=WITHDRAWAL_RATE,
+        withdrawal_rate_max=WITHDRAWAL_RATE,
+        inflation_rate=0.0,
+    )
+
+    with pytest.raises(ValueError, match="scalar engine needs an annual series"):
+        simulate_rolling(req, series, series.start_years(1), engine="scalar")
+
+
+@pytest.mark.parametrize("rebalancing", ["annual", "threshold", "none"])
+def test_engines_match_for_named_assets(rebalancing: str) -> None:
+    """Ensure both engines agree on a three-asset portfolio under every policy."""
+    rng = np.random.default_rng(11)
+    series = HistoricalSeries.from_columns(
+        range(1900, 1950),
+        rng.uniform(-0.4, 0.4, size=50),
+        rng.uniform(-0.05, 0.08, size=50),
+        extra_returns={"gold": rng.uniform(-0.2, 0.3, size=50)},
+    )
+    req = SimulationInput.model_validate(
+        {
+            "start_year": 1910,
+            "retirement_years": 25,
+            "portfolio_start": 1_000_000.0,
+            "allocations": {"stock": 0.5, "bond": 0.3, "gold": 0.2},
+            "rebalancing": rebalancing,
+            "rebalance_band": 0.1,
+            "withdrawal_rate_start": 0.05,
+            "withdrawal_rate_min": 0.03,
+            "withdrawal_rate_max": 0.08,
+            "management_fee": 0.01,
+            "inflation_rate": 0.03,
+        }
+    )
+    start_years = range(1900, 1926)
+
+    scalar = simulate_rolling(req, series, start_years, engine="scalar")
+    vectorized = simulate_rolling(req, series, start_years, engine="vectorized")
+
+    assert vectorized.to_runs(req.start_year) == scalar.to_runs(req.start_year)
+
+
+def test_rebalancing_policies_diverge_when_weights_drift() -> None:
+    """Let buy-and-hold weights drift toward the winning asset."""
+    series = HistoricalSeries.from_columns(range(2000, 2003), [1.0, 1.0, 1.0], [0.0, 0.0, 0.0])
+    inputs = {
+        "start_year": 2000,
+        "retirement_years": 3,
+        "portfolio_start": START_BALANCE,
+        "stock_allocation": 0.5,
+        "bond_allocation": 0.5,
+        "withdrawal_rate_start": WITHDRAWAL_RATE,
+        "withdrawal_rate_min": WITHDRAWAL_RATE,
+        "withdrawal_rate_max": WITHDRAWAL_RATE,
+        "inflation_rate": 0.0,
+    }
+
+    def ending_balance(**policy: object) -> float:
+        req = SimulationInput.model_validate({**inputs, **policy})
+        return simulate_rolling(req, series, range(2000, 2001)).ending_balances[0].item()
+
+    annual = ending_balance(rebalancing="annual")
+    held = ending_balance(rebalancing="none")
+
+    assert held > annual
+    assert ending_balance(rebalancing="threshold", rebalance_band=1.0) == held
+    assert ending_balance(rebalancing="threshold", rebalance_band=0.01) == annual
+
+
+def test_unknown_assets_are_rejected() -> None:
+    """Refuse allocations naming assets the series does not carry."""
+    series = HistoricalSeries.from_mapping({2000: (0.0, 0.0)})
+    req = SimulationInput(
+        start_year=2000,
+        retirement_years=1,
+        portfolio_start=START_BALANCE,
+        allocations={"stock": 0.5, "gold": 0.5},
+        withdrawal_rate_start=WITHDRAWAL_RATE,
+        withdrawal_rate_min=WITHDRAWAL_RATE,
+        withdrawal_rate_max=WITHDRAWAL_RATE,
+        inflation_rate=0.0,
+    )
+
+    with pytest.raises(ValueError, match="Unknown assets: gold"):
+        simulate_rolling(req, series, range(2000, 2001), engine="scalar")
@@ -4,7 +4,22 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from backend.app.summary import compute_quantile_indices, summarize_results
+import numpy as np
+import pytest
+
+from backend.app.simulate import PathResult
+from backend.app.sketch import DEFAULT_K
+from backend.app.summary import (
+    BAND_PERCENTILES,
+    SummaryAccumulator,
+    compute_quantile_indices,
+    percentile,
+    percentile_bands,
+    quantile_indices_from_totals,
+    summarize_and_rank,
+    summarize_results,
+    summarize_totals,
+)
 
 if TYPE_CHECKING:
     from backend.app.models import SimulationRun
@@ -18,6 +33,8 @@ SPENDING_MIN = 10.0
 SPENDING_MAX = 50.0
 FEE_MIN = 1.0
 FEE_MAX = 5.0
+RANDOM_RUNS = 101
+SKETCH_RUNS = 200_000
 
 
 def test_summary_counts_and_quantiles() -> None:
@@ -191,3 +208,79 @@ def test_quantile_indices_merge_and_dedupe() -> None:
     indices = compute_quantile_indices(results)
 
     assert indices == [0, 1, 2, 3, 4]
+
+
+def test_single_sort_summary_matches_percentile() -> None:
+    """The one-sort summary and indices match the per-call percentile helper."""
+    rng = np.random.default_rng(3)
+    ending = rng.normal(1000.0, 300.0, size=RANDOM_RUNS)
+    withdrawals = rng.normal(500.0, 50.0, size=RANDOM_RUNS)
+    fees = rng.uniform(0.0, 20.0, size=RANDOM_RUNS)
+
+    summary, indices = summarize_and_rank(7, ending, withdrawals, fees)
+
+    assert summary == summarize_totals(7, ending, withdrawals, fees)
+    assert indices == quantile_indices_from_totals(ending, withdrawals)
+    assert summary.ending_balance_percentiles["p10"] == percentile(ending.tolist(), 10)
+    for label, value in summary.portfolio_quantiles.items():
+        assert value == percentile(ending.tolist(), int(label[1:]))
+    assert summary.spending_quantiles["p25"] == percentile(withdrawals.tolist(), 25)
+    assert summary.fee_quantiles["p75"] == percentile(fees.tolist(), 75)
+
+
+def test_percentile_bands_match_percentile_per_year() -> None:
+    """Every band value is the per-year percentile across runs."""
+    rng = np.random.default_rng(5)
+    balances = rng.normal(1000.0, 300.0, size=(RANDOM_RUNS, TOTAL_RUNS + 1))
+    withdrawals = rng.normal(50.0, 5.0, size=(RANDOM_RUNS, TOTAL_RUNS))
+    fees = rng.uniform(0.0, 2.0, size=(RANDOM_RUNS, TOTAL_RUNS))
+
+    bands = percentile_bands(balances, withdrawals, fees)
+
+    assert list(bands.balances) == [f"p{p}" for p in BAND_PERCENTILES]
+    assert len(bands.balances["p50"]) == TOTAL_RUNS + 1
+    for p in BAND_PERCENTILES:
+        label = f"p{p}"
+        for year in range(TOTAL_RUNS):
+            assert bands.balances[label][year] == percentile(balances[:, year].tolist(), p)
+            assert bands.withdrawals[label][year] == percentile(withdrawals[:, year].tolist(), p)
+            assert bands.fees[label][year] == percentile(fees[:, year].tolist(), p)
+
+
+def test_sketched_accumulators_merge_within_error_bound() -> None:
+    """Merged sketch summaries stay within the documented rank error of the exact ones."""
+    rng = np.random.default_rng(4)
+    ending = rng.lognormal(7.0, 1.0, size=SKETCH_RUNS)
+    withdrawals = rng.normal(500.0, 50.0, size=SKETCH_RUNS)
+    fees = rng.uniform(0.0, 20.0, size=SKETCH_RUNS)
+    merged = SummaryAccumulator(sketch_k=DEFAULT_K)
+    for part in np.array_split(np.arange(SKETCH_RUNS), 8):
+        worker = SummaryAccumulator(sketch_k=DEFAULT_K, sketch_seed=int(part[0]))
+        worker.add(
+            PathResult(
+                start_years=part,
+                success=ending[part] > 0,
+                ending_balances=ending[part],
+                total_withdrawals=withdrawals[part],
+                total_fees=fees[part],
+            )
+        )
+        merged.merge(worker)
+
+    summary = merged.summary()
+
+    assert summary.total_runs == SKETCH_RUNS
+    assert summary.success_count == SKETCH_RUNS
+    assert summary.portfolio_quantiles["p0"] == ending.min()
+    assert summary.portfolio_quantiles["p100"] == ending.max()
+    for values, quantiles in (
+        (ending, summary.portfolio_quantiles),
+        (withdrawals, summary.spending_quantiles),
+        (fees, summary.fee_quantiles),
+    ):
+        ordered = np.sort(values)
+        for label, value in quantiles.items():
+            rank = np.searchsorted(ordered, value) / SKETCH_RUNS
+            assert abs(rank - int(label[1:]) / 100) <= merged.rank_error
+    with pytest.raises(ValueError, match="not retained"):
+        merged.quantile_indices()
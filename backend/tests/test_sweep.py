@@ -0,0 +1,91 @@
+"""Tests for batched parameter sweeps."""
+
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from backend.app.data import HistoricalSeries
+from backend.app.models import SimulationInput, SweepAxis, SweepRequest
+from backend.app.simulate import simulate_rolling
+from backend.app.summary import percentile
+from backend.app.sweep import run_sweep, sweep_inputs
+
+GRID_POINTS = 6
+HTTP_BAD_REQUEST = 400
+
+
+def make_request() -> SweepRequest:
+    """Build a two-axis sweep over allocation and starting withdrawal rate."""
+    base = SimulationInput(
+        start_year=1960,
+        retirement_years=20,
+        portfolio_start=1000.0,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.05,
+        withdrawal_rate_min=0.03,
+        withdrawal_rate_max=0.08,
+        withdrawal_smoothing_up=0.5,
+        withdrawal_smoothing_down=0.0,
+        management_fee=0.01,
+        inflation_rate=0.03,
+        ss_recipients=[],
+    )
+    return SweepRequest(
+        base=base,
+        axes=[
+            SweepAxis(field="stock_allocation", start=0.2, stop=1.0, steps=3),
+            SweepAxis(field="withdrawal_rate_start", start=0.04, stop=0.08, steps=2),
+        ],
+    )
+
+
+def test_sweep_inputs_expand_grid_and_move_bonds() -> None:
+    """Expand the grid row-major and keep allocations summing to one."""
+    inputs = sweep_inputs(make_request())
+
+    assert len(inputs) == GRID_POINTS
+    assert [req.withdrawal_rate_start for req in inputs[:2]] == [0.04, 0.08]
+    assert all(math.isclose(req.stock_allocation + req.bond_allocation, 1.0) for req in inputs)
+
+
+def test_sweep_inputs_reject_out_of_range_axes() -> None:
+    """Validate axis endpoints against the input model."""
+    request = make_request()
+    request.axes[0].stop = 1.5
+
+    with pytest.raises(ValidationError):
+        sweep_inputs(request)
+
+
+def test_sweep_rejects_allocation_axis_with_allocations(client: TestClient) -> None:
+    """Refuse to sweep stock_allocation when the allocation map would override it."""
+    payload = make_request().model_dump()
+    payload["base"]["allocations"] = {"stock": 0.5, "bond": 0.5}
+
+    response = client.post("/api/v1/sweep", json=payload)
+
+    assert response.status_code == HTTP_BAD_REQUEST
+    assert "omit allocations" in response.json()["detail"]
+
+
+def test_sweep_matches_individual_simulations(series: HistoricalSeries) -> None:
+    """Ensure each grid point matches a standalone rolling simulation."""
+    request = make_request()
+    inputs = sweep_inputs(request)
+
+    response = run_sweep(request, inputs, series)
+
+    assert len(response.points) == GRID_POINTS
+    for req, point in zip(inputs, response.points, strict=True):
+        paths = simulate_rolling(req, series, series.start_years(req.retirement_years))
+        ending_balances = paths.ending_balances.tolist()
+        assert point.total_runs == len(ending_balances)
+        assert point.success_count == int(paths.success.sum())
+        assert point.ending_balance_percentiles["p50"] == percentile(ending_balances, 50)
+    assert response.points[0].values == {
+        "stock_allocation": 0.2,
+        "withdrawal_rate_start": 0.04,
+    }
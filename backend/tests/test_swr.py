@@ -0,0 +1,72 @@
+"""Tests for the maximum withdrawal rate solver."""
+
+import numpy as np
+
+from backend.app.data import HistoricalSeries
+from backend.app.models import SafeWithdrawalRequest, SimulationInput
+from backend.app.simulate import simulate_one_start_year
+from backend.app.swr import cohort_rate, solve_safe_withdrawal
+
+TOLERANCE = 1e-4
+MAX_RATE = 0.2
+COHORT_RATE = 0.03
+
+
+def make_request() -> SafeWithdrawalRequest:
+    """Build a constant-dollar withdrawal request."""
+    base = SimulationInput(
+        start_year=1960,
+        retirement_years=25,
+        portfolio_start=1000.0,
+        stock_allocation=0.6,
+        bond_allocation=0.4,
+        withdrawal_rate_start=0.04,
+        withdrawal_rate_min=0.001,
+        withdrawal_rate_max=0.04,
+        withdrawal_smoothing_up=0.0,
+        withdrawal_smoothing_down=0.0,
+        management_fee=0.005,
+        inflation_rate=0.03,
+        ss_recipients=[],
+    )
+    return SafeWithdrawalRequest(
+        base=base, target_success_rate=0.9, max_rate=MAX_RATE, tolerance=TOLERANCE
+    )
+
+
+def test_solver_brackets_each_start_year() -> None:
+    """Each solved rate survives while a slightly higher rate fails."""
+    rng = np.random.default_rng(11)
+    series = HistoricalSeries.from_columns(
+        range(1950, 2000),
+        rng.uniform(-0.35, 0.4, size=50),
+        rng.uniform(0.0, 0.07, size=50),
+    )
+    request = make_request()
+
+    response = solve_safe_withdrawal(request, series)
+
+    assert len(response.start_years) == len(series.start_years(request.base.retirement_years))
+    for item in response.start_years:
+        for rate, expected in (
+            (item.max_withdrawal_rate, True),
+            (item.max_withdrawal_rate + 2 * TOLERANCE, False),
+        ):
+            if rate > MAX_RATE:
+                continue
+            req = request.base.model_copy(
+                update={
+                    "withdrawal_rate_start": rate,
+                    "withdrawal_rate_max": max(request.base.withdrawal_rate_max, rate),
+                }
+            )
+            assert simulate_one_start_year(req, series, item.start_year)["success"] is expected
+
+
+def test_cohort_rate_uses_target_share() -> None:
+    """Pick the highest rate survived by the target share of start years."""
+    rates = np.array([0.05, 0.02, 0.04, 0.03, 0.06])
+
+    assert cohort_rate(rates, 0.8) == COHORT_RATE
+    assert cohort_rate(rates, 1.0) == min(rates)
+    assert cohort_rate(np.array([]), 0.9) == 0.0
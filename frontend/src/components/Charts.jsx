@@ -1,8 +1,10 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import {
+  Area,
   Bar,
   BarChart,
   CartesianGrid,
+  ComposedChart,
   LabelList,
   Line,
   LineChart,
@@ -14,8 +16,10 @@ import {
 
 export default function Charts({ run, showQuantiles }) {
   const { results, inputs } = run;
-  const series = filterSeries(results, showQuantiles);
+  const [showBalanceByYear, setShowBalanceByYear] = useState(false);
   const [showWithdrawlByYear, setShowWithdrawlByYear] = useState(false);
+  const runs = usePerYearRuns(run, showBalanceByYear || showWithdrawlByYear);
+  const series = filterSeries(runs.results, results.quantile_indices, showQuantiles);
   const [showPortfolioQuantiles, setShowPortfolioQuantiles] = useState(false);
   const [showWithdrawlQuantiles, setShowWithdrawlQuantiles] = useState(false);
   const [showFeeQuantiles, setShowFeeQuantiles] = useState(false);
@@ -28,42 +32,69 @@ export default function Charts({ run, showQuantiles }) {
   const spendingRange = getValueRange(series, "yearly_withdrawals");
   const ticks = buildTicks(range.min, range.max, 5);
   const spendingTicks = buildTicks(spendingRange.min, spendingRange.max, 5);
+  const bands = results.bands;
 
   return (
     <div className="charts">
+      {bands && (
+        <div className="chart-card">
+          <h2>Portfolio Balance Percentiles</h2>
+          <p className="chart-meta">{formatInputs(inputs)}</p>
+          <FanChart
+            data={buildBandData(bands.balances)}
+            startYear={inputs?.start_year}
+            color="#54e0a4"
+          />
+        </div>
+      )}
+
       <div className="chart-card">
-        <h2>Portfolio Balance by Year</h2>
-        <p className="chart-meta">{formatInputs(inputs)}</p>
-        <ResponsiveContainer width="100%" height={240}>
-          <LineChart data={balanceData}>
-            <CartesianGrid strokeDasharray="3 3" stroke="#233" />
-            <XAxis
-              dataKey="year"
-              stroke="#9fb"
-              tickFormatter={(value) => toYearLabel(value, inputs?.start_year)}
-            />
-            <YAxis
-              stroke="#9fb"
-              type="number"
-              domain={[range.min, range.max]}
-              tickFormatter={formatCompactCurrency}
-              ticks={ticks}
-              width={90}
-            />
-            <ReferenceLine y={0} stroke="#ffb347" strokeDasharray="6 6" />
-            {series.map((item) => (
-              <Line
-                key={item.start_year}
-                type="linear"
-                dataKey={seriesKey(item.start_year)}
-                stroke={item.highlight ? "#ffb347" : "rgba(84, 224, 164, 0.3)"}
-                strokeWidth={item.highlight ? 2.5 : 1}
-                dot={false}
-                isAnimationActive={false}
-              />
-            ))}
-          </LineChart>
-        </ResponsiveContainer>
+        <div className="chart-header">
+          <button
+            type="button"
+            className="chart-toggle"
+            onClick={() => setShowBalanceByYear((value) => !value)}
+            aria-expanded={showBalanceByYear}
+          >
+            <span className={`caret ${showBalanceByYear ? "open" : ""}`} />
+          </button>
+          <h2>Portfolio Balance by Year</h2>
+        </div>
+        {showBalanceByYear && (
+          <>
+            <p className="chart-meta">{runs.error || formatInputs(inputs)}</p>
+            <ResponsiveContainer width="100%" height={240}>
+              <LineChart data={balanceData}>
+                <CartesianGrid strokeDasharray="3 3" stroke="#233" />
+                <XAxis
+                  dataKey="year"
+                  stroke="#9fb"
+                  tickFormatter={(value) => toYearLabel(value, inputs?.start_year)}
+                />
+                <YAxis
+                  stroke="#9fb"
+                  type="number"
+                  domain={[range.min, range.max]}
+                  tickFormatter={formatCompactCurrency}
+                  ticks={ticks}
+                  width={90}
+                />
+                <ReferenceLine y={0} stroke="#ffb347" strokeDasharray="6 6" />
+                {series.map((item) => (
+                  <Line
+                    key={item.start_year}
+                    type="linear"
+                    dataKey={seriesKey(item.start_year)}
+                    stroke={item.highlight ? "#ffb347" : "rgba(84, 224, 164, 0.3)"}
+                    strokeWidth={item.highlight ? 2.5 : 1}
+                    dot={false}
+                    isAnimationActive={false}
+                  />
+                ))}
+              </LineChart>
+            </ResponsiveContainer>
+          </>
+        )}
       </div>
 
       <div className="chart-card">
@@ -80,7 +111,7 @@ export default function Charts({ run, showQuantiles }) {
         </div>
         {showWithdrawlByYear && (
           <>
-            <p className="chart-meta">{formatInputs(inputs)}</p>
+            <p className="chart-meta">{runs.error || formatInputs(inputs)}</p>
             <ResponsiveContainer width="100%" height={300}>
               <LineChart data={spendingData}>
                 <CartesianGrid strokeDasharray="3 3" stroke="#233" />
@@ -236,6 +267,54 @@ export default function Charts({ run, showQuantiles }) {
   );
 }
 
+function FanChart({ data, startYear, color }) {
+  return (
+    <ResponsiveContainer width="100%" height={240}>
+      <ComposedChart data={data}>
+        <CartesianGrid strokeDasharray="3 3" stroke="#233" />
+        <XAxis
+          dataKey="year"
+          stroke="#9fb"
+          tickFormatter={(value) => toYearLabel(value, startYear)}
+        />
+        <YAxis stroke="#9fb" tickFormatter={formatCompactCurrency} width={90} />
+        <ReferenceLine y={0} stroke="#ffb347" strokeDasharray="6 6" />
+        <Area
+          dataKey="outer"
+          stroke="none"
+          fill={color}
+          fillOpacity={0.15}
+          isAnimationActive={false}
+        />
+        <Area
+          dataKey="inner"
+          stroke="none"
+          fill={color}
+          fillOpacity={0.3}
+          isAnimationActive={false}
+        />
+        <Line
+          type="linear"
+          dataKey="median"
+          stroke={color}
+          strokeWidth={2}
+          dot={false}
+          isAnimationActive={false}
+        />
+      </ComposedChart>
+    </ResponsiveContainer>
+  );
+}
+
+function buildBandData(band) {
+  return (band.p50 || []).map((median, index) => ({
+    year: index,
+    outer: [band.p5[index], band.p95[index]],
+    inner: [band.p25[index], band.p75[index]],
+    median,
+  }));
+}
+
 function seriesKey(startYear) {
   return `start_${startYear}`;
 }
@@ -352,12 +431,48 @@ function toQuantileBars(quantiles) {
   }));
 }
 
-function filterSeries(results, showQuantiles) {
-  const series = results.results;
+function usePerYearRuns(run, needed) {
+  const [runs, setRuns] = useState({ results: run.results.results || null, error: null });
+
+  useEffect(() => {
+    if (!needed || runs.results) {
+      return undefined;
+    }
+    let cancelled = false;
+    fetch("/api/v1/simulate?view=runs", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(run.inputs),
+    })
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error("Per-year runs could not be loaded.");
+        }
+        return response.json();
+      })
+      .then((data) => {
+        if (!cancelled) {
+          setRuns({ results: data.results, error: null });
+        }
+      })
+      .catch((error) => {
+        if (!cancelled) {
+          setRuns({ results: null, error: error.message });
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [needed, run, runs.results]);
+
+  return runs;
+}
+
+function filterSeries(runs, indices, showQuantiles) {
+  const series = runs || [];
   if (!showQuantiles) {
     return series;
   }
-  const indices = results.quantile_indices || [];
-  const indexSet = new Set(indices);
+  const indexSet = new Set(indices || []);
   return series.filter((_, index) => indexSet.has(index));
 }
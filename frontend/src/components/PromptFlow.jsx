@@ -293,7 +293,7 @@ export default function PromptFlow() {
     setLoading(true);
     pushMessage("system", "Running simulation...");
     try {
-      const response = await fetch("/api/v1/simulate", {
+      const response = await fetch("/api/v1/simulate?view=bands", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),